@@ -0,0 +1,72 @@
+import math
+from bigram_cells import CODES, SQRT3, key_code
+
+class AdaptiveNoise:
+    """Sizes per-key delays from an online model of the user's own rhythm.
+
+    For each ASCII bigram it keeps an EWMA of the inter-key
+    interval and its variance in flat preallocated lists. Intervals that
+    already vary a lot need little added noise; consistent ones, or ones
+    whose mean stands out from the user's overall mean, get more. A key's
+    delay is uniform on [0, 2h], where h is sized so the released
+    intervals' standard deviation reaches `masking` times the bigram's
+    deviation from the overall mean plus `floor`.
+    """
+
+    __slots__ = ('alpha', 'masking', 'floor', 'min_sd', 'warmup', 'max_gap',
+                 'means', 'variances', 'counts', 'global_mean', '_prev_code', '_prev_time')
+
+    def __init__(self, alpha: float = 0.05, masking: float = 1.5, floor: float = 0.02,
+                 min_sd: float = 0.002, warmup: int = 8, max_gap: float = 2.0):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.masking = masking
+        self.floor = floor
+        self.min_sd = min_sd
+        self.warmup = warmup
+        self.max_gap = max_gap
+        cells = CODES * CODES
+        self.means = [0.0] * cells
+        self.variances = [0.0] * cells
+        self.counts = [0] * cells
+        self.global_mean = 0.0
+        self._prev_code = 0
+        self._prev_time = float('-inf')
+
+    def observe(self, key: str, now: float) -> int:
+        """Fold the interval since the previous key into its bigram cell; returns the cell."""
+        code = key_code(key)
+        cell = self._prev_code * CODES + code
+        interval = now - self._prev_time
+        self._prev_code = code
+        self._prev_time = now
+        if 0.0 < interval <= self.max_gap:
+            alpha = self.alpha
+            count = self.counts[cell]
+            if count < self.warmup:
+                # Plain running mean until the EWMA has enough history
+                self.counts[cell] = count + 1
+                weight = 1.0 / (count + 1)
+            else:
+                weight = alpha
+            delta = interval - self.means[cell]
+            self.means[cell] += weight * delta
+            self.variances[cell] = (1.0 - weight) * (self.variances[cell] + weight * delta * delta)
+            self.global_mean += alpha * (interval - self.global_mean)
+        return cell
+
+    def noise_sd(self, cell: int, max_sd: float) -> float:
+        """Delay standard deviation needed to mask the cell, within [min_sd, max_sd]."""
+        if self.counts[cell] < self.warmup:
+            return max_sd
+        target = self.masking * abs(self.means[cell] - self.global_mean) + self.floor
+        # Independent delays add twice their variance to an interval
+        needed = (target * target - self.variances[cell]) / 2
+        sd = math.sqrt(needed) if needed > 0 else 0.0
+        return min(max(sd, self.min_sd), max_sd)
+
+    def delay(self, key: str, now: float, rng, max_delay: float) -> float:
+        """Observe a key and draw its delay; the mean delay never exceeds max_delay."""
+        half = self.noise_sd(self.observe(key, now), max_delay / SQRT3) * SQRT3
+        return half + rng.uniform(-half, half)
@@ -0,0 +1,24 @@
+import math
+from typing import Optional
+
+# Bigram cells are indexed by ASCII code pairs; other keys share code 0
+CODES = 128
+# Uniform noise on [-h, h] has standard deviation h / SQRT3
+SQRT3 = math.sqrt(3)
+
+def key_code(key: Optional[str]) -> int:
+    """Code of a key in bigram cells; 0 for None, multi-character and non-ASCII keys."""
+    if key is None or len(key) != 1:
+        return 0
+    code = ord(key)
+    return code if code < CODES else 0
+
+def bigram_cells(keys):
+    """Cell of each key paired with the one before it, for an array of code points; the first key follows code 0."""
+    import numpy as np
+    codes = np.where((keys >= 0) & (keys < CODES), keys, 0)
+    cells = np.empty(len(codes), dtype=np.int64)
+    if len(codes):
+        cells[0] = codes[0]
+        cells[1:] = codes[:-1] * CODES + codes[1:]
+    return cells
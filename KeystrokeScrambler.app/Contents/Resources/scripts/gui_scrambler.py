@@ -1,3 +1,4 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sys
@@ -6,8 +7,13 @@ import subprocess
 import time
 import platform
 import logging
+import queue
+from collections import deque
 from typing import Optional, Tuple
 from keystroke_core import KeystrokeScrambler
+from perf_samples import summarize
+from scrambler_config import ConfigWatcher
+from scrambler_daemon import DEFAULT_SOCKET_PATH, DaemonClient
 
 # Set up logging
 logging.basicConfig(
@@ -97,18 +103,61 @@ Would you like to open System Preferences now?"""
                 return False
         return False
 
+class CoalescedCall:
+    """Collapses bursts of calls into one deferred call on the Tk thread.
+
+    With restart=False the call runs once per interval at most (throttle);
+    with restart=True it runs once the calls stop for an interval (debounce).
+    """
+
+    def __init__(self, widget, interval_ms: int, callback, restart: bool = False):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.callback = callback
+        self.restart = restart
+        self._pending = None
+
+    def __call__(self, *_args):
+        if self._pending is not None:
+            if not self.restart:
+                return
+            self.widget.after_cancel(self._pending)
+        self._pending = self.widget.after(self.interval_ms, self._fire)
+
+    def flush(self):
+        """Run a pending call now."""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._fire()
+
+    def _fire(self):
+        self._pending = None
+        self.callback()
+
 class CustomSlider(ttk.Scale):
-    """Custom slider widget with value display."""
+    """Custom slider widget with value display.
+
+    on_change only sees the settled value: the label refreshes at most once
+    per frame while dragging, and on_change runs after the slider rests or
+    the mouse button is released.
+    """
     
-    def __init__(self, master, **kwargs):
+    def __init__(self, master, on_change=None, settle_ms: int = 150, **kwargs):
         self.value_var = tk.StringVar()
-        super().__init__(master, **kwargs)
+        self.on_change = on_change
+        super().__init__(master, command=self._on_move, **kwargs)
         self.value_label = ttk.Label(master, textvariable=self.value_var, style="Value.TLabel")
         self.value_label.pack()
-        self.bind("<Motion>", self._update_value_label)
+        self._refresh_label = CoalescedCall(self, 33, self._update_value_label)
+        self._commit = CoalescedCall(self, settle_ms, self._commit_value, restart=True)
+        self.bind("<ButtonRelease-1>", lambda _event: self._commit.flush())
         self._update_value_label()
 
-    def _update_value_label(self, _event=None):
+    def _on_move(self, _value):
+        self._refresh_label()
+        self._commit()
+
+    def _update_value_label(self):
         """Update the displayed value label."""
         try:
             value = self.get()
@@ -116,6 +165,16 @@ class CustomSlider(ttk.Scale):
         except Exception as e:
             logging.error(f"Error updating slider value: {e}")
 
+    def refresh(self):
+        """Update the label after the linked variable was set directly."""
+        self._refresh_label()
+
+    def _commit_value(self):
+        """Hand the settled value to on_change."""
+        self._update_value_label()
+        if self.on_change:
+            self.on_change(self.get())
+
 class StatusIndicator(ttk.Frame):
     """Status indicator widget showing the current state of the scrambler."""
     
@@ -141,11 +200,102 @@ class StatusIndicator(ttk.Frame):
         except Exception as e:
             logging.error(f"Error updating status: {e}")
 
+class Sparkline(tk.Canvas):
+    """Small line chart of the most recent values of one metric."""
+
+    def __init__(self, master, points: int = 60, width: int = 120, height: int = 24, **kwargs):
+        super().__init__(master, width=width, height=height, highlightthickness=0, bg="#f0e6ff", **kwargs)
+        self.values = deque([0.0] * points, maxlen=points)
+        self.chart_width = width
+        self.chart_height = height
+        # One line item whose coordinates are replaced on each redraw
+        self.line = self.create_line(0, height, width, height, fill="#6b5b95", width=1.5)
+
+    def push(self, value: float):
+        self.values.append(value)
+
+    def redraw(self):
+        top = max(self.values) or 1.0
+        step = self.chart_width / (len(self.values) - 1)
+        scale = (self.chart_height - 2) / top
+        coords = []
+        for i, value in enumerate(self.values):
+            coords.append(i * step)
+            coords.append(self.chart_height - 1 - value * scale)
+        self.coords(self.line, *coords)
+
+class PerformancePanel(ttk.Frame):
+    """Live typing speed, added latency, queue depth and scheduler lateness.
+
+    Reads the engine's PerfSampler without locking and redraws at most
+    `rate_hz` times a second, so it costs the GUI thread a fixed amount of
+    work however fast keys arrive.
+    """
+
+    METRICS = (
+        ('wpm', "WPM", "{:.0f}"),
+        ('latency_p50_ms', "Added p50", "{:.0f} ms"),
+        ('latency_p99_ms', "Added p99", "{:.0f} ms"),
+        ('pending', "Queue", "{:.0f}"),
+        ('lateness_p99_ms', "Late p99", "{:.1f} ms"),
+    )
+
+    def __init__(self, master, scrambler, rate_hz: float = 4.0, window: float = 10.0, **kwargs):
+        super().__init__(master, **kwargs)
+        self.scrambler = scrambler
+        self.interval_ms = int(1000 / rate_hz)
+        self.window = window
+        self.values = {}
+        self.sparklines = {}
+        for row, (name, title, _) in enumerate(self.METRICS):
+            ttk.Label(self, text=title).grid(row=row, column=0, sticky='w')
+            self.values[name] = tk.StringVar(value="–")
+            ttk.Label(self, textvariable=self.values[name], style="Value.TLabel", width=9, anchor='e').grid(row=row, column=1, sticky='e', padx=8)
+            self.sparklines[name] = Sparkline(self)
+            self.sparklines[name].grid(row=row, column=2, pady=1)
+        self._after_id = None
+
+    def start(self):
+        if self._after_id is None:
+            self._tick()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logging.error(f"Error refreshing performance panel: {e}")
+        self._after_id = self.after(self.interval_ms, self._tick)
+
+    def refresh(self):
+        """Take one sample of the engine and redraw every metric."""
+        engine = self.scrambler
+        now = engine.backend.now()
+        metrics = summarize(engine.samples.snapshot(now - self.window), now, self.window)
+        metrics['pending'] = len(engine.pending)
+        for name, _, fmt in self.METRICS:
+            value = metrics[name]
+            self.values[name].set(fmt.format(value))
+            self.sparklines[name].push(value)
+            self.sparklines[name].redraw()
+
 class ScramblerGUI:
     """Main GUI application for the Keystroke Scrambler."""
+
+    # How often the Tk thread picks up settings published on other threads
+    CONFIG_POLL_MS = 100
     
-    def __init__(self):
+    def __init__(self, scrambler=None):
+        """Create the GUI for a local engine, or for a given one such as a DaemonClient."""
         logging.debug("Initializing ScramblerGUI...")
+        self.owns_scrambler = scrambler is None
+        # Snapshots from ConfigWatcher's thread; Tk may only be called from the main thread
+        self._config_updates = queue.Queue()
+        self._config_poll = None
         
         if platform.system() != 'Darwin':
             logging.error("Unsupported platform")
@@ -156,25 +306,31 @@ class ScramblerGUI:
         try:
             self.root = tk.Tk()
             self.root.title("Keystroke Scrambler")
-            self.root.geometry("400x600")
+            self.root.geometry("400x760")
             self.root.configure(bg="#f0e6ff")
             
             self._setup_styles()
             
-            # Check permissions before initializing
-            if not self._check_and_request_permissions():
-                logging.warning("Permission check failed")
-                self.root.destroy()
-                sys.exit(1)
-                
-            try:
-                self.scrambler = KeystrokeScrambler()
-            except Exception as e:
-                logging.error(f"Failed to initialize scrambler: {e}")
-                messagebox.showerror("Initialization Error", 
-                                   f"Failed to initialize scrambler: {e}")
-                self.root.destroy()
-                sys.exit(1)
+            if self.owns_scrambler:
+                # Check permissions before initializing
+                if not self._check_and_request_permissions():
+                    logging.warning("Permission check failed")
+                    self.root.destroy()
+                    sys.exit(1)
+
+                try:
+                    scrambler = KeystrokeScrambler(self.root)
+                except Exception as e:
+                    logging.error(f"Failed to initialize scrambler: {e}")
+                    messagebox.showerror("Initialization Error", 
+                                       f"Failed to initialize scrambler: {e}")
+                    self.root.destroy()
+                    sys.exit(1)
+            self.scrambler = scrambler
+            self.config_watcher = None
+            if self.owns_scrambler:
+                self.config_watcher = ConfigWatcher(scrambler.config_store)
+                self.config_watcher.start()
                 
             self._setup_gui()
             self._setup_keybindings()
@@ -272,6 +428,9 @@ class ScramblerGUI:
             # Status section
             self._create_status()
             
+            # Live performance section
+            self._create_performance()
+            
             # Help section
             self._create_help()
             
@@ -331,16 +490,21 @@ class ScramblerGUI:
             
             # Base delay slider
             ttk.Label(settings_frame, text="Base Delay:", style="Subheader.TLabel").pack()
-            self.delay_var = tk.DoubleVar(value=100)
+            store = getattr(self.scrambler, 'config_store', None)
+            self.delay_var = tk.DoubleVar(value=store.current.base_delay * 1000 if store else 100)
             self.delay_slider = CustomSlider(
                 settings_frame,
                 from_=50,
                 to=200,
                 variable=self.delay_var,
                 orient='horizontal',
-                command=self._update_delay
+                on_change=self._update_delay
             )
             self.delay_slider.pack(fill='x', pady=10)
+            if store:
+                # Follow reloads and other writers so the slider shows the delay in effect
+                store.add_listener(self._on_config_changed)
+                self._config_poll = self.root.after(self.CONFIG_POLL_MS, self._drain_config_updates)
         except Exception as e:
             logging.error(f"Error creating settings: {e}")
             raise
@@ -354,6 +518,20 @@ class ScramblerGUI:
             logging.error(f"Error creating status: {e}")
             raise
 
+    def _create_performance(self):
+        """Create the live performance dashboard for a local engine."""
+        self.performance_panel = None
+        # A DaemonClient has no sample ring to read
+        if not hasattr(self.scrambler, 'samples'):
+            return
+        try:
+            self.performance_panel = PerformancePanel(self.root, self.scrambler)
+            self.performance_panel.pack(pady=10, padx=20, fill='x')
+            self.performance_panel.start()
+        except Exception as e:
+            logging.error(f"Error creating performance panel: {e}")
+            raise
+
     def _create_help(self):
         """Create the help section."""
         try:
@@ -414,18 +592,46 @@ class ScramblerGUI:
         
         _animate(0 if enabled else 1)
 
-    def _update_delay(self, *args):
+    def _on_config_changed(self, config):
+        """Queue a new snapshot for the Tk thread; called on whichever thread published it."""
+        self._config_updates.put(config)
+
+    def _drain_config_updates(self):
+        """Show the newest queued snapshot's delay, then poll again."""
+        config = None
+        try:
+            while True:
+                config = self._config_updates.get_nowait()
+        except queue.Empty:
+            pass
+        if config is not None:
+            self._show_delay(config.base_delay)
+        self._config_poll = self.root.after(self.CONFIG_POLL_MS, self._drain_config_updates)
+
+    def _show_delay(self, seconds):
+        # Setting the variable moves the slider without calling on_change
+        self.delay_var.set(seconds * 1000)
+        self.delay_slider.refresh()
+
+    def _update_delay(self, value):
         """Update the scrambler's base delay."""
         try:
-            self.scrambler.base_delay = self.delay_var.get() / 1000
+            self.scrambler.set_base_delay(value / 1000)
         except Exception as e:
             logging.error(f"Error updating delay: {e}")
 
     def _on_closing(self):
         """Handle window closing event."""
         try:
-            if self.scrambler:
+            if self.performance_panel:
+                self.performance_panel.stop()
+            if self._config_poll is not None:
+                self.root.after_cancel(self._config_poll)
+            if self.config_watcher:
+                self.config_watcher.stop()
+            if self.scrambler and self.owns_scrambler:
                 self.scrambler.stop()
+                self.scrambler.flush()
         except Exception as e:
             logging.error(f"Error during cleanup: {e}")
         finally:
@@ -441,16 +647,21 @@ class ScramblerGUI:
             messagebox.showerror("Error", f"Application error: {str(e)}")
         finally:
             try:
-                if self.scrambler:
+                if self.scrambler and self.owns_scrambler:
                     self.scrambler.stop()
             except Exception as e:
                 logging.error(f"Error during final cleanup: {e}")
 
 def main():
     """Main entry point for the application."""
+    parser = argparse.ArgumentParser(description="Keystroke Scrambler")
+    parser.add_argument('--connect', nargs='?', const=DEFAULT_SOCKET_PATH, metavar='SOCKET',
+                        help="control a running scrambler_daemon instead of a local engine")
+    args = parser.parse_args()
+
     try:
         logging.info("Starting application...")
-        app = ScramblerGUI()
+        app = ScramblerGUI(DaemonClient(args.connect) if args.connect else None)
         app.run()
     except Exception as e:
         logging.error(f"Failed to start application: {e}", exc_info=True)
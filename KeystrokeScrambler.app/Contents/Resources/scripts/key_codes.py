@@ -0,0 +1,118 @@
+import ctypes
+import ctypes.util
+from typing import Callable, Dict, Tuple
+
+# CGEventFlags modifier masks
+FLAG_SHIFT = 0x20000
+FLAG_OPTION = 0x80000
+
+# UCKeyTranslate modifier states (Carbon modifiers >> 8) and the event flags they stand for,
+# tried in this order so the plainest way to type a character wins
+_MODIFIER_STATES = ((0x00, 0), (0x02, FLAG_SHIFT), (0x08, FLAG_OPTION), (0x0A, FLAG_SHIFT | FLAG_OPTION))
+
+# US ANSI layout by virtual key code (kVK_ANSI_*); NUL marks codes that type nothing
+_US_ANSI = "asdfhgzxcv\0bqweryt123465=97-80]ou[ip\rlj'k;\\,/nm.\t `\x7f\0\x1b"
+_US_ANSI_SHIFTED = "ASDFHGZXCV\0BQWERYT!@#$^%+(&_*)}OU{IP\0LJ\"K:|<?NM>\0\0~\0\0\0"
+
+class KeyCodeTable:
+    """Maps each character to the virtual key code and modifier flags that type it."""
+
+    def __init__(self, mapping: Dict[str, Tuple[int, int]]):
+        self.mapping = mapping
+
+    def lookup(self, key: str) -> Tuple[int, int]:
+        """(key code, flags) for key; (0, 0) if the layout cannot type it directly."""
+        return self.mapping.get(key, (0, 0))
+
+    @classmethod
+    def from_translator(cls, translate: Callable[[int, int], str], codes: int = 128) -> 'KeyCodeTable':
+        """Build the table from translate(key code, modifier state) -> typed text."""
+        mapping = {}
+        for state, flags in _MODIFIER_STATES:
+            for code in range(codes):
+                text = translate(code, state)
+                # Function keys type private-use characters
+                if len(text) == 1 and not '\uf700' <= text <= '\uf8ff' and text not in mapping:
+                    mapping[text] = (code, flags)
+        return cls(mapping)
+
+    @classmethod
+    def us_ansi(cls) -> 'KeyCodeTable':
+        """The US ANSI layout, for when the active layout cannot be read."""
+        mapping = {}
+        for layer, flags in ((_US_ANSI, 0), (_US_ANSI_SHIFTED, FLAG_SHIFT)):
+            for code, key in enumerate(layer):
+                if key != '\0' and key not in mapping:
+                    mapping[key] = (code, flags)
+        return cls(mapping)
+
+    @classmethod
+    def for_active_layout(cls) -> 'KeyCodeTable':
+        """The table for the active keyboard layout, falling back to US ANSI."""
+        try:
+            return _read_active_layout()
+        except Exception as e:
+            print(f"Error reading the keyboard layout, assuming US ANSI: {e}")
+            return cls.us_ansi()
+
+def _read_active_layout() -> KeyCodeTable:
+    """Translate every key code through the active layout with Carbon's UCKeyTranslate."""
+    carbon = ctypes.CDLL(ctypes.util.find_library('Carbon'))
+    core = ctypes.CDLL(ctypes.util.find_library('CoreFoundation'))
+    carbon.TISCopyCurrentKeyboardLayoutInputSource.restype = ctypes.c_void_p
+    carbon.TISGetInputSourceProperty.restype = ctypes.c_void_p
+    carbon.TISGetInputSourceProperty.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+    carbon.LMGetKbdType.restype = ctypes.c_uint8
+    carbon.UCKeyTranslate.restype = ctypes.c_int32
+    carbon.UCKeyTranslate.argtypes = [
+        ctypes.c_void_p, ctypes.c_uint16, ctypes.c_uint16, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_uint32,
+        ctypes.POINTER(ctypes.c_uint32), ctypes.c_ulong, ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_uint16)]
+    core.CFDataGetBytePtr.restype = ctypes.c_void_p
+    core.CFDataGetBytePtr.argtypes = [ctypes.c_void_p]
+    core.CFRelease.argtypes = [ctypes.c_void_p]
+
+    source = carbon.TISCopyCurrentKeyboardLayoutInputSource()
+    if not source:
+        raise RuntimeError("no keyboard layout is active")
+    try:
+        prop = ctypes.c_void_p.in_dll(carbon, 'kTISPropertyUnicodeKeyLayoutData')
+        data = carbon.TISGetInputSourceProperty(source, prop)
+        if not data:
+            raise RuntimeError("the active layout has no Unicode layout data")
+        layout = core.CFDataGetBytePtr(data)
+        keyboard_type = carbon.LMGetKbdType()
+        dead_keys = ctypes.c_uint32()
+        length = ctypes.c_ulong()
+        chars = (ctypes.c_uint16 * 4)()
+
+        def translate(code: int, state: int) -> str:
+            dead_keys.value = 0
+            # kUCKeyActionDown, without dead-key composition
+            status = carbon.UCKeyTranslate(layout, code, 0, state, keyboard_type, 1,
+                                           ctypes.byref(dead_keys), len(chars), ctypes.byref(length), chars)
+            if status or not length.value:
+                return ''
+            return bytes(chars)[:2 * length.value].decode('utf-16-le', 'replace')
+
+        return KeyCodeTable.from_translator(translate)
+    finally:
+        core.CFRelease(source)
+
+class EventTemplates:
+    """Synthesized events per key, built once by factory(key, code, flags) and reused."""
+
+    def __init__(self, table: KeyCodeTable, factory: Callable[[str, int, int], object], limit: int = 4096):
+        self.table = table
+        self.factory = factory
+        self.limit = limit
+        self._cache: Dict[str, object] = {}
+
+    def get(self, key: str):
+        template = self._cache.get(key)
+        if template is None:
+            code, flags = self.table.lookup(key)
+            template = self.factory(key, code, flags)
+            # Bounded like the engine's interned keys
+            if len(self._cache) < self.limit:
+                self._cache[key] = template
+        return template
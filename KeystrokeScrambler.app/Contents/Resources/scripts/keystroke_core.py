@@ -1,80 +1,553 @@
+import math
 import time
-import random
 import threading
-from queue import Queue
-from Foundation import NSObject
-from AppKit import NSEvent, NSApplication, NSKeyDown, NSCommandKeyMask, NSSystemDefined
+from adaptive_noise import AdaptiveNoise
+from key_codes import EventTemplates, KeyCodeTable
+from pending_ring import PendingRing
+from perf_samples import PerfSampler
+from release_dispatcher import ReleaseDispatcher
+from release_planner import ReleasePlanner
+from scrambler_config import ConfigStore
+from secure_jitter import default_jitter
+from token_bucket import TokenBucket
+from typing_patterns import TypingPatternMap
+
+# Release time of keys buffered in an unfinished word
+HELD = float('inf')
+# What the delete key and the synthetic typist's corrections deliver
+BACKSPACE_KEYS = ('\x7f', '\b')
+
+class MacOSBackend:
+    """Captures key events with a Quartz event tap and posts the delayed copies."""
+
+    # Tag stored in kCGEventSourceUserData so our own posted keys are not re-captured
+    SYNTHETIC_TAG = 0x4B53
 
-class KeystrokeScrambler:
     def __init__(self, root=None):
         self.root = root
-        self.key_buffer = Queue()
-        self.last_key = None
-        self.enabled = False
-        self.base_delay = 0.1
-        self.monitor = None
+        self.tap = None
+        self._tap_source = None
+        self._tap_callback = None
+        # Key codes whose key down was swallowed, so their key up is swallowed too
+        self._swallowed = set()
+        # Releases run on their own thread so Tk redraws and animations cannot delay them
+        self.dispatcher = ReleaseDispatcher()
         self._initialize()
+        # Key codes for the layout active at startup; each key's events are built on first use
+        self.templates = EventTemplates(KeyCodeTable.for_active_layout(), self._create_events)
 
     def _initialize(self):
         """Initialize the monitor with proper error handling."""
         try:
+            from AppKit import NSApplication
             # Initialize NSApplication if not already running
             NSApplication.sharedApplication()
         except Exception as e:
             print(f"Failed to initialize NSApplication: {e}")
             raise
 
-    def get_delay(self):
+    def now(self):
+        """Return the current time in seconds."""
+        return self.dispatcher.now()
+
+    def call_later(self, delay, callback):
+        """Schedule a callback on the release dispatcher thread."""
+        self.dispatcher.call_later(delay, callback)
+
+    def call_soon(self, callback):
+        """Run a callback on the main thread; safe from any thread."""
+        from PyObjCTools import AppHelper
+        AppHelper.callAfter(callback)
+
+    def run_forever(self):
+        """Run the Cocoa event loop without a window."""
+        from PyObjCTools import AppHelper
+        AppHelper.runConsoleEventLoop(installInterrupt=True)
+
+    def stop_loop(self):
+        """Make run_forever return."""
+        from PyObjCTools import AppHelper
+        AppHelper.stopEventLoop()
+
+    def start_capture(self, handler):
+        """Start delivering key down events to handler.
+
+        An active event tap sees each key before any app does. A key down is
+        dropped when handler returns None, and so is its key up; the delayed
+        copy posted later is the only one apps see. Our own posted keys and
+        keys handler returns pass unchanged.
+        """
+        from AppKit import NSEvent
+        from Quartz import (CFMachPortCreateRunLoopSource, CFRunLoopAddSource, CFRunLoopGetMain,
+                            CGEventGetIntegerValueField, CGEventMaskBit, CGEventTapCreate, CGEventTapEnable,
+                            kCFRunLoopCommonModes, kCGEventKeyDown, kCGEventKeyUp, kCGEventSourceUserData,
+                            kCGEventTapDisabledByTimeout, kCGEventTapDisabledByUserInput, kCGEventTapOptionDefault,
+                            kCGHeadInsertEventTap, kCGKeyboardEventKeycode, kCGSessionEventTap)
+        swallowed = self._swallowed
+
+        def tap_callback(proxy, event_type, cg_event, refcon):
+            if event_type in (kCGEventTapDisabledByTimeout, kCGEventTapDisabledByUserInput):
+                # The system disables taps that answer too slowly
+                CGEventTapEnable(self.tap, True)
+                return cg_event
+            if CGEventGetIntegerValueField(cg_event, kCGEventSourceUserData) == self.SYNTHETIC_TAG:
+                return cg_event
+            code = CGEventGetIntegerValueField(cg_event, kCGKeyboardEventKeycode)
+            if event_type == kCGEventKeyUp:
+                if code in swallowed:
+                    swallowed.discard(code)
+                    return None
+                return cg_event
+            event = NSEvent.eventWithCGEvent_(cg_event)
+            if event is None or handler(event) is not None:
+                return cg_event
+            swallowed.add(code)
+            return None
+
+        tap = CGEventTapCreate(kCGSessionEventTap, kCGHeadInsertEventTap, kCGEventTapOptionDefault,
+                               CGEventMaskBit(kCGEventKeyDown) | CGEventMaskBit(kCGEventKeyUp), tap_callback, None)
+        if tap is None:
+            raise RuntimeError("Could not create the event tap; grant Accessibility access in System Settings")
+        self.tap = tap
+        # PyObjC does not keep the callback alive for us
+        self._tap_callback = tap_callback
+        self._tap_source = CFMachPortCreateRunLoopSource(None, tap, 0)
+        CFRunLoopAddSource(CFRunLoopGetMain(), self._tap_source, kCFRunLoopCommonModes)
+        CGEventTapEnable(tap, True)
+
+    def stop_capture(self):
+        """Stop delivering key events."""
+        from Quartz import (CFMachPortInvalidate, CFRunLoopGetMain, CFRunLoopRemoveSource, CGEventTapEnable,
+                            kCFRunLoopCommonModes)
+        if self.tap is not None:
+            CGEventTapEnable(self.tap, False)
+            CFRunLoopRemoveSource(CFRunLoopGetMain(), self._tap_source, kCFRunLoopCommonModes)
+            CFMachPortInvalidate(self.tap)
+            self.tap = self._tap_source = self._tap_callback = None
+        self._swallowed.clear()
+
+    def is_synthetic(self, event):
+        """Return True for key events posted by post_key."""
+        from Quartz import CGEventGetIntegerValueField, kCGEventSourceUserData
+        cg_event = event.CGEvent()
+        return cg_event is not None and CGEventGetIntegerValueField(cg_event, kCGEventSourceUserData) == self.SYNTHETIC_TAG
+
+    def _create_events(self, key, code, flags):
+        """Key down and up events for key, tagged as ours."""
+        from Quartz import (CGEventCreateKeyboardEvent, CGEventKeyboardSetUnicodeString, CGEventSetFlags,
+                            CGEventSetIntegerValueField, kCGEventSourceUserData)
+        events = []
+        for key_down in (True, False):
+            event = CGEventCreateKeyboardEvent(None, code, key_down)
+            CGEventSetFlags(event, flags)
+            # Still set, so keys the layout cannot type directly arrive as the right text
+            CGEventKeyboardSetUnicodeString(event, len(key.encode('utf-16-le')) // 2, key)
+            CGEventSetIntegerValueField(event, kCGEventSourceUserData, self.SYNTHETIC_TAG)
+            events.append(event)
+        return tuple(events)
+
+    def post_key(self, key, at=None):
+        """Post a key press stamped with time at (now if None); Quartz event posting is safe off the main thread."""
+        from Quartz import CGEventPost, CGEventSetTimestamp, kCGHIDEventTap
+        # CGEventTimestamp counts nanoseconds since startup, the clock time.monotonic() reads on macOS
+        stamp = time.clock_gettime_ns(time.CLOCK_UPTIME_RAW) if at is None else int(at * 1e9)
+        for event in self.templates.get(key):
+            # Templates are reused, so stamp each post
+            CGEventSetTimestamp(event, stamp)
+            CGEventPost(kCGHIDEventTap, event)
+
+class KeystrokeScrambler:
+    def __init__(self, root=None, backend=None, rng=None, config_store=None, recorder=None):
+        self.root = root
+        # Pending keys in release order
+        self.pending = PendingRing()
+        # Interned key strings so pending slots never hold per-event copies
+        self._keys = {}
+        self.last_key = None
+        self.enabled = False
+        self.config_store = config_store if config_store is not None else ConfigStore()
+        self.rng = rng if rng is not None else default_jitter()
+        # Model of the user's rhythm for the adaptive mode; only the event thread touches it
+        self.adaptive_noise = AdaptiveNoise()
+        # Rate limiter for the bucket mode
+        self.token_bucket = TokenBucket()
+        # Release-time planner for the planned mode; used under the lock
+        self.release_planner = ReleasePlanner()
+        # Synthesizes the intra-word rhythm for the word mode
+        self.typing_patterns = TypingPatternMap(self.rng)
+        self.backend = backend if backend is not None else MacOSBackend(root)
+        self.captured = 0
+        self.released = 0
+        self.passed_through = 0
+        # Backspaces that deleted a buffered key, neither ever posted
+        self.retracted = 0
+        # Keys passed through because handling them failed, and released keys that failed to post
+        self.errors = 0
+        self.dropped = 0
+        # Bucket-mode keys given the plain delay because the bucket queue was full
+        self.bucket_overflows = 0
+        self._capturing = False
+        self._last_release_at = float('-inf')
+        # Release timings for the GUI dashboard, written only by the releasing thread
+        self.samples = PerfSampler()
+        # Optional SessionRecorder; queues records for its own writer thread
+        self.recorder = recorder
+        # Guards the ring: keys are captured on the main thread and released on the dispatcher's
+        self._lock = threading.Lock()
+        # Bound once so scheduling a release does not create a new method object
+        self._release_callback = self._release_next
+        self._grid_callback = self._grid_tick
+        self._grid_scheduled = False
+        self._plan_callback = self._plan_tick
+        self._plan_scheduled = False
+        # Sequence number of the last planned key; only that key may be replanned
+        self._last_planned = -1
+        # Trailing pending keys that form the unfinished word, and when it is released
+        self._word_keys = 0
+        self._word_deadline = 0.0
+        # Latest time a word tick is scheduled for; every finished key up to it will be released
+        self._word_ticks_until = float('-inf')
+
+    @property
+    def base_delay(self):
+        return self.config_store.current.base_delay
+
+    @base_delay.setter
+    def base_delay(self, seconds):
+        self.config_store.update(base_delay=seconds)
+
+    @property
+    def distribution(self):
+        return self.config_store.current.distribution
+
+    @distribution.setter
+    def distribution(self, distribution):
+        self.config_store.update(distribution=distribution)
+
+    def get_delay(self, config=None):
         """Calculate randomized delay."""
-        import random
+        if config is None:
+            config = self.config_store.current
+        if config.distribution is not None:
+            return config.distribution.sample(self.rng)
         base = 0.1
-        variation = 0.02
-        return base + random.uniform(-variation, variation)
+        return base + self.rng.uniform(-config.variation, config.variation)
 
     def _handle_event(self, event):
         """Handle keyboard event."""
         try:
-            if not self.enabled:
+            # Never re-capture keys we posted ourselves
+            if self.backend.is_synthetic(event):
+                return event
+
+            # Keys typed while disabled still queue behind pending ones
+            if not self.enabled and not self.pending.count:
+                self.passed_through += 1
                 return event
 
             # Get key information
             characters = event.characters()
             if not characters:
+                self.passed_through += 1
                 return event
+            key = self._keys.get(characters)
+            if key is None:
+                key = str(characters)
+                if len(self._keys) < 4096:
+                    self._keys[key] = key
 
-            # Calculate delay
-            delay = self.get_delay() * (self.base_delay / 0.1)
+            # One snapshot per event, however often settings change
+            config = self.config_store.current
+            now = self.backend.now()
+            if self.enabled and config.mode == 'word':
+                self._buffer_word_key(key, now, config.word_timeout)
+                return None
+            if not self.enabled:
+                delay = 0.0
+            elif config.mode == 'adaptive':
+                delay = self.adaptive_noise.delay(key, now, self.rng, config.base_delay)
+            elif config.mode == 'grid':
+                # The first grid tick after capture
+                delay = (math.floor(now / config.grid_interval) + 1) * config.grid_interval - now
+            elif config.mode == 'planned':
+                # Noise for the gap before this key; the planner picks its time under the lock
+                delay = config.plan_noise * (1.0 + self.rng.random())
+            elif config.mode == 'strategy':
+                delay = config.strategy.next_delay(self.last_key, key, now, self.rng)
+                self.last_key = key
+            else:
+                delay = self.get_delay(config) * (config.base_delay / 0.1)
+            on_grid = self.enabled and config.mode == 'grid'
+            planned = self.enabled and config.mode == 'planned'
+            pending = self.pending
+            with self._lock:
+                # Any other key ends a buffered word first; its tick is already scheduled
+                if self._word_keys:
+                    self._finish_word()
+                if planned:
+                    # Replans the previous key too while it is still pending
+                    prev_pending = pending.count > 0 and self._last_planned == self.captured - 1
+                    release_at, raised = self.release_planner.plan(now, delay, self._last_release_at, prev_pending)
+                    if raised is not None:
+                        pending.release_at[pending.slot(pending.count - 1)] = raised
+                    self._last_planned = self.captured
+                else:
+                    # Never release before a key captured earlier
+                    release_at = max(now + delay, self._last_release_at)
+                    if self.enabled and config.mode == 'bucket':
+                        # Time already spent queued behind earlier keys counts against the limit
+                        limit = config.bucket_max_delay - (release_at - now - delay)
+                        shaped = self.token_bucket.shape(release_at, config.bucket_rate, config.bucket_burst, limit)
+                        if shaped is None:
+                            # A full queue degrades to the plain delay rather than growing without bound
+                            self.bucket_overflows += 1
+                        else:
+                            release_at = shaped
+                self._last_release_at = release_at
+                pending.push(self.captured, key, now, release_at)
+                self.captured += 1
+                start_ticking = on_grid and not self._grid_scheduled
+                if start_ticking:
+                    self._grid_scheduled = True
+                start_planning = planned and not self._plan_scheduled
+                if start_planning:
+                    self._plan_scheduled = True
+                    first_due = pending.release_at[pending.head]
 
-            # Schedule key press on main thread
-            if self.root:
-                self.root.after(int(delay * 1000), lambda: self._process_key(characters))
+            # Queued first, so the release cannot fire before its key is pending
+            if on_grid:
+                if start_ticking:
+                    # Grid keys share one periodic timer, running only while keys are pending
+                    self.backend.call_later(release_at - now, self._grid_callback)
+            elif planned:
+                if start_planning:
+                    # Planned times can move later, so one timer follows the head instead of one per key
+                    self.backend.call_later(max(first_due - now, 0.0), self._plan_callback)
+            else:
+                self.backend.call_later(release_at - now, self._release_callback)
 
             return None  # Suppress original event
-            
+
         except Exception as e:
             print(f"Error handling event: {e}")
+            self.errors += 1
+            self.passed_through += 1
             return event
 
-    def _process_key(self, key):
-        """Process a key press on the main thread."""
+    def _buffer_word_key(self, key, now, timeout):
+        """Buffer a key of the current word; a boundary finishes the word.
+
+        Each word schedules one tick, timeout after its first key, which
+        releases it whether or not a boundary finished it first.
+        """
+        pending = self.pending
+        with self._lock:
+            if key in BACKSPACE_KEYS and self._word_keys:
+                # Edits inside the word never reach the system
+                pending.pop_last()
+                self._word_keys -= 1
+                self.captured += 1
+                self.retracted += 1
+                return
+            pending.push(self.captured, key, now, HELD)
+            self.captured += 1
+            self._word_keys += 1
+            started = self._word_keys == 1
+            if started:
+                self._word_deadline = wake = now + timeout
+                self._word_ticks_until = max(self._word_ticks_until, wake)
+            if len(key) != 1 or not key.isalnum():
+                self._finish_word()
+        if started:
+            self.backend.call_later(timeout, lambda: self._word_tick(wake))
+
+    def _word_tick(self, wake):
+        """Release every finished key due by wake, first finishing the buffered word if wake is its timeout."""
+        # A microsecond of slack absorbs timer rounding
+        due = wake + 1e-6
+        with self._lock:
+            if self._word_keys and self._word_deadline <= due:
+                self._finish_word()
+        released = True
+        while released:
+            released, remaining = self._release_head(due, wake)
+        with self._lock:
+            pending = self.pending
+            next_due = pending.release_at[pending.head] if pending.count else HELD
+            # Keys queued behind releases later than every scheduled tick need a tick of their own
+            uncovered = next_due != HELD and next_due > self._word_ticks_until
+            if uncovered:
+                self._word_ticks_until = next_due
+        if uncovered:
+            self.backend.call_later(max(next_due - self.backend.now(), 0.0), lambda: self._word_tick(next_due))
+        elif not remaining and not self.enabled:
+            self.backend.call_soon(self._stop_capture_if_drained)
+
+    def _finish_word(self):
+        """Stamp the buffered word with synthesized intervals that end when its tick releases it.
+
+        The intervals are squeezed if needed so the word never spans more
+        than it took to type, and never starts before keys released earlier;
+        the word's keys are posted together and carry these times as their
+        event timestamps. Called with the lock held.
+        """
+        pending = self.pending
+        patterns = self.typing_patterns
+        first = pending.count - self._word_keys
+        # Synthesized offsets from the word's first key, rescaled below
+        offset = 0.0
+        previous = None
+        for index in range(first, pending.count):
+            slot = pending.slot(index)
+            key = pending.keys[slot].lower()
+            if previous is not None:
+                offset += patterns.get_transition_delay(previous, key)
+            pending.release_at[slot] = offset
+            previous = key
+        typed = pending.captured_at[slot] - pending.captured_at[pending.slot(first)]
+        end = max(self._word_deadline, self._last_release_at)
+        begin = max(end - min(offset, typed), self._last_release_at)
+        scale = (end - begin) / offset if offset else 0.0
+        for index in range(first, pending.count):
+            slot = pending.slot(index)
+            pending.release_at[slot] = begin + pending.release_at[slot] * scale
+        # The last key's offset may round a hair past end
+        pending.release_at[slot] = end
+        self._last_release_at = end
+        self._word_keys = 0
+
+    def _release_next(self):
+        """Release the oldest pending key; one call is scheduled per key."""
+        _, remaining = self._release_head()
+        if not remaining and not self.enabled:
+            # Capture belongs to the main thread
+            self.backend.call_soon(self._stop_capture_if_drained)
+
+    def _release_head(self, due=None, wake=None):
+        """Release the oldest pending key if its release time is not after due.
+
+        Keys of a word are released at the wake of its tick and posted
+        stamped with their release time. Returns whether a key was released
+        and how many remain.
+        """
+        pending = self.pending
+        with self._lock:
+            if not pending.count:
+                return False, 0
+            slot = pending.head
+            release_at = pending.release_at[slot]
+            # Keys of an unfinished word have no release time yet
+            if release_at == HELD or (due is not None and release_at > due):
+                return False, pending.count
+            seq = pending.seq[slot]
+            captured_at = pending.captured_at[slot]
+            key = pending.pop_key()
+            remaining = pending.count
+        if wake is None:
+            self._process_key(key)
+        else:
+            self._process_key(key, release_at)
+            release_at = wake
+        released_at = self.backend.now()
+        self.samples.record(captured_at, release_at, released_at, remaining)
+        if self.recorder is not None:
+            self.recorder.record(seq, key, captured_at, release_at, released_at)
+        return True, remaining
+
+    def _grid_tick(self):
+        """Release up to grid_batch due keys, then schedule the next tick while keys are pending."""
+        config = self.config_store.current
+        interval = config.grid_interval
+        now = self.backend.now()
+        # Half an interval of slack absorbs timer rounding around the tick
+        due = now + interval / 2
+        for _ in range(config.grid_batch):
+            released, _ = self._release_head(due)
+            if not released:
+                break
+        with self._lock:
+            remaining = self.pending.count
+            self._grid_scheduled = bool(remaining)
+        if remaining:
+            next_tick = (math.floor(now / interval + 0.5) + 1) * interval
+            self.backend.call_later(next_tick - now, self._grid_callback)
+        elif not self.enabled:
+            self.backend.call_soon(self._stop_capture_if_drained)
+
+    def _plan_tick(self):
+        """Release every due key, then wake again at the head's release time while one is set."""
+        now = self.backend.now()
+        # A microsecond of slack absorbs timer rounding
+        due = now + 1e-6
+        released = True
+        while released:
+            released, _ = self._release_head(due)
+        with self._lock:
+            pending = self.pending
+            remaining = pending.count
+            next_due = pending.release_at[pending.head] if remaining else HELD
+            # An unfinished word has no release time; its own tick releases it
+            following = self._plan_scheduled = next_due != HELD
+        if following:
+            self.backend.call_later(max(next_due - self.backend.now(), 0.0), self._plan_callback)
+        elif not remaining and not self.enabled:
+            self.backend.call_soon(self._stop_capture_if_drained)
+
+    def _pop_next(self):
+        """Pop the oldest pending key (None if empty) and whether the ring is now empty."""
+        with self._lock:
+            key = self.pending.pop_key() if self.pending.count else None
+            return key, not self.pending.count
+
+    def _stop_capture_if_drained(self):
+        if not self.enabled and not self.pending.count:
+            self._stop_capture()
+
+    def _process_key(self, key, at=None):
+        """Post a key, stamped with time at if given."""
         try:
-            if self.enabled:
-                # Create and post a new key event
-                event = NSEvent.keyEventWithType_location_modifierFlags_timestamp_windowNumber_context_characters_charactersIgnoringModifiers_isARepeat_keyCode_(
-                    NSKeyDown,
-                    (0, 0),
-                    0,
-                    NSEvent.timestamp(),
-                    0,
-                    None,
-                    key,
-                    key,
-                    False,
-                    0
-                )
-                NSApplication.sharedApplication().postEvent_atStart_(event, True)
+            if at is None:
+                self.backend.post_key(key)
+            else:
+                self.backend.post_key(key, at)
+            self.released += 1
         except Exception as e:
             print(f"Error processing key: {e}")
+            self.dropped += 1
+
+    def set_base_delay(self, seconds):
+        """Set the delay that the randomized delay is scaled to."""
+        self.config_store.update(base_delay=seconds)
+
+    def stats(self):
+        """Return a snapshot of the engine state and counters."""
+        return {
+            'enabled': self.enabled,
+            'base_delay': self.base_delay,
+            'captured': self.captured,
+            'released': self.released,
+            'passed_through': self.passed_through,
+            'retracted': self.retracted,
+            'errors': self.errors,
+            'dropped': self.dropped,
+            'bucket_overflows': self.bucket_overflows,
+            'pending': len(self.pending),
+            'bucket_delay_ms': self.token_bucket.last_delay * 1000,
+        }
+
+    def flush(self):
+        """Release every pending key immediately, e.g. before shutdown."""
+        key, _ = self._pop_next()
+        while key is not None:
+            self._process_key(key)
+            key, _ = self._pop_next()
+        self._word_keys = 0
+        self._stop_capture_if_drained()
+
+    def _stop_capture(self):
+        if self._capturing:
+            self._capturing = False
+            self.backend.stop_capture()
 
     def start(self):
         """Start the scrambler with improved error handling."""
@@ -82,28 +555,28 @@ class KeystrokeScrambler:
             if self.enabled:
                 return  # Already running
 
-            # Start monitoring keyboard events
-            mask = NSKeyDown
-            self.monitor = NSEvent.addGlobalMonitorForEventsMatchingMask_handler_(
-                mask,
-                self._handle_event
-            )
-            
+            # Start monitoring keyboard events (still on while draining)
+            if not self._capturing:
+                self.backend.start_capture(self._handle_event)
+                self._capturing = True
+
             self.enabled = True
-            
+
         except Exception as e:
             self.enabled = False
-            if self.monitor:
-                NSEvent.removeMonitor_(self.monitor)
-                self.monitor = None
+            self._capturing = False
+            self.backend.stop_capture()
             raise RuntimeError(f"Failed to start scrambler: {e}")
 
     def stop(self):
-        """Stop the scrambler with improved error handling."""
+        """Stop the scrambler with improved error handling.
+
+        Pending keys are still released on schedule; capture stops once they
+        have drained so later keys cannot overtake them.
+        """
         try:
             self.enabled = False
-            if self.monitor:
-                NSEvent.removeMonitor_(self.monitor)
-                self.monitor = None
+            if not self.pending.count:
+                self._stop_capture()
         except Exception as e:
             print(f"Error stopping scrambler: {e}")
@@ -0,0 +1,65 @@
+class PendingRing:
+    """FIFO of pending keys stored in preallocated parallel lists.
+
+    Slots are reused in place, so steady-state typing neither allocates
+    per-key records nor churns container blocks. The ring only grows
+    (doubling) if more keys are pending than it has ever held.
+    """
+
+    __slots__ = ('capacity', 'head', 'count', 'seq', 'keys', 'captured_at', 'release_at')
+
+    def __init__(self, capacity: int = 256):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+        self.seq = [0] * capacity
+        self.keys = [None] * capacity
+        self.captured_at = [0.0] * capacity
+        self.release_at = [0.0] * capacity
+
+    def __len__(self):
+        return self.count
+
+    def slot(self, index: int) -> int:
+        """Physical slot of the index-th pending key (0 is the oldest)."""
+        return (self.head + index) % self.capacity
+
+    def push(self, seq, key, captured_at, release_at):
+        """Append a key behind every pending one."""
+        if self.count == self.capacity:
+            self._grow()
+        slot = (self.head + self.count) % self.capacity
+        self.seq[slot] = seq
+        self.keys[slot] = key
+        self.captured_at[slot] = captured_at
+        self.release_at[slot] = release_at
+        self.count += 1
+
+    def pop_key(self):
+        """Remove the oldest pending key and return it."""
+        slot = self.head
+        key = self.keys[slot]
+        self.keys[slot] = None
+        self.head = (slot + 1) % self.capacity
+        self.count -= 1
+        return key
+
+    def pop_last(self):
+        """Remove the newest pending key and return it."""
+        self.count -= 1
+        slot = (self.head + self.count) % self.capacity
+        key = self.keys[slot]
+        self.keys[slot] = None
+        return key
+
+    def _grow(self):
+        """Double the capacity, unwrapping the pending keys to slot 0."""
+        order = [self.slot(i) for i in range(self.count)]
+        padding = self.capacity
+        self.seq = [self.seq[i] for i in order] + [0] * padding
+        self.keys = [self.keys[i] for i in order] + [None] * padding
+        self.captured_at = [self.captured_at[i] for i in order] + [0.0] * padding
+        self.release_at = [self.release_at[i] for i in order] + [0.0] * padding
+        self.head = 0
+        self.capacity += padding
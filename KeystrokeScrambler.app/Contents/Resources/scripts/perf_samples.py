@@ -0,0 +1,78 @@
+from typing import Dict, List, Tuple
+
+Sample = Tuple[float, float, float, int]
+
+class PerfSampler:
+    """Ring of per-release timing samples, written by one thread and read by others.
+
+    The releasing thread fills preallocated slots and bumps `written` last;
+    readers copy without locking and discard any slot that may have been
+    overwritten while they were copying.
+    """
+
+    __slots__ = ('capacity', 'written', 'captured_at', 'release_at', 'released_at', 'depth')
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = max(1, capacity)
+        self.written = 0
+        self.captured_at = [0.0] * self.capacity
+        self.release_at = [0.0] * self.capacity
+        self.released_at = [0.0] * self.capacity
+        self.depth = [0] * self.capacity
+
+    def record(self, captured_at: float, release_at: float, released_at: float, depth: int):
+        """Store one release; called only from the releasing thread."""
+        slot = self.written % self.capacity
+        self.captured_at[slot] = captured_at
+        self.release_at[slot] = release_at
+        self.released_at[slot] = released_at
+        self.depth[slot] = depth
+        self.written += 1
+
+    def snapshot(self, since: float = float('-inf')) -> List[Sample]:
+        """Copy samples released at or after since, oldest first, as (captured, intended, released, depth)."""
+        end = self.written
+        samples = []
+        for seq in range(end - 1, max(end - self.capacity, 0) - 1, -1):
+            slot = seq % self.capacity
+            if self.released_at[slot] < since:
+                break
+            samples.append((self.captured_at[slot], self.release_at[slot], self.released_at[slot], self.depth[slot]))
+        samples.reverse()
+        # Slots the writer reached during the copy may mix old and new fields
+        overwritten = self.written - end - (self.capacity - len(samples))
+        return samples[overwritten:] if overwritten > 0 else samples
+
+    def read(self, start: int) -> Tuple[List[Sample], int, int]:
+        """Samples recorded from sequence number start on, the start for the next read, and how many were lost."""
+        end = self.written
+        first = max(start, end - self.capacity)
+        samples = []
+        for seq in range(first, end):
+            slot = seq % self.capacity
+            samples.append((self.captured_at[slot], self.release_at[slot], self.released_at[slot], self.depth[slot]))
+        # Slots the writer reached during the copy may mix old and new fields
+        overwritten = self.written - self.capacity - first
+        if overwritten > 0:
+            samples = samples[overwritten:]
+            first += overwritten
+        return samples, end, first - start
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def summarize(samples: List[Sample], now: float, window: float = 10.0) -> Dict[str, float]:
+    """Typing speed and latency figures over the last window seconds of samples."""
+    since = now - window
+    recent = [sample for sample in samples if sample[2] >= since]
+    added = sorted(released - captured for captured, _, released, _ in recent)
+    lateness = sorted(released - intended for _, intended, released, _ in recent)
+    return {
+        # Five characters per word
+        'wpm': len(recent) / 5 * (60 / window),
+        'latency_p50_ms': _percentile(added, 0.5) * 1000,
+        'latency_p99_ms': _percentile(added, 0.99) * 1000,
+        'lateness_p99_ms': _percentile(lateness, 0.99) * 1000,
+    }
@@ -0,0 +1,45 @@
+import random
+import threading
+from typing import Optional
+
+
+class RandomStreams:
+    """Injectable random source with an independent stream per thread.
+
+    Without a seed every stream is seeded from the OS. With a seed, the n-th
+    thread to draw gets a stream derived from ``(seed, n)``, so a run that
+    draws from the same threads in the same order is exactly reproducible.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._streams_created = 0
+
+    def stream(self) -> random.Random:
+        """Return the calling thread's private generator."""
+        try:
+            return self._local.rng
+        except AttributeError:
+            return self._create_stream()
+
+    def _create_stream(self) -> random.Random:
+        """Create the generator for the calling thread."""
+        with self._lock:
+            index = self._streams_created
+            self._streams_created += 1
+        if self.seed is None:
+            rng = random.Random()
+        else:
+            rng = random.Random(f"{self.seed}:{index}")
+        self._local.rng = rng
+        return rng
+
+    def random(self) -> float:
+        """Return a float in [0, 1) from the calling thread's stream."""
+        return self.stream().random()
+
+    def uniform(self, a: float, b: float) -> float:
+        """Return a float between a and b from the calling thread's stream."""
+        return a + (b - a) * self.stream().random()
@@ -0,0 +1,58 @@
+class ReleasePlanner:
+    """Plans release times that perturb every gap at the least added latency.
+
+    Each released gap must differ from the typed gap by at least a noise
+    amount drawn per gap, and keys leave in order at least min_gap apart.
+    Given the previous key's plan, the cheapest valid time for a new key is
+    either as early as ordering allows, if that already shortens the gap
+    enough, or late enough to lengthen it enough. When only the late choice
+    remains and the previous key is still pending, holding that key a
+    little longer instead often lets the new one leave at once; the planner
+    takes whichever costs less in total. Each plan is O(1), and gives the
+    same total lag as jointly replanning every pending key.
+
+    A typed gap can only be shortened down to min_gap, so its required
+    shift is capped there; otherwise fast typing could only ever lengthen
+    gaps and the added latency would grow without bound.
+    """
+
+    __slots__ = ('min_gap', 'prev_captured', 'prev_release', 'prev_lag', 'prev_limit')
+
+    def __init__(self, min_gap: float = 0.005):
+        self.min_gap = min_gap
+        self.prev_captured = float('-inf')
+        self.prev_release = float('-inf')
+        self.prev_lag = 0.0
+        # Latest the previous key may move to without losing its own gap's noise
+        self.prev_limit = float('inf')
+
+    def plan(self, captured_at: float, noise: float, not_before: float, prev_pending: bool):
+        """Plan a newly captured key.
+
+        Returns (release time, new release time for the previous key or None).
+        """
+        lag = self.prev_lag
+        gap = captured_at - self.prev_captured
+        if noise > gap - self.min_gap:
+            noise = max(gap - self.min_gap, 0.0)
+        earliest = max(captured_at, self.prev_release + self.min_gap, not_before)
+        # Released gap at least `noise` shorter than typed
+        shortened = captured_at + lag - noise
+        raised = None
+        # A capped noise puts shortened exactly on the ordering bound; allow for rounding
+        if earliest <= shortened + 1e-9:
+            release, limit = earliest, shortened
+        else:
+            # Released gap at least `noise` longer than typed
+            release, limit = max(captured_at + lag + noise, earliest), float('inf')
+            if prev_pending and gap >= noise + self.min_gap:
+                # Hold the previous key until `noise` after its capture; this key can then go now
+                held = self.prev_captured + noise
+                if self.prev_release < held <= self.prev_limit and held - self.prev_release < release - captured_at \
+                        and captured_at >= not_before:
+                    raised, release, limit = held, captured_at, captured_at
+        self.prev_captured = captured_at
+        self.prev_release = release
+        self.prev_lag = release - captured_at
+        self.prev_limit = limit
+        return release, raised
@@ -0,0 +1,283 @@
+import ctypes
+import ctypes.util
+import json
+import logging
+import math
+import os
+import select
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional
+from delay_distributions import (DelayDistribution, EmpiricalDelay, ExGaussianDelay,
+                                 GammaDelay, LogNormalDelay, UniformDelay)
+from delay_strategies import DelayStrategy, create_strategy
+
+DEFAULT_CONFIG_PATH = os.path.expanduser('~/.keystroke_scrambler.json')
+
+DISTRIBUTIONS = {
+    'uniform': UniformDelay,
+    'lognormal': LogNormalDelay,
+    'gamma': GammaDelay,
+    'ex-gaussian': ExGaussianDelay,
+    'empirical': EmpiricalDelay,
+}
+
+# How release delays are chosen:
+#   fixed     base_delay-scaled draws from variation or distribution
+#   adaptive  noise sized from the user's own rhythm, mean at most base_delay
+#   grid      keys leave only on ticks every grid_interval, grid_batch per tick
+#   bucket    fixed delays, then at most bucket_rate keys/s after a bucket_burst; keys
+#             that would queue longer than bucket_max_delay keep the fixed delay
+#   planned   least added latency that shifts every gap by plan_noise to 2 x plan_noise
+#   word      whole words word_timeout after their first key, from one wakeup per word;
+#             keys are stamped with a synthesized intra-word rhythm
+#   strategy  delays from a registered DelayStrategy, set in strategy
+MODES = ('fixed', 'adaptive', 'grid', 'bucket', 'planned', 'word', 'strategy')
+# Longest base delay accepted; anything longer makes typing unusable
+MAX_BASE_DELAY = 2.0
+
+@dataclass(frozen=True)
+class ScramblerConfig:
+    """Immutable settings snapshot read by the event path."""
+    base_delay: float = 0.1
+    variation: float = 0.02
+    distribution: Optional[DelayDistribution] = None
+    mode: str = 'fixed'
+    grid_interval: float = 0.025
+    grid_batch: int = 1
+    bucket_rate: float = 12.0
+    bucket_burst: float = 4.0
+    bucket_max_delay: float = 0.5
+    plan_noise: float = 0.03
+    word_timeout: float = 1.0
+    strategy: Optional[DelayStrategy] = None
+
+    def __post_init__(self):
+        for name in ('base_delay', 'variation', 'grid_interval', 'bucket_rate', 'bucket_burst',
+                     'bucket_max_delay', 'plan_noise', 'word_timeout'):
+            # NaN passes every comparison below and inf holds keys forever
+            if not math.isfinite(getattr(self, name)):
+                raise ValueError(f"{name} must be a finite number")
+        if not 0 < self.base_delay <= MAX_BASE_DELAY:
+            raise ValueError(f"base_delay must be positive and at most {MAX_BASE_DELAY:g} s")
+        if self.variation < 0:
+            raise ValueError("variation must not be negative")
+        if self.mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        if self.grid_interval <= 0:
+            raise ValueError("grid_interval must be positive")
+        if self.grid_batch < 1:
+            raise ValueError("grid_batch must be at least 1")
+        if self.bucket_rate <= 0:
+            raise ValueError("bucket_rate must be positive")
+        if self.bucket_burst < 1:
+            raise ValueError("bucket_burst must be at least 1")
+        if self.bucket_max_delay <= 0:
+            raise ValueError("bucket_max_delay must be positive")
+        if self.plan_noise <= 0:
+            raise ValueError("plan_noise must be positive")
+        if self.word_timeout <= 0:
+            raise ValueError("word_timeout must be positive")
+        if self.mode == 'strategy' and self.strategy is None:
+            raise ValueError("the strategy mode needs a strategy")
+
+    @classmethod
+    def from_dict(cls, settings: dict) -> 'ScramblerConfig':
+        """Build a config from parsed settings, compiling any distribution.
+
+        Example: {"base_delay": 0.12, "distribution": {"type": "lognormal",
+        "median": 0.1, "sigma": 0.25}}; times are in seconds. A strategy is
+        given the same way, e.g. {"mode": "strategy", "strategy": {"type":
+        "bigram", "scale": 1.5}}.
+        """
+        settings = dict(settings)
+        strategy = settings.pop('strategy', None)
+        if strategy is not None:
+            settings['strategy'] = create_strategy(strategy)
+        spec = settings.pop('distribution', None)
+        if spec is not None:
+            spec = dict(spec)
+            kind = spec.pop('type')
+            if kind not in DISTRIBUTIONS:
+                raise ValueError(f"unknown distribution type {kind!r}")
+            settings['distribution'] = DISTRIBUTIONS[kind](**spec)
+        return cls(**settings)
+
+class ConfigStore:
+    """Holds the current ScramblerConfig behind a single reference.
+
+    Readers take `store.current` once and use that snapshot; writers build a
+    new snapshot and swap the reference, so a read is never torn and never
+    waits on a writer.
+
+    Fields set with update() are runtime overrides, e.g. from the GUI or the
+    daemon socket. load() keeps them over settings reloaded from a file
+    until the file itself changes that field.
+    """
+
+    def __init__(self, config: Optional[ScramblerConfig] = None):
+        self.current = config if config is not None else ScramblerConfig()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[ScramblerConfig], None]] = []
+        self._overrides: Dict[str, object] = {}
+        # The last snapshot load() was given, before overrides
+        self._loaded: Optional[ScramblerConfig] = None
+
+    def add_listener(self, listener: Callable[[ScramblerConfig], None]):
+        """Call listener with every new snapshot."""
+        self._listeners.append(listener)
+
+    def swap(self, config: ScramblerConfig):
+        """Publish a complete new snapshot."""
+        with self._lock:
+            self.current = config
+        for listener in self._listeners:
+            listener(config)
+
+    def update(self, **changes) -> ScramblerConfig:
+        """Publish a copy of the current snapshot with some fields changed, as overrides."""
+        with self._lock:
+            config = replace(self.current, **changes)
+            self.current = config
+            self._overrides.update(changes)
+        for listener in self._listeners:
+            listener(config)
+        return config
+
+    def load(self, config: ScramblerConfig) -> ScramblerConfig:
+        """Publish settings read from a file with the runtime overrides it did not change."""
+        with self._lock:
+            previous = self._loaded
+            overrides = {name: value for name, value in self._overrides.items()
+                         if previous is None or getattr(config, name) == getattr(previous, name)}
+            merged = replace(config, **overrides)
+            self._overrides = overrides
+            self._loaded = config
+            self.current = merged
+        for listener in self._listeners:
+            listener(merged)
+        return merged
+
+def load_config(path: str) -> ScramblerConfig:
+    """Read a JSON settings file."""
+    with open(path) as f:
+        return ScramblerConfig.from_dict(json.load(f))
+
+def save_settings(path: str, changes: dict):
+    """Merge changes into a JSON settings file, replacing it atomically.
+
+    The new file is written next to the old one and renamed over it, so a
+    ConfigWatcher never reads a half-written file.
+    """
+    try:
+        with open(path) as f:
+            settings = json.load(f)
+    except FileNotFoundError:
+        settings = {}
+    settings.update(changes)
+    # Validate before replacing what the engine is running with
+    ScramblerConfig.from_dict(settings)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(prefix='.keystroke_scrambler.', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(settings, f, indent=2)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+class ConfigWatcher:
+    """Reloads a settings file into a ConfigStore when it changes.
+
+    Uses inotify on Linux and mtime polling elsewhere. Parsing and compiling
+    happen on the watcher thread; a bad file is logged and ignored.
+    """
+
+    # inotify(7) event masks
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+
+    def __init__(self, store: ConfigStore, path: str = DEFAULT_CONFIG_PATH, poll_interval: float = 0.5):
+        self.store = store
+        self.path = os.path.abspath(path)
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._signature = None
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def reload(self) -> bool:
+        """Load the file if it changed since the last load."""
+        signature = self._file_signature()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        try:
+            config = load_config(self.path)
+            self.store.load(config)
+        except Exception as e:
+            logging.error(f"Ignoring invalid settings in {self.path}: {e}")
+            return False
+        logging.info(f"Reloaded settings from {self.path}")
+        return True
+
+    def start(self):
+        """Load the file now and watch it on a background thread."""
+        # Watch before the first load so no change can slip in between
+        fd = self._open_inotify()
+        self.reload()
+        self._thread = threading.Thread(target=self._run, args=(fd,), name="ConfigWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, fd: Optional[int]):
+        try:
+            while not self._stop.is_set():
+                if fd is None:
+                    self._stop.wait(self.poll_interval)
+                else:
+                    ready, _, _ = select.select([fd], [], [], self.poll_interval)
+                    if ready:
+                        # Drain the queued events; the signature check decides
+                        os.read(fd, 4096)
+                self.reload()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def _open_inotify(self) -> Optional[int]:
+        """Watch the settings directory with inotify, or return None to poll."""
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+            if fd < 0:
+                return None
+            mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+            if libc.inotify_add_watch(fd, os.path.dirname(self.path).encode(), mask) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError) as e:
+            logging.debug(f"inotify unavailable, polling instead: {e}")
+            return None
@@ -0,0 +1,243 @@
+import argparse
+import logging
+import math
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional
+from keystroke_core import KeystrokeScrambler
+from metrics_exporter import MetricsExporter
+from scrambler_config import DEFAULT_CONFIG_PATH, ConfigWatcher
+from session_recorder import SessionRecorder
+
+DEFAULT_SOCKET_PATH = os.path.expanduser('~/.keystroke_scrambler.sock')
+
+# Protocol: one ASCII command per line, one reply per line.
+#   ENABLE | DISABLE | DELAY <ms> | STATS
+# Replies are "OK[ key=value ...]" or "ERR <message>".
+
+class ScramblerDaemon:
+    """Runs the scrambler engine headless, controlled over a Unix socket."""
+
+    def __init__(self, scrambler: KeystrokeScrambler, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.scrambler = scrambler
+        self.socket_path = socket_path
+        self.server = None
+
+    def _on_engine_thread(self, func, timeout: float = 2.0):
+        """Run func on the backend's event thread and return its result."""
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(func())
+            except Exception as e:
+                future.set_exception(e)
+
+        self.scrambler.backend.call_soon(run)
+        return future.result(timeout)
+
+    def handle_command(self, line: str) -> str:
+        """Execute one protocol command and return the reply line."""
+        try:
+            parts = line.split()
+            if not parts:
+                return "ERR empty command"
+            command = parts[0].upper()
+            if command == 'ENABLE':
+                self._on_engine_thread(self.scrambler.start)
+                return "OK"
+            if command == 'DISABLE':
+                self._on_engine_thread(self.scrambler.stop)
+                return "OK"
+            if command == 'DELAY':
+                if len(parts) != 2:
+                    return "ERR usage: DELAY <ms>"
+                seconds = float(parts[1]) / 1000
+                if not math.isfinite(seconds):
+                    return "ERR delay must be a finite number of ms"
+                self._on_engine_thread(lambda: self.scrambler.set_base_delay(seconds))
+                return "OK"
+            if command == 'STATS':
+                stats = self.scrambler.stats()
+                stats['enabled'] = int(stats['enabled'])
+                stats['base_delay_ms'] = round(stats.pop('base_delay') * 1000, 3)
+                return "OK " + " ".join(f"{key}={value}" for key, value in stats.items())
+            return f"ERR unknown command {command}"
+        except Exception as e:
+            logging.error(f"Error handling command {line!r}: {e}")
+            return f"ERR {e}"
+
+    def _socket_in_use(self) -> bool:
+        """Return True if something answers on the socket path."""
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.settimeout(1.0)
+            probe.connect(self.socket_path)
+            return True
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+        finally:
+            probe.close()
+
+    def serve(self):
+        """Serve the control socket on a background thread."""
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw in self.rfile:
+                    reply = daemon.handle_command(raw.decode('ascii', 'replace').strip())
+                    self.wfile.write(reply.encode('ascii') + b"\n")
+
+        if os.path.exists(self.socket_path):
+            if self._socket_in_use():
+                raise RuntimeError(f"Another daemon is already listening on {self.socket_path}")
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(self.socket_path)
+        previous_umask = os.umask(0o177)
+        try:
+            self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        finally:
+            os.umask(previous_umask)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="ControlSocket", daemon=True).start()
+        logging.info(f"Listening on {self.socket_path}")
+
+    def shutdown(self):
+        """Stop serving, release pending keys and remove the socket."""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self.scrambler.stop()
+        self.scrambler.flush()
+
+    def run(self):
+        """Serve until interrupted, running the backend's event loop."""
+        self.serve()
+        signal.signal(signal.SIGTERM, lambda *_: self.scrambler.backend.stop_loop())
+        try:
+            self.scrambler.backend.run_forever()
+        finally:
+            self.shutdown()
+
+class DaemonClient:
+    """Talks to a running daemon; usable wherever the GUI expects an engine."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 2.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._file = None
+
+    def send(self, command: str) -> str:
+        """Send one command and return the reply, raising on ERR."""
+        with self._lock:
+            if self._sock is None:
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._sock.settimeout(self.timeout)
+                self._sock.connect(self.socket_path)
+                self._file = self._sock.makefile('rb')
+            try:
+                self._sock.sendall(command.encode('ascii') + b"\n")
+                reply = self._file.readline().decode('ascii').strip()
+            except OSError:
+                self.close()
+                raise
+        if not reply:
+            self.close()
+            raise ConnectionError("Daemon closed the connection")
+        if reply.startswith("ERR"):
+            raise RuntimeError(reply[4:])
+        return reply
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = None
+            self._file = None
+
+    def start(self):
+        self.send("ENABLE")
+
+    def stop(self):
+        self.send("DISABLE")
+
+    def flush(self):
+        """Pending keys belong to the daemon, so there is nothing to flush."""
+
+    def set_base_delay(self, seconds: float):
+        self.send(f"DELAY {seconds * 1000:g}")
+
+    def stats(self) -> Dict[str, float]:
+        fields = self.send("STATS").split()[1:]
+        return {key: float(value) for key, value in (field.split('=', 1) for field in fields)}
+
+def main(argv: Optional[list] = None):
+    """Run the headless scrambler daemon or send it a command."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help="control socket path")
+    subcommands = parser.add_subparsers(dest='action', required=True)
+    serve = subcommands.add_parser('serve', help="run the daemon")
+    serve.add_argument('--enable', action='store_true', help="start scrambling immediately")
+    serve.add_argument('--delay', type=float, help="base delay in ms, kept over the settings file's")
+    serve.add_argument('--simulated', action='store_true', help="use the in-memory backend (for testing the socket)")
+    serve.add_argument('--record', metavar='PATH', help="append release timings to a session recording")
+    serve.add_argument('--record-characters', action='store_true', help="store the typed characters in the recording, not just key classes")
+    serve.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="JSON settings file to load and watch for changes")
+    serve.add_argument('--metrics-port', type=int, help="serve Prometheus metrics on this localhost TCP port")
+    serve.add_argument('--metrics-socket', metavar='PATH', help="serve Prometheus metrics on this Unix socket")
+    send = subcommands.add_parser('send', help="send a command to a running daemon")
+    send.add_argument('command', nargs='+', help="e.g. ENABLE, DISABLE, DELAY 120, STATS")
+    args = parser.parse_args(argv)
+
+    if args.action == 'send':
+        try:
+            print(DaemonClient(args.socket).send(" ".join(args.command)))
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    backend = None
+    if args.simulated:
+        from simulation import SimulatedBackend
+        backend = SimulatedBackend()
+    recorder = SessionRecorder(args.record, characters=args.record_characters) if args.record else None
+    scrambler = KeystrokeScrambler(backend=backend, recorder=recorder)
+    if args.delay is not None:
+        scrambler.set_base_delay(args.delay / 1000)
+    watcher = ConfigWatcher(scrambler.config_store, args.config)
+    watcher.start()
+    exporter = None
+    if args.metrics_port is not None or args.metrics_socket:
+        exporter = MetricsExporter(scrambler, args.metrics_port, args.metrics_socket)
+        exporter.start()
+    if args.enable:
+        scrambler.start()
+    try:
+        ScramblerDaemon(scrambler, args.socket).run()
+    except RuntimeError as e:
+        logging.error(str(e))
+        sys.exit(1)
+    finally:
+        if exporter:
+            exporter.stop()
+        watcher.stop()
+        if recorder:
+            recorder.close()
+
+if __name__ == "__main__":
+    main()
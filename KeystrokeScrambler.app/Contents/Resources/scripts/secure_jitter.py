@@ -0,0 +1,92 @@
+import os
+import threading
+import weakref
+from array import array
+
+def _octave(r: int) -> int:
+    """k such that a draw lies in [2**-k, 2**-(k-1)): one plus the leading zero bits of byte r."""
+    return 9 - r.bit_length()
+
+# Floats in [0, 1) are built as little-endian float32 straight from random
+# bytes, so no arithmetic is done per value. A random byte r picks the octave
+# [2**-k, 2**-(k-1)) with probability 2**-k, as a uniform draw would; the
+# rare r == 0 folds everything below 2**-9 into the lowest octave. Two more
+# random bytes fill the top 15 mantissa bits, about 0.6 us of resolution on a
+# 40 ms jitter range, far below any timer's.
+_EXPONENT_HIGH = bytes((127 - _octave(r)) >> 1 for r in range(256))
+_EXPONENT_LOW = bytes(((127 - _octave(r)) & 1) << 7 for r in range(256))
+_MANTISSA_HIGH = bytes(b & 0x7F for b in range(256))
+
+_instances = weakref.WeakSet()
+
+class SecureJitter:
+    """CSPRNG-backed drop-in for the random()/uniform() calls on the hot path.
+
+    Floats in [0, 1) are made in bulk from large os.urandom blocks and handed
+    out from a buffer, so a draw costs one iterator step; the refill cost is
+    paid once per block_size draws.
+    """
+
+    def __init__(self, block_size: int = 16384):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._block = iter(())
+        _instances.add(self)
+
+    def _make_block(self) -> array:
+        """Convert one os.urandom block into floats in [0, 1)."""
+        n = self.block_size
+        rnd = os.urandom(3 * n)
+        octaves = rnd[0::3]
+        raw = bytearray(4 * n)
+        raw[1::4] = rnd[1::3]
+        # The exponent's low bit shares a byte with the mantissa's top 7 bits
+        raw[2::4] = (int.from_bytes(rnd[2::3].translate(_MANTISSA_HIGH), 'little')
+                     | int.from_bytes(octaves.translate(_EXPONENT_LOW), 'little')).to_bytes(n, 'little')
+        raw[3::4] = octaves.translate(_EXPONENT_HIGH)
+        return array('f', raw)
+
+    def _refill(self) -> float:
+        """Swap in a fresh block once the current one is exhausted."""
+        with self._lock:
+            while True:
+                try:
+                    return next(self._block)
+                except StopIteration:
+                    self._block = iter(self._make_block())
+
+    def _reset_after_fork(self):
+        """Drop buffered values so a forked child never repeats its parent."""
+        self._lock = threading.Lock()
+        self._block = iter(())
+
+    # Draws call next() inline; calling a bound __next__ goes through a slower slot wrapper
+    def random(self) -> float:
+        """Return a float in [0, 1)."""
+        try:
+            return next(self._block)
+        except StopIteration:
+            return self._refill()
+
+    def uniform(self, a: float, b: float) -> float:
+        """Return a float between a and b."""
+        try:
+            return a + (b - a) * next(self._block)
+        except StopIteration:
+            return a + (b - a) * self._refill()
+
+def _reset_all_after_fork():
+    for jitter in list(_instances):
+        jitter._reset_after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_all_after_fork)
+
+_default = None
+
+def default_jitter() -> SecureJitter:
+    """Return the process-wide jitter source."""
+    global _default
+    if _default is None:
+        _default = SecureJitter()
+    return _default
@@ -0,0 +1,201 @@
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence
+import numpy as np
+from typing_patterns import TransitionType, TypingPatternMap, VirtualKeyCode
+
+BACKSPACE = '\b'
+
+# Keys the Markov model walks over; the last one is the word boundary
+ALPHABET = sorted(
+    getattr(VirtualKeyCode, name) for name in vars(VirtualKeyCode) if not name.startswith('_')
+) + [' ']
+SPACE = len(ALPHABET) - 1
+
+# Relative English letter frequencies (percent)
+LETTER_FREQUENCIES = {
+    'a': 8.2, 'b': 1.5, 'c': 2.8, 'd': 4.3, 'e': 12.7, 'f': 2.2, 'g': 2.0,
+    'h': 6.1, 'i': 7.0, 'j': 0.15, 'k': 0.77, 'l': 4.0, 'm': 2.4, 'n': 6.7,
+    'o': 7.5, 'p': 1.9, 'q': 0.095, 'r': 6.0, 's': 6.3, 't': 9.1, 'u': 2.8,
+    'v': 0.98, 'w': 2.4, 'x': 0.15, 'y': 2.0, 'z': 0.074,
+}
+
+@dataclass
+class KeystrokeStream:
+    """Columnar keystrokes: code points and down/up times in seconds."""
+    keys: np.ndarray
+    down: np.ndarray
+    up: np.ndarray
+
+    def __len__(self):
+        return len(self.keys)
+
+    def records(self):
+        """Iterate (down, up, key) trace records."""
+        for key, down, up in zip(self.keys.tolist(), self.down.tolist(), self.up.tolist()):
+            yield down, up, chr(key)
+
+class SyntheticTypist:
+    """Vectorized Markov-chain typist over VirtualKeyCode bigrams.
+
+    Keys follow a bigram Markov model and inter-key intervals come from the
+    TypingPatternMap transitions, rescaled to the requested WPM. Many short
+    chains are stepped in parallel so generation is a few NumPy operations
+    per step rather than Python work per key.
+    """
+
+    def __init__(self, wpm: float = 60.0, burstiness: float = 0.0, error_rate: float = 0.0,
+                 pattern_map: Optional[TypingPatternMap] = None,
+                 transitions: Optional[np.ndarray] = None, seed: Optional[int] = None,
+                 idiosyncrasy: float = 0.0):
+        if wpm <= 0:
+            raise ValueError("wpm must be positive")
+        if not 0 <= error_rate < 1:
+            raise ValueError("error_rate must be in [0, 1)")
+        self.wpm = wpm
+        self.burstiness = burstiness
+        self.error_rate = error_rate
+        self.codes = np.array([ord(key) for key in ALPHABET], dtype=np.int32)
+        # Backspace and anything outside the alphabet time like a space
+        self._index_of = np.full(128, SPACE, dtype=np.int64)
+        self._index_of[self.codes] = np.arange(len(ALPHABET))
+        self.pattern_map = pattern_map if pattern_map is not None else TypingPatternMap()
+        if transitions is None:
+            transitions = self._default_transitions()
+        self._cumulative = np.cumsum(transitions / transitions.sum(axis=1, keepdims=True), axis=1)
+        self._mean_iki, self._iki_variability = self._timing_tables()
+        self.rng = np.random.default_rng(seed)
+        # A per-typist factor on every bigram's interval, i.e. a personal rhythm
+        if idiosyncrasy > 0:
+            self._mean_iki = self._mean_iki * np.exp(idiosyncrasy * self.rng.standard_normal(self._mean_iki.shape))
+
+    @classmethod
+    def from_text(cls, text: str, **kwargs) -> 'SyntheticTypist':
+        """Fit the bigram model to the letters and spaces of text."""
+        index = {key: i for i, key in enumerate(ALPHABET)}
+        size = len(ALPHABET)
+        encoded = np.array([index[c] for c in text.lower() if c in index], dtype=np.int64)
+        counts = np.bincount(encoded[:-1] * size + encoded[1:], minlength=size * size)
+        # Light smoothing keeps every row a valid distribution
+        transitions = counts.reshape(size, size).astype(np.float64) + 0.01
+        return cls(transitions=transitions, **kwargs)
+
+    def _default_transitions(self) -> np.ndarray:
+        """English-like bigram weights, boosting the pattern map's common pairs."""
+        size = len(ALPHABET)
+        letters = np.array([LETTER_FREQUENCIES[key] for key in ALPHABET[:SPACE]])
+        transitions = np.zeros((size, size))
+        transitions[:, :SPACE] = letters / letters.sum()
+        # Average English word is about 4.7 letters long
+        transitions[:SPACE, SPACE] = 1 / 4.7
+        for i, from_key in enumerate(ALPHABET[:SPACE]):
+            for to_key, transition in self.pattern_map.key_relationships.get(from_key, {}).items():
+                if transition.base_delay == TransitionType.COMMON_PAIR:
+                    transitions[i, ALPHABET.index(to_key)] *= 8
+        return transitions
+
+    def _timing_tables(self):
+        """Dense mean/variability IKI tables from the pattern map."""
+        size = len(ALPHABET)
+        mean = np.full((size, size), TransitionType.ALTERNATING_HAND)
+        variability = np.full((size, size), 0.015)
+        for i, from_key in enumerate(ALPHABET):
+            for to_key, transition in self.pattern_map.key_relationships.get(from_key, {}).items():
+                if to_key in ALPHABET:
+                    j = ALPHABET.index(to_key)
+                    mean[i, j] = transition.base_delay
+                    variability[i, j] = transition.variability
+        return mean, variability
+
+    def _walk(self, n: int, max_chains: int = 4096) -> np.ndarray:
+        """Alphabet indices for n keys, stepping many chains in lockstep."""
+        # Chains of at least 64 keys keep the chain seams rare
+        chains = max(1, min(max_chains, n // 64))
+        steps = -(-n // chains)
+        states = np.empty((steps, chains), dtype=np.int64)
+        # Every chain starts after a word boundary
+        state = np.full(chains, SPACE)
+        uniforms = self.rng.random((steps, chains))
+        for step in range(steps):
+            rows = self._cumulative[state]
+            state = (rows < uniforms[step, :, None]).sum(axis=1)
+            np.minimum(state, SPACE, out=state)
+            states[step] = state
+        return states.T.reshape(-1)[:n]
+
+    def _insert_errors(self, walk: np.ndarray) -> np.ndarray:
+        """Replace keys with a wrong key, a backspace and the intended key."""
+        if self.error_rate <= 0:
+            return self.codes[walk]
+        intended = self.codes[walk]
+        errors = self.rng.random(len(walk)) < self.error_rate
+        widths = np.where(errors, 3, 1)
+        ends = np.cumsum(widths)
+        out = np.empty(ends[-1], dtype=np.int32)
+        out[ends - 1] = intended
+        starts = ends[errors] - 3
+        out[starts] = self.codes[self.rng.integers(0, SPACE, size=len(starts))]
+        out[starts + 1] = ord(BACKSPACE)
+        return out
+
+    def generate(self, n: int, start: float = 0.0) -> KeystrokeStream:
+        """Generate about n keystrokes (more when errors add corrections)."""
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        keys = self._insert_errors(self._walk(n))
+        index = self._index_of[keys]
+        prev, cur = index[:-1], index[1:]
+        mean = self._mean_iki[prev, cur]
+        spread = self._iki_variability[prev, cur]
+        iki = mean + spread * self.rng.uniform(-1.0, 1.0, len(cur))
+        if self.burstiness > 0 and len(iki):
+            words = np.cumsum(keys[:-1] == ord(' '))
+            sigma = self.burstiness
+            pace = np.exp(sigma * self.rng.standard_normal(words[-1] + 1) - sigma * sigma / 2)
+            iki *= pace[words]
+        # Rescale so the average interval matches the requested words per minute
+        if len(iki):
+            iki *= (60.0 / (self.wpm * 5)) / iki.mean()
+        down = np.empty(len(keys))
+        down[0] = start
+        np.cumsum(iki, out=down[1:])
+        down[1:] += start
+        dwell = 0.09 * np.exp(0.2 * self.rng.standard_normal(len(keys)))
+        return KeystrokeStream(keys, down, down + dwell)
+
+def feed(backend, stream: KeystrokeStream):
+    """Deliver the key down events of a stream to a simulated backend."""
+    for key, down in zip(stream.keys.tolist(), stream.down.tolist()):
+        backend.feed(chr(key), down)
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Generate synthetic keystrokes for load testing."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--keys', type=int, default=100_000, help="number of keystrokes to generate")
+    parser.add_argument('--wpm', type=float, default=60.0, help="typing speed in words per minute")
+    parser.add_argument('--burstiness', type=float, default=0.0, help="per-word pace variation (log-normal sigma)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of keys mistyped and corrected")
+    parser.add_argument('--seed', type=int, default=None, help="seed for a reproducible stream")
+    parser.add_argument('--out', help="trace file to write")
+    parser.add_argument('--simulate', action='store_true', help="replay the stream through the scrambler")
+    args = parser.parse_args(argv)
+
+    typist = SyntheticTypist(args.wpm, args.burstiness, args.error_rate, seed=args.seed)
+    started = time.perf_counter()
+    stream = typist.generate(args.keys)
+    elapsed = time.perf_counter() - started
+    print(f"Generated {len(stream)} keystrokes in {elapsed:.3f}s ({len(stream) / elapsed:,.0f} events/s)")
+
+    if args.out:
+        from simulation import write_trace
+        write_trace(args.out, stream.records())
+        print(f"Wrote {args.out}")
+
+    if args.simulate:
+        from simulation import replay
+        emitted = replay(stream.records(), seed=args.seed)
+        print(f"Scrambler released {len(emitted)} of {len(stream)} keys")
+
+if __name__ == "__main__":
+    main()
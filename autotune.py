@@ -0,0 +1,174 @@
+import argparse
+import math
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from evaluation import Corpus, DelaySetting, corpus_from_streams, synthetic_corpus
+from scrambler_config import DEFAULT_CONFIG_PATH, save_settings
+from session_recorder import key_class, open_session
+from sweep import SweepPool
+
+# Candidate mean delays, tried from the lowest up
+BASE_DELAYS_MS = (20, 30, 40, 50, 65, 80, 100, 125, 150, 200, 250, 300, 400, 500)
+# Standard deviation as a fraction of the mean; uniform tops out near 0.58
+SPREADS = {
+    'uniform': (0.3, 0.45, 0.57),
+    'lognormal': (0.3, 0.6, 0.9),
+    'ex-gaussian': (0.3, 0.6, 0.9),
+    'gamma': (0.3, 0.6, 0.9),
+}
+# Fewest scored windows of the user's own typing; fewer make the accuracy a guess
+MIN_TEST_WINDOWS = 20
+
+def _key_class_table() -> np.ndarray:
+    return np.array([key_class(chr(code)) for code in range(128)], dtype=np.int64)
+
+def load_own_timing(paths: Sequence[str]):
+    """Key classes and capture times from the user's recordings, back to back."""
+    classes, times = [], []
+    offset = 0.0
+    for path in paths:
+        records = open_session(path)
+        if not len(records):
+            continue
+        captured = np.asarray(records['captured_at'], dtype=np.float64)
+        # Sessions follow each other after a pause the features ignore
+        times.append(captured - captured[0] + offset)
+        classes.append(np.asarray(records['key_class'], dtype=np.int64))
+        offset = times[-1][-1] + 60.0
+    if not times:
+        raise ValueError("no keys in the recordings")
+    return np.concatenate(classes), np.concatenate(times)
+
+def build_corpus(own_classes: np.ndarray, own_times: np.ndarray, population: int, seed: int) -> Corpus:
+    """Synthetic typists followed by the user, all reduced to key classes."""
+    synthetic = synthetic_corpus(population, max(len(own_classes), 2000), seed=seed)
+    table = _key_class_table()
+    streams = [(table[np.minimum(tokens, 127)], down) for tokens, down in
+               (synthetic.user(i) for i in range(synthetic.users))]
+    streams.append((own_classes, own_times))
+    return corpus_from_streams(streams)
+
+def scored_windows(keys: int, window: int) -> int:
+    """Windows of a user's keys that reidentification_accuracy scores; the rest enrol."""
+    windows = (keys - 1) // window
+    return windows - windows // 2
+
+def accuracy_interval(accuracy: float, trials: int, z: float = 1.96) -> Tuple[float, float]:
+    """Wilson score interval of an accuracy measured over trials windows (95% by default)."""
+    spread = z * z / trials
+    centre = (accuracy + spread / 2) / (1 + spread)
+    half = z * math.sqrt(accuracy * (1 - accuracy) / trials + spread / (4 * trials)) / (1 + spread)
+    return max(centre - half, 0.0), min(centre + half, 1.0)
+
+def tune(corpus: Corpus, target: float, kinds: Sequence[str], workers: Optional[int] = None,
+         window: int = 300, repeats: int = 5, refine: int = 3, seed: int = 0) -> Optional[Dict[str, object]]:
+    """Lowest-latency setting whose re-identification accuracy for the last user is surely below target.
+
+    A setting passes only when the upper end of its accuracy interval is
+    below target. Every repeat redraws all delays, so each test window
+    counts once per repeat. Mean delays are tried from the lowest up; once
+    one passes, the gap to the previous mean is bisected for the passing
+    kind and spread.
+    """
+    user = corpus.users - 1
+    windows = scored_windows(int(corpus.offsets[user + 1] - corpus.offsets[user]), window)
+    if windows < MIN_TEST_WINDOWS:
+        raise ValueError(f"the last user needs at least {MIN_TEST_WINDOWS} test windows of {window} keys")
+    trials = windows * repeats
+
+    def score(pool: SweepPool, settings: List[DelaySetting]) -> List[Dict[str, object]]:
+        runs = [pool.evaluate(settings, seed + r, user) for r in range(repeats)]
+        results = []
+        for per_setting in zip(*runs):
+            result = dict(per_setting[0])
+            for key in ('accuracy', 'mean_ms', 'p99_ms'):
+                result[key] = float(np.mean([run[key] for run in per_setting]))
+            result['accuracy_low'], result['accuracy_high'] = accuracy_interval(result['accuracy'], trials)
+            results.append(result)
+        return results
+
+    with SweepPool(corpus, workers, window=window) as pool:
+        best, previous_base = None, 0.0
+        for base_ms in BASE_DELAYS_MS:
+            base = base_ms / 1000
+            settings = [DelaySetting(kind, base, base * spread) for kind in kinds for spread in SPREADS[kind]]
+            passing = [r for r in score(pool, settings) if r['accuracy_high'] < target]
+            if passing:
+                best = min(passing, key=lambda r: (r['mean_ms'], r['p99_ms']))
+                break
+            previous_base = base
+        if best is None:
+            return None
+
+        winner = best['setting']
+        low, high = previous_base, winner.base_delay
+        for _ in range(refine):
+            middle = (low + high) / 2
+            if middle <= 0:
+                break
+            candidate = DelaySetting(winner.kind, middle, middle * winner.variability / winner.base_delay)
+            result = score(pool, [candidate])[0]
+            if result['accuracy_high'] < target:
+                best, high = result, middle
+            else:
+                low = middle
+        return best
+
+def save_delay_settings(path: str, setting: DelaySetting):
+    """Write setting's delay parameters to the settings file, keeping the mode the user chose."""
+    changes = setting.settings()
+    del changes['mode']
+    save_settings(path, changes)
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Find the lowest-latency settings that keep re-identification below a target and apply them."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('recordings', nargs='+', help="your session recordings (key classes are enough)")
+    parser.add_argument('--target', type=float, default=0.10, help="maximum re-identification accuracy, e.g. 0.10")
+    parser.add_argument('--kinds', nargs='+', default=['uniform', 'lognormal', 'ex-gaussian'], choices=sorted(SPREADS),
+                        help="delay distributions to consider")
+    parser.add_argument('--population', type=int, default=24, help="synthetic typists to hide among")
+    parser.add_argument('--window', type=int, default=300, help="keystrokes per observation window")
+    parser.add_argument('--repeats', type=int, default=5, help="delay draws averaged per setting")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the population and the delays")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="settings file to update")
+    parser.add_argument('--dry-run', action='store_true', help="report the result without writing it")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        classes, times = load_own_timing(args.recordings)
+    except Exception as e:
+        print(f"Error reading recordings: {e}", file=sys.stderr)
+        sys.exit(1)
+    needed = 2 * MIN_TEST_WINDOWS * args.window + 1
+    if len(classes) < needed:
+        print(f"Error: need at least {needed} recorded keys for {MIN_TEST_WINDOWS} test windows, got {len(classes)}; "
+              f"record more or pass a smaller --window", file=sys.stderr)
+        sys.exit(1)
+    corpus = build_corpus(classes, times, args.population, args.seed)
+    best = tune(corpus, args.target, args.kinds, args.workers, args.window, args.repeats, seed=args.seed)
+    elapsed = time.perf_counter() - started
+
+    if best is None:
+        print(f"No setting up to {BASE_DELAYS_MS[-1]} ms keeps accuracy surely below {args.target:.0%} ({elapsed:.1f}s); "
+              f"settings left unchanged")
+        sys.exit(1)
+    setting = best['setting']
+    print(f"{setting.label()}: accuracy {best['accuracy']:.1%}, 95% interval {best['accuracy_low']:.1%} to "
+          f"{best['accuracy_high']:.1%} (target < {args.target:.0%}, chance {1 / corpus.users:.1%}), "
+          f"added latency mean {best['mean_ms']:.1f} ms, p99 {best['p99_ms']:.1f} ms ({elapsed:.1f}s)")
+    if args.dry_run:
+        return
+    try:
+        save_delay_settings(args.config, setting)
+    except Exception as e:
+        print(f"Error writing {args.config}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Wrote {args.config}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+import argparse
+import heapq
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict
+import numpy as np
+from keystroke_core import KeystrokeScrambler
+from evaluation import TimingFeatures, evaluate, reidentification_accuracy, strategy_settings, synthetic_corpus
+from delay_distributions import EmpiricalDelay, ExGaussianDelay, GammaDelay, LogNormalDelay, UniformDelay
+from perf_samples import PerfSampler, summarize
+from random_streams import RandomStreams
+from release_dispatcher import ReleaseDispatcher
+from release_planner import ReleasePlanner
+from secure_jitter import SecureJitter
+from session_recorder import SessionRecorder
+from simulation import SimulatedBackend
+from synthetic_typist import SyntheticTypist
+from typing_patterns import KeyTransition
+
+def _ns_per_call(draw: Callable[[float, float], float], calls: int, repeat: int) -> float:
+    """Best-of-repeat nanoseconds per call of draw(-0.02, 0.02)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            draw(-0.02, 0.02)
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e9
+
+def bench_jitter(calls: int = 1_000_000, repeat: int = 5) -> Dict[str, float]:
+    """Compare jitter sources on the uniform() call made per key."""
+    secure = SecureJitter()
+    return {
+        'random.uniform (ns/call)': _ns_per_call(random.uniform, calls, repeat),
+        'RandomStreams.uniform (ns/call)': _ns_per_call(RandomStreams().uniform, calls, repeat),
+        'SecureJitter.uniform (ns/call)': _ns_per_call(secure.uniform, calls, repeat),
+    }
+
+def bench_distributions(calls: int = 1_000_000, repeat: int = 5) -> Dict[str, float]:
+    """Compare KeyTransition.sample across distribution types."""
+    rng = SecureJitter()
+    distributions = {
+        'base ± uniform (no table)': None,
+        'uniform': UniformDelay(0.1, 0.02),
+        'lognormal': LogNormalDelay(0.1, 0.25),
+        'gamma': GammaDelay(4.0, 0.025),
+        'ex-gaussian': ExGaussianDelay(0.08, 0.01, 0.02),
+        'empirical': EmpiricalDelay(0.1 + rng.uniform(-0.02, 0.02) for _ in range(1000)),
+    }
+    results = {}
+    for name, distribution in distributions.items():
+        sample = KeyTransition(0.1, 0.02, distribution).sample
+        results[f"{name} (ns/call)"] = _ns_per_call(lambda _a, _b: sample(rng), calls, repeat)
+    return results
+
+def bench_allocations(keys: int = 20_000, warmup: int = 5_000) -> Dict[str, float]:
+    """Net bytes traced by tracemalloc per key once typing is steady."""
+    backend = SimulatedBackend(record=False)
+    scrambler = KeystrokeScrambler(backend=backend, rng=RandomStreams(0))
+    scrambler.start()
+    text = "the quick brown fox jumps over the lazy dog "
+
+    def type_keys(start, count):
+        for i in range(start, start + count):
+            backend.feed(text[i % len(text)], i * 0.05)
+
+    tracemalloc.start()
+    try:
+        # Warm up while tracing so reused slots already hold traced objects
+        type_keys(0, warmup)
+        # Measure between idle states, so keys and timers in flight do not count
+        backend.run_until_idle()
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        type_keys(warmup, keys)
+        backend.run_until_idle()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'net bytes/key': (after - before) / keys,
+        'peak bytes above start': float(peak - before),
+    }
+
+def _emulated_gui_frame(python_s: float = 0.001, toolkit_s: float = 0.007):
+    """One busy GUI frame: some Python work, then toolkit drawing that releases the GIL."""
+    end = time.perf_counter() + python_s
+    while time.perf_counter() < end:
+        pass
+    time.sleep(toolkit_s)
+
+def _percentiles_ms(lateness) -> Dict[str, float]:
+    lateness = sorted(lateness)
+    return {p: lateness[min(len(lateness) - 1, int(len(lateness) * q))] * 1000 for p, q in (('p50', 0.5), ('p99', 0.99))}
+
+def _dispatcher_lateness(keys: int, gui_busy: bool):
+    """Release-time error of ReleaseDispatcher, optionally next to a busy GUI thread."""
+    dispatcher = ReleaseDispatcher()
+    rng = random.Random(0)
+    lateness = []
+    done = threading.Event()
+    stop = threading.Event()
+
+    def gui():
+        # 20 ms animation frames, like _animate_toggle and slider redraws
+        while not stop.is_set():
+            start = time.perf_counter()
+            _emulated_gui_frame()
+            time.sleep(max(0.0, 0.02 - (time.perf_counter() - start)))
+
+    if gui_busy:
+        threading.Thread(target=gui, daemon=True).start()
+    def release(due):
+        lateness.append(time.monotonic() - due)
+        if len(lateness) == keys:
+            done.set()
+
+    for _ in range(keys):
+        delay = rng.uniform(0.005, 0.015)
+        due = time.monotonic() + delay
+        dispatcher.call_later(delay, lambda due=due: release(due))
+        time.sleep(0.002)
+    done.wait()
+    stop.set()
+    dispatcher.stop()
+    return lateness
+
+def _main_loop_lateness(keys: int):
+    """Release-time error when timers share one loop with GUI frames, as with root.after."""
+    rng = random.Random(0)
+    timers = []
+    lateness = []
+    next_key = time.monotonic()
+    next_frame = next_key
+    scheduled = 0
+    while len(lateness) < keys:
+        now = time.monotonic()
+        if scheduled < keys and now >= next_key:
+            heapq.heappush(timers, now + rng.uniform(0.005, 0.015))
+            scheduled += 1
+            next_key = now + 0.002
+        while timers and timers[0] <= now:
+            lateness.append(now - heapq.heappop(timers))
+        if now >= next_frame:
+            _emulated_gui_frame()
+            next_frame = now + 0.02
+            continue
+        wake = min([next_key if scheduled < keys else next_frame, next_frame] + timers[:1])
+        time.sleep(max(0.0, wake - time.monotonic()))
+    return lateness
+
+def bench_dispatch(keys: int = 1_000) -> Dict[str, float]:
+    """Release lateness with and without GUI activity (wall-clock, takes a few seconds)."""
+    results = {}
+    for name, lateness in (
+        ('dispatcher, idle GUI', _dispatcher_lateness(keys, gui_busy=False)),
+        ('dispatcher, busy GUI', _dispatcher_lateness(keys, gui_busy=True)),
+        ('GUI main loop, busy GUI', _main_loop_lateness(keys)),
+    ):
+        for percentile, value in _percentiles_ms(lateness).items():
+            results[f"{name} {percentile} (ms late)"] = value
+    return results
+
+def bench_dashboard(refreshes: int = 200, rate_hz: float = 4.0) -> Dict[str, float]:
+    """Cost of one PerformancePanel refresh, sparkline redraws included, while typing at 300 WPM.
+
+    Needs a display for the Tk root; without one only the sampling cost is reported.
+    """
+    sampler = PerfSampler()
+    rng = random.Random(0)
+    for i in range(sampler.capacity):
+        captured = i * 0.04  # 300 WPM
+        intended = captured + rng.uniform(0.08, 0.12)
+        sampler.record(captured, intended, intended + rng.uniform(0, 0.001), rng.randrange(4))
+    now = sampler.capacity * 0.04 + 0.1
+    start = time.process_time()
+    for _ in range(refreshes):
+        summarize(sampler.snapshot(now - 10.0), now)
+    per_refresh = (time.process_time() - start) / refreshes
+    results = {'snapshot + summarize (ms/refresh)': per_refresh * 1000}
+
+    import tkinter as tk
+    from gui_scrambler import PerformancePanel
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"  (no Tk display, skipping the panel refresh: {e})")
+        return results
+    try:
+        backend = SimulatedBackend()
+        backend.clock = now
+        scrambler = KeystrokeScrambler(backend=backend, rng=RandomStreams(0))
+        scrambler.samples = sampler
+        panel = PerformancePanel(root, scrambler, rate_hz)
+        panel.pack()
+        root.update()
+        start = time.process_time()
+        for _ in range(refreshes):
+            panel.refresh()
+            # Let Tk redraw the labels and sparklines as the main loop would
+            root.update()
+        per_refresh = (time.process_time() - start) / refreshes
+    finally:
+        root.destroy()
+    results['PerformancePanel.refresh + Tk redraw (ms/refresh)'] = per_refresh * 1000
+    results[f'GUI thread CPU at {rate_hz:g} Hz (%)'] = per_refresh * rate_hz * 100
+    return results
+
+def bench_recorder(calls: int = 1_000_000, repeat: int = 5) -> Dict[str, float]:
+    """Cost of SessionRecorder.record on the releasing thread."""
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = SessionRecorder(os.path.join(directory, 'session.ksrec'))
+        try:
+            record = recorder.record
+            return {'SessionRecorder.record (ns/call)': _ns_per_call(lambda _a, _b: record(1, 'a', 1.0, 1.1, 1.1), calls, repeat)}
+        finally:
+            recorder.close()
+
+def _engine_release_times(corpus, mode: str, base_delay: float = 0.1):
+    """Release time of every corpus key when typed through the engine in the given mode."""
+    release = []
+    for user in range(corpus.users):
+        tokens, down = corpus.user(user)
+        backend = SimulatedBackend()
+        scrambler = KeystrokeScrambler(backend=backend, rng=RandomStreams(user))
+        scrambler.config_store.update(base_delay=base_delay, mode=mode)
+        scrambler.start()
+        for key, at in zip(tokens.tolist(), down.tolist()):
+            backend.feed(chr(key), at)
+        backend.run_until_idle()
+        # Releases are FIFO, so the i-th emitted key is the i-th typed one
+        release.extend(when for when, _ in backend.emitted)
+    return np.array(release)
+
+def bench_adaptive(users: int = 12, keys: int = 3000) -> Dict[str, float]:
+    """Added latency and re-identification accuracy of fixed vs adaptive and planned noise."""
+    corpus = synthetic_corpus(users, keys, seed=1)
+    features = TimingFeatures(corpus)
+    results = {'no scrambling accuracy (%)': reidentification_accuracy(corpus, corpus.down, features) * 100}
+    for mode in ('fixed', 'adaptive', 'planned'):
+        release = _engine_release_times(corpus, mode)
+        added = (release - corpus.down) * 1000
+        results[f'{mode} mean added (ms)'] = float(added.mean())
+        results[f'{mode} p99 added (ms)'] = float(np.percentile(added, 99))
+        results[f'{mode} accuracy (%)'] = reidentification_accuracy(corpus, release, features) * 100
+    return results
+
+class _CountingBackend(SimulatedBackend):
+    """SimulatedBackend that counts scheduled timers, i.e. dispatcher wakeups."""
+
+    def __init__(self):
+        super().__init__(record=False)
+        self.timers = 0
+
+    def call_later(self, delay, callback):
+        self.timers += 1
+        super().call_later(delay, callback)
+
+def bench_grid(keys: int = 50_000, wpm: float = 300) -> Dict[str, float]:
+    """Timers and engine time per key for per-key delays vs the grid and planned modes, typing fast."""
+    down = SyntheticTypist(wpm, 0.3, seed=0).generate(keys).down.tolist()
+    results = {}
+    for label, changes in (
+        ('fixed', {'mode': 'fixed'}),
+        ('grid 25 ms x1', {'mode': 'grid', 'grid_interval': 0.025, 'grid_batch': 1}),
+        ('grid 50 ms x2', {'mode': 'grid', 'grid_interval': 0.05, 'grid_batch': 2}),
+        ('planned', {'mode': 'planned'}),
+    ):
+        backend = _CountingBackend()
+        scrambler = KeystrokeScrambler(backend=backend, rng=RandomStreams(0))
+        scrambler.config_store.update(**changes)
+        scrambler.start()
+        start = time.process_time()
+        for at in down:
+            backend.feed('a', at)
+        backend.run_until_idle()
+        elapsed = time.process_time() - start
+        results[f'{label} timers/100 keys'] = backend.timers / len(down) * 100
+        results[f'{label} engine CPU (us/key)'] = elapsed / len(down) * 1e6
+    return results
+
+class _LatencyLog:
+    """Stands in for PerfSampler, keeping every key's added latency."""
+
+    def __init__(self):
+        self.added = []
+
+    def record(self, captured_at, release_at, released_at, remaining):
+        self.added.append(released_at - captured_at)
+
+def bench_word(keys: int = 50_000, wpm: float = 80) -> Dict[str, float]:
+    """Timers, engine time and added latency per key for per-key delays vs the word mode."""
+    stream = SyntheticTypist(wpm, 0.2, error_rate=0.02, seed=0).generate(keys)
+    typed = [(chr(key), at) for key, at in zip(stream.keys.tolist(), stream.down.tolist())]
+    results = {}
+    for mode in ('fixed', 'word'):
+        backend = _CountingBackend()
+        scrambler = KeystrokeScrambler(backend=backend, rng=RandomStreams(0))
+        scrambler.config_store.update(mode=mode)
+        scrambler.start()
+        scrambler.samples = _LatencyLog()
+        start = time.process_time()
+        for key, at in typed:
+            backend.feed(key, at)
+        backend.run_until_idle()
+        elapsed = time.process_time() - start
+        results[f'{mode} timers/100 keys'] = backend.timers / len(typed) * 100
+        results[f'{mode} engine CPU (us/key)'] = elapsed / len(typed) * 1e6
+        results[f'{mode} mean added (ms)'] = float(np.mean(scrambler.samples.added)) * 1000
+    return results
+
+def bench_planner(keys: int = 200_000, repeat: int = 5) -> Dict[str, float]:
+    """Cost of planning one key, typing fast enough that keys overlap."""
+    down = SyntheticTypist(150, 0.3, seed=0).generate(keys).down.tolist()
+    rng = RandomStreams(0)
+    noises = [rng.uniform(0.03, 0.06) for _ in down]
+    best = float('inf')
+    for _ in range(repeat):
+        planner = ReleasePlanner()
+        plan = planner.plan
+        start = time.perf_counter()
+        for at, noise in zip(down, noises):
+            plan(at, noise, 0.0, True)
+        best = min(best, time.perf_counter() - start)
+    return {'ReleasePlanner.plan (ns/key)': best / len(down) * 1e9}
+
+def bench_strategies(calls: int = 100_000, users: int = 12, keys: int = 3000) -> Dict[str, float]:
+    """Per-event and batch cost, added latency and accuracy of every registered strategy."""
+    corpus = synthetic_corpus(users, keys, seed=1)
+    features = TimingFeatures(corpus)
+    tokens, down = corpus.user(0)
+    typed = [(chr(key), at) for key, at in zip(tokens.tolist(), down.tolist())]
+    typed = (typed * (calls // len(typed) + 1))[:calls]
+    rng = RandomStreams(0)
+    results = {}
+    for setting in strategy_settings():
+        strategy = setting.config().strategy
+        next_delay = strategy.next_delay
+        prev = None
+        start = time.perf_counter()
+        for key, at in typed:
+            next_delay(prev, key, at, rng)
+            prev = key
+        results[f'{setting.name} next_delay (ns/call)'] = (time.perf_counter() - start) / calls * 1e9
+        start = time.perf_counter()
+        strategy.sample_batch(corpus.tokens, corpus.down, np.random.default_rng(0))
+        results[f'{setting.name} sample_batch (ns/key)'] = (time.perf_counter() - start) / len(corpus.down) * 1e9
+        result = evaluate(corpus, setting, features)
+        results[f'{setting.name} mean added (ms)'] = result['mean_ms']
+        results[f'{setting.name} accuracy (%)'] = result['accuracy'] * 100
+    return results
+
+BENCHMARKS = {
+    'jitter': bench_jitter,
+    'distributions': bench_distributions,
+    'adaptive': bench_adaptive,
+    'allocations': bench_allocations,
+    'dashboard': bench_dashboard,
+    'dispatch': bench_dispatch,
+    'grid': bench_grid,
+    'planner': bench_planner,
+    'word': bench_word,
+    'recorder': bench_recorder,
+    'strategies': bench_strategies,
+}
+
+def main(argv=None):
+    """Run the benchmark suite and print the results."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run (default: all of {', '.join(sorted(BENCHMARKS))})")
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    for name in args.names or sorted(BENCHMARKS):
+        print(f"{name}:")
+        for label, value in BENCHMARKS[name]().items():
+            print(f"  {label:<40} {value:10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import string
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from bigram_cells import CODES
+from scrambler_config import DEFAULT_CONFIG_PATH, save_settings
+from transition_analysis import CoverageReport, TransitionTable
+from typing_patterns import TypingPatternMap
+
+# Text is counted as raw bytes: ASCII keeps its code and every byte of a
+# multi-byte UTF-8 character maps to 0, so nothing is decoded and a file
+# can be split at any byte. Pairs with one non-ASCII side are counted as
+# transition_analysis.encode() counts them; only the 0 -> 0 cell is larger.
+_CODES = np.where(np.arange(256) < CODES, np.arange(256), 0).astype(np.uint16)
+_FOLDED = _CODES.copy()
+_FOLDED[ord('A'):ord('Z') + 1] += ord('a') - ord('A')
+
+Shard = Tuple[str, int, int, bool]
+
+class BigramCounts:
+    """Occurrences of every ASCII bigram in a flat CODES x CODES integer array."""
+
+    def __init__(self, lowercase: bool = True):
+        self.lowercase = lowercase
+        self.counts = np.zeros(CODES * CODES, dtype=np.int64)
+        # Code of the last byte added, so bigrams spanning two chunks are counted
+        self._last: Optional[int] = None
+
+    def add_bytes(self, data: bytes):
+        """Count the bigrams of data, continuing from the previous add_bytes() call."""
+        if not data:
+            return
+        codes = (_FOLDED if self.lowercase else _CODES)[np.frombuffer(data, dtype=np.uint8)]
+        if self._last is not None:
+            self.counts[self._last * CODES + codes[0]] += 1
+        # Cells fit in uint16, which keeps a chunk's temporaries small
+        cells = codes[:-1] * np.uint16(CODES) + codes[1:]
+        self.counts += np.bincount(cells, minlength=CODES * CODES)
+        self._last = int(codes[-1])
+
+    def merge(self, counts: np.ndarray):
+        """Add counts from another shard; the shards' boundary bigrams must already be in them."""
+        self.counts += counts
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def most_common(self, n: int, keys: str = string.ascii_lowercase) -> List[Tuple[str, int]]:
+        """The n most frequent bigrams made only of keys, with their counts."""
+        codes = np.array([ord(key) for key in keys if ord(key) < CODES], dtype=np.int64)
+        cells = (codes[:, None] * CODES + codes[None, :]).ravel()
+        counts = self.counts[cells]
+        order = np.argsort(-counts, kind='stable')[:n]
+        return [(chr(cells[i] // CODES) + chr(cells[i] % CODES), int(counts[i])) for i in order if counts[i]]
+
+def count_range(path: str, start: int, end: int, lowercase: bool = True, chunk_size: int = 1 << 22) -> np.ndarray:
+    """Counts of the bigrams of path whose first byte lies in [start, end)."""
+    counter = BigramCounts(lowercase)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        # One byte past end completes the bigram that starts at end - 1
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            counter.add_bytes(chunk)
+            remaining -= len(chunk)
+    return counter.counts
+
+def _count_shard(shard: Shard) -> np.ndarray:
+    return count_range(*shard)
+
+def shards(paths: Sequence[str], shard_size: int, lowercase: bool = True) -> List[Shard]:
+    """Byte ranges of up to shard_size covering every file in paths."""
+    ranges = []
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, size, shard_size):
+            ranges.append((path, start, min(start + shard_size, size), lowercase))
+    return ranges
+
+def count_files(paths: Sequence[str], workers: int = 1, shard_size: int = 1 << 26,
+                lowercase: bool = True) -> BigramCounts:
+    """Bigram counts over every file in one pass, in shards across workers processes.
+
+    Memory stays bounded by a chunk per worker whatever the file sizes.
+    '-' reads stdin, which is counted in this process since it cannot be
+    split.
+    """
+    total = BigramCounts(lowercase)
+    files = [path for path in paths if path != '-']
+    if '-' in paths:
+        stdin = BigramCounts(lowercase)
+        for chunk in iter(lambda: sys.stdin.buffer.read(1 << 22), b''):
+            stdin.add_bytes(chunk)
+        total.merge(stdin.counts)
+    ranges = shards(files, shard_size, lowercase)
+    if workers > 1 and len(ranges) > 1:
+        with ProcessPoolExecutor(min(workers, len(ranges))) as pool:
+            for counts in pool.map(_count_shard, ranges):
+                total.merge(counts)
+    else:
+        for shard in ranges:
+            total.merge(_count_shard(shard))
+    return total
+
+def save_common_pairs(path: str, pairs: Sequence[str]):
+    """Set pairs as the bigram strategy's common_pairs in a settings file.
+
+    They land in {"strategy": {"type": "bigram", "common_pairs": [...]}},
+    which ScramblerConfig.from_dict() passes to BigramStrategy and so to its
+    TypingPatternMap. The strategy's other parameters and the mode are kept;
+    the pairs take effect in the strategy mode.
+    """
+    try:
+        with open(path) as f:
+            strategy = json.load(f).get('strategy')
+    except FileNotFoundError:
+        strategy = None
+    if strategy is None:
+        strategy = {'type': 'bigram'}
+    elif strategy.get('type') != 'bigram':
+        raise ValueError(f"{path} uses the {strategy.get('type')!r} strategy, not 'bigram'")
+    save_settings(path, {'strategy': dict(strategy, common_pairs=list(pairs))})
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Pick the most frequent letter pairs of a corpus to promote to COMMON_PAIR transitions."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('paths', nargs='+', help="text files ('-' for stdin)")
+    parser.add_argument('--top', type=int, default=30, help="letter pairs to promote")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="processes counting shards")
+    parser.add_argument('--shard-mb', type=int, default=64, help="megabytes of a file per shard")
+    parser.add_argument('--case-sensitive', action='store_true', help="count A and a as different keys")
+    parser.add_argument('--config', metavar='PATH',
+                        help=f"set the pairs as the bigram strategy's common_pairs in this settings file, e.g. {DEFAULT_CONFIG_PATH}")
+    args = parser.parse_args(argv)
+
+    try:
+        counts = count_files(args.paths, args.workers, args.shard_mb << 20, not args.case_sensitive)
+    except OSError as e:
+        print(f"Error reading text: {e}", file=sys.stderr)
+        sys.exit(1)
+    pairs = counts.most_common(args.top)
+    pattern_map = TypingPatternMap()
+    before = CoverageReport(TransitionTable(pattern_map), counts.counts).explicit_fraction
+    added = pattern_map.promote_common_pairs(pair for pair, _ in pairs)
+    after = CoverageReport(TransitionTable(pattern_map), counts.counts).explicit_fraction
+    print(f"{counts.total} bigrams; promoting {added} new common pairs "
+          f"raises explicit coverage from {before:.1%} to {after:.1%}")
+    for pair, count in pairs:
+        print(f"  {pair}  {count:>12}  {count / counts.total:.2%}")
+    if args.config:
+        try:
+            save_common_pairs(args.config, [pair for pair, _ in pairs])
+        except Exception as e:
+            print(f"Error writing {args.config}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Wrote {len(pairs)} common pairs to {args.config}")
+
+if __name__ == "__main__":
+    main()
@@ -52,6 +52,6 @@ EOL
 chmod +x "$MACOS_DIR/keystroke_launcher"
 
 # Copy Python files
-cp gui_scrambler.py keystroke_core.py typing_patterns.py "$PYTHON_SCRIPTS_DIR/"
+cp gui_scrambler.py keystroke_core.py typing_patterns.py secure_jitter.py delay_distributions.py scrambler_daemon.py pending_ring.py scrambler_config.py release_dispatcher.py perf_samples.py session_recorder.py adaptive_noise.py bigram_cells.py token_bucket.py release_planner.py delay_strategies.py key_codes.py metrics_exporter.py random_streams.py simulation.py synthetic_typist.py "$PYTHON_SCRIPTS_DIR/"
 
 echo "App bundle created at $APP_DIR"
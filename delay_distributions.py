@@ -0,0 +1,184 @@
+import abc
+import math
+from statistics import NormalDist
+from typing import Callable, Iterable, List
+
+_STANDARD_NORMAL = NormalDist()
+
+def _invert_cdf(cdf: Callable[[float], float], p: float, lo: float, hi: float) -> float:
+    """Find x in [lo, hi] with cdf(x) == p by bisection."""
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if cdf(mid) < p:
+            lo = mid
+        else:
+            hi = mid
+        if hi - lo <= 1e-12:
+            break
+    return (lo + hi) / 2
+
+def _regularized_gamma_p(a: float, x: float) -> float:
+    """Lower regularized incomplete gamma function P(a, x)."""
+    if x <= 0:
+        return 0.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        # Series expansion
+        term = total = 1.0 / a
+        n = a
+        for _ in range(1000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return total * math.exp(log_prefix)
+    # Continued fraction for Q(a, x)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return 1.0 - math.exp(log_prefix) * h
+
+class DelayDistribution(abc.ABC):
+    """Delay distribution compiled into an inverse-CDF lookup table.
+
+    Subclasses provide quantile(); the table holds quantiles at evenly spaced
+    probabilities, so sample() is one table read and a linear interpolation
+    whatever the distribution.
+    """
+
+    def __init__(self, table_size: int = 1024):
+        if table_size < 2:
+            raise ValueError("table_size must be at least 2")
+        self.table_size = table_size
+        self._table: List[float] = []
+        self._slopes: List[float] = []
+        self._scale = float(table_size - 1)
+
+    @abc.abstractmethod
+    def quantile(self, p: float) -> float:
+        """Delay in seconds below which a share p of draws fall."""
+
+    def _compile(self):
+        """Build the lookup table from quantile()."""
+        n = self.table_size
+        table = [max(0.0, self.quantile((i + 0.5) / n)) for i in range(n)]
+        self._table = table
+        self._slopes = [table[i + 1] - table[i] for i in range(n - 1)] + [0.0]
+
+    def sample(self, rng) -> float:
+        """Draw a delay in seconds using rng.random()."""
+        x = rng.random() * self._scale
+        i = int(x)
+        return self._table[i] + self._slopes[i] * (x - i)
+
+    @property
+    def table(self) -> List[float]:
+        """The compiled quantile table, for vectorized sampling; do not modify."""
+        return self._table
+
+    def mean(self) -> float:
+        """Mean of the compiled table."""
+        return sum(self._table) / self.table_size
+
+class UniformDelay(DelayDistribution):
+    """base ± variability, the project's original delay model."""
+
+    def __init__(self, base: float, variability: float, table_size: int = 1024):
+        super().__init__(table_size)
+        self.base = base
+        self.variability = variability
+        self._compile()
+
+    def quantile(self, p: float) -> float:
+        return self.base - self.variability + 2 * self.variability * p
+
+class LogNormalDelay(DelayDistribution):
+    """Log-normal delay given the median and the sigma of log(delay)."""
+
+    def __init__(self, median: float, sigma: float, table_size: int = 1024):
+        if median <= 0 or sigma <= 0:
+            raise ValueError("median and sigma must be positive")
+        super().__init__(table_size)
+        self.median = median
+        self.sigma = sigma
+        self._compile()
+
+    def quantile(self, p: float) -> float:
+        return self.median * math.exp(self.sigma * _STANDARD_NORMAL.inv_cdf(p))
+
+class GammaDelay(DelayDistribution):
+    """Gamma delay with the given shape and scale, shifted by loc."""
+
+    def __init__(self, shape: float, scale: float, loc: float = 0.0, table_size: int = 1024):
+        if shape <= 0 or scale <= 0:
+            raise ValueError("shape and scale must be positive")
+        super().__init__(table_size)
+        self.shape = shape
+        self.scale = scale
+        self.loc = loc
+        self._compile()
+
+    def quantile(self, p: float) -> float:
+        # The bracket covers the mean plus 40 standard deviations
+        hi = self.shape + 40 * math.sqrt(self.shape) + 40
+        x = _invert_cdf(lambda t: _regularized_gamma_p(self.shape, t), p, 0.0, hi)
+        return self.loc + self.scale * x
+
+class ExGaussianDelay(DelayDistribution):
+    """Sum of a normal(mu, sigma) and an exponential with mean tau."""
+
+    def __init__(self, mu: float, sigma: float, tau: float, table_size: int = 1024):
+        if sigma <= 0 or tau <= 0:
+            raise ValueError("sigma and tau must be positive")
+        super().__init__(table_size)
+        self.mu = mu
+        self.sigma = sigma
+        self.tau = tau
+        self._compile()
+
+    def cdf(self, x: float) -> float:
+        z = (x - self.mu) / self.sigma
+        ratio = self.sigma / self.tau
+        tail = _STANDARD_NORMAL.cdf(z - ratio)
+        if tail == 0.0:
+            return _STANDARD_NORMAL.cdf(z)
+        exponent = -(x - self.mu) / self.tau + ratio * ratio / 2 + math.log(tail)
+        return _STANDARD_NORMAL.cdf(z) - math.exp(min(exponent, 0.0))
+
+    def quantile(self, p: float) -> float:
+        lo = self.mu - 10 * self.sigma
+        hi = self.mu + 10 * self.sigma + 40 * self.tau
+        return _invert_cdf(self.cdf, p, lo, hi)
+
+class EmpiricalDelay(DelayDistribution):
+    """Delay resampled from observed samples, interpolating between them."""
+
+    def __init__(self, samples: Iterable[float], table_size: int = 1024):
+        super().__init__(table_size)
+        self.samples = sorted(samples)
+        if not self.samples:
+            raise ValueError("samples must not be empty")
+        self._compile()
+
+    def quantile(self, p: float) -> float:
+        samples = self.samples
+        x = p * (len(samples) - 1)
+        i = int(x)
+        if i + 1 >= len(samples):
+            return samples[-1]
+        return samples[i] + (samples[i + 1] - samples[i]) * (x - i)
@@ -0,0 +1,224 @@
+import abc
+import functools
+import math
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+from bigram_cells import CODES, SQRT3, bigram_cells, key_code
+from token_bucket import TokenBucket
+from typing_patterns import DEFAULT_TRANSITION, TypingPatternMap
+
+class DelayStrategy(abc.ABC):
+    """A way of choosing each key's delay, per event and in bulk.
+
+    next_delay() is what the engine calls for each captured key.
+    sample_batch() draws the delays of a whole typed sequence at once, for
+    benchmarks and evaluation; both must follow the same distribution.
+    Stateful strategies keep their per-event state on the instance and
+    start sample_batch() from scratch.
+    """
+
+    @abc.abstractmethod
+    def next_delay(self, prev: Optional[str], cur: str, now: float, rng) -> float:
+        """Delay in seconds for key cur, typed at now after prev (None for the first key)."""
+
+    @abc.abstractmethod
+    def sample_batch(self, keys, down, rng):
+        """Delays for code points keys typed at times down, drawn with a NumPy Generator."""
+
+STRATEGIES: Dict[str, Type[DelayStrategy]] = {}
+
+def register(name: str):
+    """Class decorator adding a strategy to STRATEGIES under name."""
+    def add(cls: Type[DelayStrategy]) -> Type[DelayStrategy]:
+        STRATEGIES[name] = cls
+        return cls
+    return add
+
+def create_strategy(spec: dict) -> DelayStrategy:
+    """Build a strategy from a settings entry such as {"type": "quantized", "interval": 0.05}."""
+    spec = dict(spec)
+    kind = spec.pop('type')
+    if kind not in STRATEGIES:
+        raise ValueError(f"unknown strategy type {kind!r}")
+    return STRATEGIES[kind](**spec)
+
+@register('uniform')
+class UniformStrategy(DelayStrategy):
+    """base ± variation, the engine's original delay."""
+
+    def __init__(self, base: float = 0.1, variation: float = 0.02):
+        if base <= 0 or not 0 <= variation <= base:
+            raise ValueError("base must be positive and variation within [0, base]")
+        self.base = base
+        self.variation = variation
+
+    def next_delay(self, prev, cur, now, rng):
+        return self.base + rng.uniform(-self.variation, self.variation)
+
+    def sample_batch(self, keys, down, rng):
+        return self.base + rng.uniform(-self.variation, self.variation, len(down))
+
+@register('bigram')
+class BigramStrategy(DelayStrategy):
+    """Delays drawn from the TypingPatternMap transition between the two keys."""
+
+    def __init__(self, scale: float = 1.0, pattern_map: Optional[TypingPatternMap] = None,
+                 common_pairs: Sequence[str] = ()):
+        if scale <= 0:
+            raise ValueError("scale must be positive")
+        self.scale = scale
+        pattern_map = pattern_map if pattern_map is not None else TypingPatternMap()
+        # e.g. the pairs bigram_frequencies.py picked from a corpus
+        pattern_map.promote_common_pairs(common_pairs)
+        # One KeyTransition (or None for the default) per lowercased ASCII bigram
+        self._cells: List = [None] * (CODES * CODES)
+        for first, row in pattern_map.key_relationships.items():
+            for second, transition in row.items():
+                for a in {first, first.upper()}:
+                    for b in {second, second.upper()}:
+                        self._cells[key_code(a) * CODES + key_code(b)] = transition
+
+    def next_delay(self, prev, cur, now, rng):
+        transition = self._cells[key_code(prev) * CODES + key_code(cur)]
+        if transition is None:
+            transition = DEFAULT_TRANSITION
+        return transition.sample(rng) * self.scale
+
+    def sample_batch(self, keys, down, rng):
+        import numpy as np
+        cells = bigram_cells(keys)
+        base = np.full(CODES * CODES, DEFAULT_TRANSITION.base_delay)
+        spread = np.full(CODES * CODES, DEFAULT_TRANSITION.variability)
+        tabled = {}
+        for cell, transition in enumerate(self._cells):
+            if transition is None:
+                continue
+            if transition.distribution is not None:
+                tabled[cell] = np.asarray(transition.distribution.table)
+            base[cell], spread[cell] = transition.base_delay, transition.variability
+        delays = base[cells] + spread[cells] * rng.uniform(-1.0, 1.0, len(cells))
+        for cell, table in tabled.items():
+            hit = cells == cell
+            delays[hit] = np.interp(rng.random(int(hit.sum())) * (len(table) - 1), np.arange(len(table)), table)
+        return delays * self.scale
+
+@register('quantized')
+class QuantizedStrategy(DelayStrategy):
+    """Holds each key until the next tick of a fixed grid."""
+
+    def __init__(self, interval: float = 0.025):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+
+    def next_delay(self, prev, cur, now, rng):
+        return (math.floor(now / self.interval) + 1) * self.interval - now
+
+    def sample_batch(self, keys, down, rng):
+        import numpy as np
+        return (np.floor(down / self.interval) + 1) * self.interval - down
+
+@register('bucket')
+class TokenBucketStrategy(DelayStrategy):
+    """No delay while tokens last; beyond the burst, at most rate keys per second."""
+
+    def __init__(self, rate: float = 12.0, burst: float = 4.0):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.bucket = TokenBucket()
+
+    def next_delay(self, prev, cur, now, rng):
+        return self.bucket.shape(now, self.rate, self.burst) - now
+
+    def sample_batch(self, keys, down, rng):
+        import numpy as np
+        # Each key's wait depends on the ones before it, so this stays a loop
+        bucket = TokenBucket()
+        shape, rate, burst = bucket.shape, self.rate, self.burst
+        times = down.tolist()
+        return np.array([shape(at, rate, burst) for at in times]) - down
+
+def _fit_persona(keys, down, max_gap: float, min_count: int) -> Tuple[List[float], List[float]]:
+    """Per-bigram mean interval and uniform half-width fitted to typed code points keys."""
+    import numpy as np
+    keys = np.where(keys < CODES, keys, 0)
+    intervals = np.diff(down)
+    valid = (intervals > 0) & (intervals <= max_gap)
+    if not valid.any():
+        raise ValueError("no usable intervals to fit the persona to")
+    cells = (keys[:-1] * CODES + keys[1:])[valid]
+    intervals = intervals[valid]
+    counts = np.bincount(cells, minlength=CODES * CODES)
+    sums = np.bincount(cells, intervals, CODES * CODES)
+    squares = np.bincount(cells, intervals * intervals, CODES * CODES)
+    fitted = counts >= min_count
+    means = np.where(fitted, sums / np.maximum(counts, 1), intervals.mean())
+    variances = np.where(fitted, squares / np.maximum(counts, 1) - means * means, intervals.var())
+    return means.tolist(), (np.sqrt(np.maximum(variances, 0.0)) * SQRT3).tolist()
+
+def _fit_synthetic_persona(wpm: float, seed: Optional[int], max_gap: float,
+                           min_count: int) -> Tuple[List[float], List[float]]:
+    import numpy as np
+    from synthetic_typist import SyntheticTypist
+    stream = SyntheticTypist(wpm, 0.2, seed=seed).generate(20000)
+    return _fit_persona(stream.keys.astype(np.int64), stream.down, max_gap, min_count)
+
+# A seeded synthetic persona is the same every time, so each is fitted once
+# rather than on every construction and settings reload
+_synthetic_persona = functools.lru_cache(maxsize=16)(_fit_synthetic_persona)
+
+@register('persona')
+class PersonaStrategy(DelayStrategy):
+    """Releases keys in the rhythm of a fitted persona rather than the user's.
+
+    Each released interval is drawn from the persona's mean and spread for
+    that bigram, fitted from a trace file, or from a synthetic typist at
+    wpm when no trace is given. A key never leaves before it is typed nor
+    more than max_delay after, so the persona yields to a user typing much
+    faster or slower than it.
+    """
+
+    def __init__(self, trace: Optional[str] = None, wpm: float = 60.0, seed: Optional[int] = 0,
+                 max_delay: float = 0.5, min_gap: float = 0.005, max_gap: float = 2.0, min_count: int = 3):
+        if max_delay <= 0:
+            raise ValueError("max_delay must be positive")
+        if trace is not None:
+            import numpy as np
+            from simulation import read_trace
+            records = list(read_trace(trace))
+            keys = np.array([key_code(key) for _, _, key in records], dtype=np.int64)
+            down = np.array([at for at, _, _ in records])
+            self.means, self.half_widths = _fit_persona(keys, down, max_gap, min_count)
+        elif seed is None:
+            self.means, self.half_widths = _fit_synthetic_persona(wpm, seed, max_gap, min_count)
+        else:
+            # Shared between instances, which only read them
+            self.means, self.half_widths = _synthetic_persona(wpm, seed, max_gap, min_count)
+        self.max_delay = max_delay
+        self.min_gap = min_gap
+        self._last = float('-inf')
+
+    def _release(self, last, interval, now):
+        release = last + max(interval, self.min_gap)
+        if release < now:
+            return now
+        return min(release, now + self.max_delay)
+
+    def next_delay(self, prev, cur, now, rng):
+        cell = key_code(prev) * CODES + key_code(cur)
+        half = self.half_widths[cell]
+        self._last = self._release(self._last, self.means[cell] + rng.uniform(-half, half), now)
+        return self._last - now
+
+    def sample_batch(self, keys, down, rng):
+        import numpy as np
+        cells = bigram_cells(keys)
+        half = np.asarray(self.half_widths)[cells]
+        intervals = (np.asarray(self.means)[cells] + half * rng.uniform(-1.0, 1.0, len(cells))).tolist()
+        # Each release builds on the previous one, so this stays a loop over precomputed draws
+        release, last = [], float('-inf')
+        for interval, now in zip(intervals, down.tolist()):
+            last = self._release(last, interval, now)
+            release.append(last)
+        return np.array(release) - down
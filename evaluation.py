@@ -0,0 +1,270 @@
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from delay_strategies import STRATEGIES
+from scrambler_config import ScramblerConfig
+from synthetic_typist import SyntheticTypist
+
+# The engine scales a delay drawn around this reference by base_delay / REFERENCE_DELAY
+REFERENCE_DELAY = 0.1
+DELAY_KINDS = ('uniform', 'lognormal', 'gamma', 'ex-gaussian')
+
+@dataclass(frozen=True)
+class DelaySetting:
+    """One scrambler parameter set: mean delay and its standard deviation, in seconds."""
+    kind: str
+    base_delay: float
+    variability: float
+
+    def settings(self) -> Dict[str, object]:
+        """Settings-file entries that make the engine draw delays like this setting."""
+        sd = self.variability * REFERENCE_DELAY / self.base_delay
+        if self.kind == 'uniform':
+            return {'mode': 'fixed', 'base_delay': self.base_delay,
+                    'variation': min(sd * math.sqrt(3), REFERENCE_DELAY), 'distribution': None}
+        if self.kind == 'lognormal':
+            sigma = math.sqrt(math.log1p((sd / REFERENCE_DELAY) ** 2))
+            distribution = {'type': 'lognormal', 'median': REFERENCE_DELAY * math.exp(-sigma * sigma / 2), 'sigma': sigma}
+        elif self.kind == 'gamma':
+            distribution = {'type': 'gamma', 'shape': (REFERENCE_DELAY / sd) ** 2, 'scale': sd * sd / REFERENCE_DELAY}
+        elif self.kind == 'ex-gaussian':
+            tau = 0.8 * sd
+            distribution = {'type': 'ex-gaussian', 'mu': REFERENCE_DELAY - tau, 'sigma': 0.6 * sd, 'tau': tau}
+        else:
+            raise ValueError(f"unknown delay kind {self.kind!r}")
+        return {'mode': 'fixed', 'base_delay': self.base_delay, 'distribution': distribution}
+
+    def config(self) -> ScramblerConfig:
+        """The ScramblerConfig for this setting."""
+        return ScramblerConfig.from_dict(self.settings())
+
+    def label(self) -> str:
+        return f"{self.kind} {self.base_delay * 1000:.0f}±{self.variability * 1000:.0f} ms"
+
+    def compile(self) -> Callable[[np.ndarray, np.ndarray, np.random.Generator], np.ndarray]:
+        """Function from one typist's keys and capture times to their release times."""
+        config = self.config()
+        return lambda tokens, down, rng: scramble(down, sample_delays(config, len(down), rng))
+
+@dataclass(frozen=True)
+class GridSetting:
+    """The grid mode: keys leave on ticks every interval seconds, batch per tick."""
+    interval: float
+    batch: int = 1
+
+    def settings(self) -> Dict[str, object]:
+        return {'mode': 'grid', 'grid_interval': self.interval, 'grid_batch': self.batch}
+
+    def config(self) -> ScramblerConfig:
+        return ScramblerConfig.from_dict(self.settings())
+
+    def label(self) -> str:
+        return f"grid {self.interval * 1000:.0f} ms x{self.batch}"
+
+    def compile(self) -> Callable[[np.ndarray, np.ndarray, np.random.Generator], np.ndarray]:
+        return lambda tokens, down, rng: grid_release(down, self.interval, self.batch)
+
+@dataclass(frozen=True)
+class StrategySetting:
+    """A registered DelayStrategy with constructor parameters as (name, value) pairs."""
+    name: str
+    params: Tuple[Tuple[str, object], ...] = ()
+
+    def settings(self) -> Dict[str, object]:
+        return {'mode': 'strategy', 'strategy': {'type': self.name, **dict(self.params)}}
+
+    def config(self) -> ScramblerConfig:
+        return ScramblerConfig.from_dict(self.settings())
+
+    def label(self) -> str:
+        params = ', '.join(f"{key}={value}" for key, value in self.params)
+        return f"strategy {self.name}" + (f" ({params})" if params else "")
+
+    def compile(self) -> Callable[[np.ndarray, np.ndarray, np.random.Generator], np.ndarray]:
+        strategy = self.config().strategy
+        return lambda tokens, down, rng: scramble(down, strategy.sample_batch(tokens, down, rng))
+
+def strategy_settings() -> List[StrategySetting]:
+    """Every registered strategy with its default parameters."""
+    return [StrategySetting(name) for name in sorted(STRATEGIES)]
+
+Setting = Union[DelaySetting, GridSetting, StrategySetting]
+
+def sample_delays(config: ScramblerConfig, n: int, rng: np.random.Generator) -> np.ndarray:
+    """n delays drawn the way KeystrokeScrambler.get_delay draws them, vectorized."""
+    if config.distribution is None:
+        delays = REFERENCE_DELAY + rng.uniform(-config.variation, config.variation, n)
+    else:
+        table = np.asarray(config.distribution.table)
+        delays = np.interp(rng.random(n) * (len(table) - 1), np.arange(len(table)), table)
+    return delays * (config.base_delay / REFERENCE_DELAY)
+
+def scramble(down: np.ndarray, delays: np.ndarray) -> np.ndarray:
+    """Release times the engine produces: delayed, but never before an earlier key."""
+    return np.maximum.accumulate(down + delays)
+
+def grid_release(down: np.ndarray, interval: float, batch: int = 1) -> np.ndarray:
+    """Release times in grid mode: the first tick after capture with room left, in FIFO order."""
+    ticks = (np.floor(down / interval) + 1).astype(np.int64).tolist()
+    released = np.empty(len(ticks), dtype=np.int64)
+    tick, used = -1, 0
+    for i, eligible in enumerate(ticks):
+        if eligible > tick:
+            tick, used = eligible, 0
+        elif used == batch:
+            tick, used = tick + 1, 0
+        released[i] = tick
+        used += 1
+    return released * interval
+
+@dataclass
+class Corpus:
+    """Keystrokes of several typists, concatenated; user i owns keys[offsets[i]:offsets[i+1]]."""
+    tokens: np.ndarray
+    down: np.ndarray
+    offsets: np.ndarray
+
+    @property
+    def users(self) -> int:
+        return len(self.offsets) - 1
+
+    def user(self, i: int):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.tokens[start:end], self.down[start:end]
+
+def synthetic_corpus(users: int = 24, keys_per_user: int = 6000, idiosyncrasy: float = 0.15,
+                     seed: Optional[int] = 0) -> Corpus:
+    """Typists with different speeds, burstiness and personal bigram rhythms."""
+    rng = np.random.default_rng(seed)
+    tokens, down = [], []
+    for _ in range(users):
+        typist = SyntheticTypist(
+            wpm=rng.uniform(40, 100),
+            burstiness=rng.uniform(0.0, 0.4),
+            error_rate=rng.uniform(0.0, 0.05),
+            idiosyncrasy=idiosyncrasy,
+            seed=int(rng.integers(2 ** 32)),
+        )
+        stream = typist.generate(keys_per_user)
+        tokens.append(stream.keys.astype(np.int64))
+        down.append(stream.down)
+    offsets = np.cumsum([0] + [len(t) for t in tokens])
+    return Corpus(np.concatenate(tokens), np.concatenate(down), offsets)
+
+def corpus_from_streams(streams: Sequence) -> Corpus:
+    """Corpus of (tokens, down times) pairs, one per typist."""
+    offsets = np.cumsum([0] + [len(tokens) for tokens, _ in streams])
+    return Corpus(np.concatenate([np.asarray(t, dtype=np.int64) for t, _ in streams]),
+                  np.concatenate([np.asarray(d, dtype=np.float64) for _, d in streams]), offsets)
+
+class TimingFeatures:
+    """Per-window timing features an observer of key release times could compute.
+
+    Each window of keys becomes the mean log interval of the corpus's most
+    common bigrams plus quantiles of all its intervals.
+    """
+
+    QUANTILES = (10, 25, 50, 75, 90)
+
+    def __init__(self, corpus: Corpus, bigrams: int = 40, window: int = 300, max_gap: float = 2.0):
+        self.window = window
+        self.max_gap = max_gap
+        ids = self._bigram_ids(corpus.tokens)
+        unique, counts = np.unique(ids, return_counts=True)
+        # Sorted, so extract() can look bigrams up with searchsorted
+        self.bigrams = np.sort(unique[np.argsort(-counts)[:bigrams]])
+
+    @staticmethod
+    def _bigram_ids(tokens: np.ndarray) -> np.ndarray:
+        return (tokens[:-1] << 32) | tokens[1:]
+
+    def extract(self, tokens: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """Feature matrix with one row per complete window."""
+        windows = (len(tokens) - 1) // self.window
+        if windows == 0:
+            return np.zeros((0, len(self.bigrams) + len(self.QUANTILES)))
+        n = windows * self.window
+        intervals = np.diff(times[:n + 1])
+        valid = (intervals > 0) & (intervals <= self.max_gap)
+        log_iki = np.log(np.where(valid, intervals, 1.0))
+
+        # Mean log interval per (window, bigram); a bigram missing from a window
+        # gets the window's mean over all intervals
+        ids = self._bigram_ids(tokens[:n + 1])
+        slot = np.searchsorted(self.bigrams, ids)
+        slot = np.minimum(slot, len(self.bigrams) - 1)
+        known = valid & (self.bigrams[slot] == ids)
+        cell = (np.arange(n) // self.window) * len(self.bigrams) + slot
+        size = windows * len(self.bigrams)
+        sums = np.bincount(cell[known], log_iki[known], size).reshape(windows, -1)
+        counts = np.bincount(cell[known], minlength=size).reshape(windows, -1)
+        window_valid = valid.reshape(windows, self.window)
+        overall = (log_iki.reshape(windows, self.window) * window_valid).sum(axis=1) / np.maximum(window_valid.sum(axis=1), 1)
+        means = np.where(counts > 0, sums / np.maximum(counts, 1), overall[:, None])
+
+        clipped = np.where(valid, intervals, np.nan).reshape(windows, self.window)
+        quantiles = np.nan_to_num(np.log(np.nanpercentile(clipped, self.QUANTILES, axis=1).T))
+        return np.hstack([means, quantiles])
+
+def reidentification_accuracy(corpus: Corpus, release_times: np.ndarray, features: TimingFeatures,
+                              user: Optional[int] = None) -> float:
+    """Nearest-centroid accuracy matching later windows of each user to their earlier ones.
+
+    The observer is assumed to know the scrambler, so both the enrolment
+    and the test windows are scrambled. With user given, only that user's
+    test windows are scored.
+    """
+    enrol_rows, enrol_users, test_rows, test_users = [], [], [], []
+    for i in range(corpus.users):
+        start, end = corpus.offsets[i], corpus.offsets[i + 1]
+        rows = features.extract(corpus.tokens[start:end], release_times[start:end])
+        half = len(rows) // 2
+        if half == 0:
+            continue
+        enrol_rows.append(rows[:half])
+        enrol_users.append(np.full(half, i))
+        test_rows.append(rows[half:])
+        test_users.append(np.full(len(rows) - half, i))
+    if not enrol_rows:
+        raise ValueError("corpus too small for the feature window")
+    enrol, test = np.vstack(enrol_rows), np.vstack(test_rows)
+    enrol_users, test_users = np.concatenate(enrol_users), np.concatenate(test_users)
+    mean, sd = enrol.mean(axis=0), enrol.std(axis=0) + 1e-9
+    enrol, test = (enrol - mean) / sd, (test - mean) / sd
+    users = np.unique(enrol_users)
+    centroids = np.stack([enrol[enrol_users == u].mean(axis=0) for u in users])
+    if user is not None:
+        test, test_users = test[test_users == user], test_users[test_users == user]
+        if not len(test):
+            raise ValueError(f"user {user} has too few keys for the feature window")
+    distances = ((test[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+    return float((users[distances.argmin(axis=1)] == test_users).mean())
+
+def evaluate(corpus: Corpus, setting: Optional[Setting], features: Optional[TimingFeatures] = None,
+             seed: Optional[int] = 0, user: Optional[int] = None) -> Dict[str, float]:
+    """Re-identification accuracy and added latency of one setting (None: no scrambling)."""
+    features = features if features is not None else TimingFeatures(corpus)
+    if setting is None:
+        release = corpus.down
+    else:
+        rng = np.random.default_rng(seed)
+        release = np.empty_like(corpus.down)
+        model = setting.compile()
+        for i in range(corpus.users):
+            start, end = corpus.offsets[i], corpus.offsets[i + 1]
+            release[start:end] = model(corpus.tokens[start:end], corpus.down[start:end], rng)
+    added = (release - corpus.down) * 1000
+    return {
+        'accuracy': reidentification_accuracy(corpus, release, features, user),
+        'mean_ms': float(added.mean()),
+        'p99_ms': float(np.percentile(added, 99)),
+    }
+
+def pareto_front(points: List[Dict[str, float]], x: str = 'mean_ms', y: str = 'accuracy') -> List[Dict[str, float]]:
+    """Points that no other point beats on both x and y (lower is better), sorted by x."""
+    front = []
+    for point in sorted(points, key=lambda p: (p[x], p[y])):
+        if not front or point[y] < front[-1][y]:
+            front.append(point)
+    return front
@@ -0,0 +1,183 @@
+import bisect
+import logging
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Sequence
+
+PREFIX = 'keystroke_scrambler'
+
+# Histogram bucket bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0, 2.5)
+LATENESS_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+# stats() counters exported as <PREFIX>_<name>_total
+COUNTERS = (
+    ('captured', 'keys_captured', "Keys captured for delayed release."),
+    ('released', 'keys_released', "Keys posted after their delay."),
+    ('passed_through', 'keys_passed_through', "Keys left to reach the system undelayed."),
+    ('retracted', 'keys_retracted', "Buffered keys removed by a backspace, neither ever posted."),
+    ('dropped', 'keys_dropped', "Released keys that failed to post."),
+    ('errors', 'degradations', "Keys passed through undelayed because handling them failed."),
+    ('bucket_overflows', 'bucket_overflows', "Bucket-mode keys degraded to the plain delay because the queue was full."),
+)
+
+class Histogram:
+    """Cumulative Prometheus-style histogram with fixed bucket bounds."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, name: str, help_text: str) -> List[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum!r}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+class MetricsCollector:
+    """Engine counters and release histograms in the Prometheus text format.
+
+    Counters come from stats(), which only reads attributes. Histograms are
+    folded from the engine's PerfSampler ring, which readers copy without
+    locking, so neither scraping nor folding ever takes the engine's lock.
+    Fold often enough that the ring does not wrap in between; samples lost
+    to wrapping are counted.
+    """
+
+    def __init__(self, scrambler):
+        self.scrambler = scrambler
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.lateness = Histogram(LATENESS_BUCKETS)
+        self.missed = 0
+        self._next = scrambler.samples.written
+        # Serializes folds from the poll thread and concurrent scrapes
+        self._lock = threading.Lock()
+
+    def fold(self):
+        """Add samples released since the last fold to the histograms."""
+        with self._lock:
+            samples, self._next, missed = self.scrambler.samples.read(self._next)
+            self.missed += missed
+            for captured_at, release_at, released_at, _ in samples:
+                self.latency.observe(max(released_at - captured_at, 0.0))
+                self.lateness.observe(max(released_at - release_at, 0.0))
+
+    def render(self) -> str:
+        """Current metrics as a Prometheus text exposition."""
+        self.fold()
+        stats = self.scrambler.stats()
+        lines = []
+        for key, name, help_text in COUNTERS:
+            lines += [f"# HELP {PREFIX}_{name}_total {help_text}", f"# TYPE {PREFIX}_{name}_total counter",
+                      f"{PREFIX}_{name}_total {stats[key]}"]
+        for name, value, help_text in (
+            ('enabled', int(stats['enabled']), "1 while scrambling is on."),
+            ('pending_keys', stats['pending'], "Keys waiting for release."),
+            ('base_delay_seconds', stats['base_delay'], "Configured base delay."),
+            ('bucket_delay_seconds', stats['bucket_delay_ms'] / 1000,
+             "Time the token bucket held the most recent bucket-mode key."),
+        ):
+            lines += [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} gauge", f"{PREFIX}_{name} {value}"]
+        with self._lock:
+            lines += self.latency.render(f"{PREFIX}_added_latency_seconds", "Time from capture to release per key.")
+            lines += self.lateness.render(f"{PREFIX}_release_lateness_seconds", "Time a release ran after it was due.")
+            lines += [f"# HELP {PREFIX}_samples_missed_total Releases not folded into the histograms.",
+                      f"# TYPE {PREFIX}_samples_missed_total counter", f"{PREFIX}_samples_missed_total {self.missed}"]
+        return "\n".join(lines) + "\n"
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+class MetricsExporter:
+    """Serves MetricsCollector output over HTTP on a localhost port and/or a Unix socket."""
+
+    def __init__(self, scrambler, port: Optional[int] = None, socket_path: Optional[str] = None,
+                 poll_interval: float = 1.0):
+        if port is None and socket_path is None:
+            raise ValueError("give a port, a socket path or both")
+        self.collector = MetricsCollector(scrambler)
+        self.port = port
+        self.socket_path = socket_path
+        self.poll_interval = poll_interval
+        self.servers = []
+        self._stopped = threading.Event()
+
+    def _handler(self):
+        collector = self.collector
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = collector.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def address_string(self):
+                # Unix socket peers have no address
+                return str(self.client_address[0]) if self.client_address else 'unix'
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Start serving and folding on background threads."""
+        handler = self._handler()
+        if self.port is not None:
+            server = ThreadingHTTPServer(('127.0.0.1', self.port), handler)
+            server.daemon_threads = True
+            self.servers.append(server)
+            logging.info(f"Serving metrics on http://127.0.0.1:{server.server_address[1]}/metrics")
+        if self.socket_path is not None:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            previous_umask = os.umask(0o177)
+            try:
+                self.servers.append(_UnixHTTPServer(self.socket_path, handler))
+            finally:
+                os.umask(previous_umask)
+            logging.info(f"Serving metrics on {self.socket_path}")
+        for server in self.servers:
+            threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+        threading.Thread(target=self._poll, name="MetricsFold", daemon=True).start()
+
+    def _poll(self):
+        # Folds between scrapes so the sample ring cannot wrap past unread releases
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                self.collector.fold()
+            except Exception as e:
+                logging.error(f"Error folding release samples: {e}")
+
+    def stop(self):
+        """Stop serving and remove the socket."""
+        self._stopped.set()
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+        if self.socket_path is not None:
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,68 @@
+import heapq
+import itertools
+import threading
+import time
+
+class ReleaseDispatcher:
+    """Runs timed callbacks on a dedicated thread.
+
+    Key releases scheduled here fire on time regardless of what the GUI's
+    main loop is doing (redraws, animations, slider drags, modal dialogs).
+    """
+
+    def __init__(self, name: str = "ReleaseDispatcher"):
+        self.name = name
+        self._timers = []
+        self._order = itertools.count()
+        self._wakeup = threading.Condition(threading.Lock())
+        self._thread = None
+        self._stopped = False
+        # Difference between actual and intended fire time of the last callback
+        self.last_lateness = 0.0
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def call_later(self, delay: float, callback):
+        """Run callback on the dispatcher thread after delay seconds."""
+        when = time.monotonic() + delay
+        with self._wakeup:
+            if self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            heapq.heappush(self._timers, (when, next(self._order), callback))
+            # Only an earlier deadline changes how long the thread should sleep
+            if self._timers[0][0] == when:
+                self._wakeup.notify()
+
+    def stop(self):
+        """Stop the thread, dropping timers that have not fired."""
+        with self._wakeup:
+            self._stopped = True
+            self._timers.clear()
+            self._wakeup.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        timers = self._timers
+        while True:
+            with self._wakeup:
+                while not self._stopped:
+                    if timers:
+                        remaining = timers[0][0] - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._wakeup.wait(remaining)
+                    else:
+                        self._wakeup.wait()
+                if self._stopped:
+                    return
+                when, _, callback = heapq.heappop(timers)
+            self.last_lateness = time.monotonic() - when
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in release callback: {e}")
@@ -0,0 +1,182 @@
+import argparse
+import glob
+import sys
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from session_recorder import KEY_CLASS_NAMES, open_session
+
+# Bigram tokens: the code point when it was recorded, else one past the
+# Unicode range plus the key class.
+CLASS_TOKEN_BASE = 0x110000
+
+@dataclass
+class Histogram:
+    """Fixed-bin histogram that can be filled chunk by chunk."""
+    upper: float
+    bins: int
+    counts: np.ndarray = field(init=False)
+    overflow: int = 0
+
+    def __post_init__(self):
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+
+    @property
+    def width(self) -> float:
+        return self.upper / self.bins
+
+    def add(self, values: np.ndarray):
+        index = (np.clip(values, 0, None) / self.width).astype(np.int64)
+        inside = index < self.bins
+        self.overflow += int(len(index) - inside.sum())
+        self.counts += np.bincount(index[inside], minlength=self.bins)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum()) + self.overflow
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bin holding the q-th percentile (inf if in the overflow)."""
+        total = self.total
+        if not total:
+            return 0.0
+        rank = int(np.ceil(total * q / 100))
+        index = int(np.searchsorted(np.cumsum(self.counts), max(rank, 1)))
+        return (index + 1) * self.width if index < self.bins else float('inf')
+
+@dataclass
+class BigramStats:
+    """Running count, sum and sum of squares of original and scrambled intervals per bigram."""
+    ids: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    moments: np.ndarray = field(default_factory=lambda: np.zeros((0, 5)))
+
+    def add(self, ids: np.ndarray, original: np.ndarray, scrambled: np.ndarray):
+        unique, inverse = np.unique(ids, return_inverse=True)
+        chunk = np.stack([
+            np.bincount(inverse, minlength=len(unique)).astype(float),
+            np.bincount(inverse, original, len(unique)),
+            np.bincount(inverse, original * original, len(unique)),
+            np.bincount(inverse, scrambled, len(unique)),
+            np.bincount(inverse, scrambled * scrambled, len(unique)),
+        ], axis=1)
+        merged = np.union1d(self.ids, unique)
+        moments = np.zeros((len(merged), 5))
+        moments[np.searchsorted(merged, self.ids)] += self.moments
+        moments[np.searchsorted(merged, unique)] += chunk
+        self.ids, self.moments = merged, moments
+
+    def summary(self, min_count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """ids, counts, original and scrambled means and standard deviations of bigrams seen min_count times."""
+        keep = self.moments[:, 0] >= min_count
+        n, s_orig, ss_orig, s_scr, ss_scr = self.moments[keep].T
+        mean_orig, mean_scr = s_orig / n, s_scr / n
+        std_orig = np.sqrt(np.maximum(ss_orig / n - mean_orig ** 2, 0))
+        std_scr = np.sqrt(np.maximum(ss_scr / n - mean_scr ** 2, 0))
+        return self.ids[keep], n, mean_orig, mean_scr, std_orig, std_scr
+
+class SessionAnalysis:
+    """Accumulates statistics over any number of recordings, one chunk at a time."""
+
+    def __init__(self, max_gap: float = 2.0):
+        self.max_gap = max_gap
+        self.keys = 0
+        self.added_ms = Histogram(2000.0, 20_000)
+        self.lateness_ms = Histogram(100.0, 10_000)
+        self.original_iki_ms = Histogram(max_gap * 1000, 400)
+        self.scrambled_iki_ms = Histogram(max_gap * 1000, 400)
+        self.bigrams = BigramStats()
+
+    def add_session(self, records: np.ndarray, chunk: int = 1 << 20):
+        """Add one recording; chunks overlap by one key so no interval is lost."""
+        for start in range(0, len(records), chunk):
+            self._add_chunk(records[max(start - 1, 0):start + chunk], first=start == 0)
+
+    def _add_chunk(self, records: np.ndarray, first: bool):
+        captured = records['captured_at']
+        released = records['released_at']
+        fresh = records if first else records[1:]
+        self.keys += len(fresh)
+        added = fresh['released_at'] - fresh['captured_at']
+        self.added_ms.add(added * 1000)
+        self.lateness_ms.add((added - fresh['intended_delay']) * 1000)
+
+        if len(records) < 2:
+            return
+        original = np.diff(captured)
+        scrambled = np.diff(released)
+        # Pauses and disabled stretches are not typing rhythm
+        typing = (original > 0) & (original <= self.max_gap)
+        self.original_iki_ms.add(original[typing] * 1000)
+        self.scrambled_iki_ms.add(scrambled[typing] * 1000)
+
+        tokens = np.where(records['key'] > 0, records['key'].astype(np.int64),
+                          CLASS_TOKEN_BASE + records['key_class'].astype(np.int64))
+        ids = (tokens[:-1] << 32) | tokens[1:]
+        self.bigrams.add(ids[typing], original[typing], scrambled[typing])
+
+def expand_paths(patterns: Iterable[str]) -> Iterator[str]:
+    for pattern in patterns:
+        yield from sorted(glob.glob(pattern)) or [pattern]
+
+def _token_name(token: int) -> str:
+    if token >= CLASS_TOKEN_BASE:
+        return f"<{KEY_CLASS_NAMES.get(token - CLASS_TOKEN_BASE, '?')}>"
+    return repr(chr(token))[1:-1]
+
+def report(analysis: SessionAnalysis, top: int = 15, min_count: int = 20) -> List[str]:
+    """Human-readable summary lines."""
+    lines = [f"{analysis.keys} keys"]
+    if not analysis.keys:
+        return lines
+    percentiles = (50, 90, 99, 99.9)
+    lines.append("added latency (ms):    " + "  ".join(f"p{q:g} {analysis.added_ms.percentile(q):7.1f}" for q in percentiles))
+    lines.append("scheduler late (ms):   " + "  ".join(f"p{q:g} {analysis.lateness_ms.percentile(q):7.2f}" for q in percentiles))
+
+    lines.append("")
+    lines.append("inter-key interval (ms)   original  scrambled")
+    for q in (10, 25, 50, 75, 90, 99):
+        lines.append(f"  p{q:<22g} {analysis.original_iki_ms.percentile(q):9.0f} {analysis.scrambled_iki_ms.percentile(q):10.0f}")
+
+    ids, counts, mean_orig, mean_scr, std_orig, std_scr = analysis.bigrams.summary(min_count)
+    if len(ids):
+        # Spread of per-bigram means is the timing signature scrambling should hide
+        weights = counts / counts.sum()
+        spread_orig = np.sum(weights * (mean_orig - np.sum(weights * mean_orig)) ** 2)
+        spread_scr = np.sum(weights * (mean_scr - np.sum(weights * mean_scr)) ** 2)
+        reduction = 1 - spread_scr / spread_orig if spread_orig else 0.0
+        lines.append("")
+        lines.append(f"bigram mean spread: original {np.sqrt(spread_orig) * 1000:.1f} ms, "
+                     f"scrambled {np.sqrt(spread_scr) * 1000:.1f} ms, variance reduction {reduction:.1%}")
+        lines.append(f"  {'bigram':<16} {'count':>8} {'orig mean':>10} {'scr mean':>10} {'orig sd':>8} {'scr sd':>8} {'reduction':>10}")
+        grand_orig = np.sum(weights * mean_orig)
+        grand_scr = np.sum(weights * mean_scr)
+        for i in np.argsort(-counts)[:top]:
+            token_a, token_b = int(ids[i]) >> 32, int(ids[i]) & 0xFFFFFFFF
+            deviation_orig = (mean_orig[i] - grand_orig) ** 2
+            deviation_scr = (mean_scr[i] - grand_scr) ** 2
+            bigram_reduction = 1 - deviation_scr / deviation_orig if deviation_orig else 0.0
+            lines.append(f"  {_token_name(token_a) + _token_name(token_b):<16} {int(counts[i]):>8} "
+                         f"{mean_orig[i] * 1000:>10.1f} {mean_scr[i] * 1000:>10.1f} "
+                         f"{std_orig[i] * 1000:>8.1f} {std_scr[i] * 1000:>8.1f} {bigram_reduction:>10.1%}")
+    return lines
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Summarize session recordings: added latency, intervals, bigram timing and lateness."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('paths', nargs='+', help="recordings or glob patterns")
+    parser.add_argument('--chunk', type=int, default=1 << 20, help="records processed per step")
+    parser.add_argument('--max-gap', type=float, default=2.0, help="longer intervals (s) count as pauses, not typing")
+    parser.add_argument('--top', type=int, default=15, help="bigrams to list")
+    parser.add_argument('--min-count', type=int, default=20, help="ignore rarer bigrams")
+    args = parser.parse_args(argv)
+
+    analysis = SessionAnalysis(args.max_gap)
+    for path in expand_paths(args.paths):
+        try:
+            analysis.add_session(open_session(path), args.chunk)
+        except Exception as e:
+            print(f"Error reading {path}: {e}", file=sys.stderr)
+    print("\n".join(report(analysis, args.top, args.min_count)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import os
+import struct
+import threading
+import unicodedata
+from collections import deque
+from typing import Optional
+
+# File layout: one header, then fixed-width little-endian records.
+HEADER = struct.Struct('<8sHH20x')
+MAGIC = b'KSREC\x00\x00\x01'
+VERSION = 1
+# seq, captured at, released at, intended delay, key, key class
+RECORD = struct.Struct('<QddfIB3x')
+
+# Key classes stored instead of characters unless recording them is opted into
+KEY_OTHER = 0
+KEY_LETTER = 1
+KEY_DIGIT = 2
+KEY_SPACE = 3
+KEY_PUNCTUATION = 4
+KEY_RETURN = 5
+KEY_BACKSPACE = 6
+KEY_TAB = 7
+
+KEY_CLASS_NAMES = {
+    KEY_OTHER: 'other',
+    KEY_LETTER: 'letter',
+    KEY_DIGIT: 'digit',
+    KEY_SPACE: 'space',
+    KEY_PUNCTUATION: 'punctuation',
+    KEY_RETURN: 'return',
+    KEY_BACKSPACE: 'backspace',
+    KEY_TAB: 'tab',
+}
+
+_SPECIAL_KEYS = {' ': KEY_SPACE, '\r': KEY_RETURN, '\n': KEY_RETURN, '\x7f': KEY_BACKSPACE, '\b': KEY_BACKSPACE, '\t': KEY_TAB}
+
+def key_class(key: str) -> int:
+    """Coarse class of a key that does not reveal which character it was."""
+    special = _SPECIAL_KEYS.get(key)
+    if special is not None:
+        return special
+    if len(key) != 1:
+        return KEY_OTHER
+    if key.isalpha():
+        return KEY_LETTER
+    if key.isdigit():
+        return KEY_DIGIT
+    if unicodedata.category(key).startswith(('P', 'S')):
+        return KEY_PUNCTUATION
+    return KEY_OTHER
+
+def record_dtype():
+    """NumPy dtype matching RECORD, for reading files with numpy.memmap."""
+    import numpy as np
+    return np.dtype({
+        'names': ['seq', 'captured_at', 'released_at', 'intended_delay', 'key', 'key_class'],
+        'formats': ['<u8', '<f8', '<f8', '<f4', '<u4', 'u1'],
+        'offsets': [0, 8, 16, 24, 28, 32],
+        'itemsize': RECORD.size,
+    })
+
+def open_session(path: str):
+    """Map a recording as a read-only structured array; a torn last record is ignored."""
+    import numpy as np
+    with open(path, 'rb') as f:
+        magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} session recording")
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+    if count == 0:
+        return np.zeros(0, dtype=record_dtype())
+    return np.memmap(path, dtype=record_dtype(), mode='r', offset=HEADER.size, shape=(count,))
+
+class SessionRecorder:
+    """Appends release timings to a binary file from a background thread.
+
+    `record` only queues a tuple, so the releasing thread never packs,
+    classifies or writes. Keys are stored as key classes; pass
+    characters=True to store the code points as well.
+    """
+
+    def __init__(self, path: str, characters: bool = False, flush_interval: float = 1.0):
+        self.path = path
+        self.characters = characters
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._queue = deque()
+        self._stop = threading.Event()
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self._file.flush()
+        else:
+            with open(path, 'rb') as f:
+                magic, _, record_size = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or record_size != RECORD.size:
+                self._file.close()
+                raise ValueError(f"{path} is not a version {VERSION} session recording")
+            # Drop a record torn by a crash so later records stay aligned
+            torn = (self._file.tell() - HEADER.size) % RECORD.size
+            if torn:
+                self._file.truncate(self._file.tell() - torn)
+                self._file.seek(0, os.SEEK_END)
+        self._thread = threading.Thread(target=self._run, name="SessionRecorder", daemon=True)
+        self._thread.start()
+
+    def record(self, seq: int, key: str, captured_at: float, release_at: float, released_at: float):
+        """Queue one released key; safe to call from the releasing thread."""
+        self._queue.append((seq, key, captured_at, release_at, released_at))
+
+    def close(self):
+        """Write everything queued so far and close the file."""
+        self._stop.set()
+        self._thread.join()
+        self._file.close()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._write_queued()
+        self._write_queued()
+
+    def _write_queued(self):
+        queue = self._queue
+        count = len(queue)
+        if not count:
+            return
+        buffer = bytearray(count * RECORD.size)
+        pack_into = RECORD.pack_into
+        characters = self.characters
+        for offset in range(0, len(buffer), RECORD.size):
+            seq, key, captured_at, release_at, released_at = queue.popleft()
+            code = ord(key) if characters and len(key) == 1 else 0
+            pack_into(buffer, offset, seq, captured_at, released_at, release_at - captured_at, code, key_class(key))
+        try:
+            self._file.write(buffer)
+            self._file.flush()
+            self.written += count
+        except OSError as e:
+            print(f"Error writing session recording: {e}")
+
+def main(argv: Optional[list] = None):
+    """Print a summary of a session recording."""
+    import argparse
+    import numpy as np
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('path', help="recording written by SessionRecorder")
+    args = parser.parse_args(argv)
+    records = open_session(args.path)
+    print(f"{len(records)} keys")
+    if len(records):
+        added = (records['released_at'] - records['captured_at']) * 1000
+        print(f"added latency p50 {np.percentile(added, 50):.1f} ms, p99 {np.percentile(added, 99):.1f} ms")
+        counts = np.bincount(records['key_class'], minlength=len(KEY_CLASS_NAMES))
+        for key_class_id, name in KEY_CLASS_NAMES.items():
+            if counts[key_class_id]:
+                print(f"  {name:<12} {counts[key_class_id]}")
+
+if __name__ == "__main__":
+    main()
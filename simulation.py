@@ -0,0 +1,158 @@
+import argparse
+import heapq
+import itertools
+import sys
+import threading
+from typing import Iterable, Iterator, List, Optional, Tuple
+from key_codes import EventTemplates, KeyCodeTable
+from keystroke_core import KeystrokeScrambler
+from random_streams import RandomStreams
+
+# A trace is one keystroke per line: "<down ts> <up ts> <code point>"
+TraceRecord = Tuple[float, float, str]
+
+class SimulatedKeyEvent:
+    """Key event exposing the subset of the NSEvent API the scrambler uses."""
+
+    __slots__ = ('_characters', '_timestamp')
+
+    def __init__(self, characters: str, timestamp: float):
+        self._characters = characters
+        self._timestamp = timestamp
+
+    def characters(self) -> str:
+        return self._characters
+
+    def timestamp(self) -> float:
+        return self._timestamp
+
+class SimulatedBackend:
+    """In-memory backend driven by a virtual clock.
+
+    Timers only fire when the clock is advanced, so runs are independent of
+    wall-clock time and, with a seeded RNG, reproducible.
+    """
+
+    def __init__(self, record: bool = True):
+        self.record = record
+        self.posted = 0
+        self.clock = 0.0
+        self.emitted: List[Tuple[float, str]] = []
+        self.passed_through: List[Tuple[float, str]] = []
+        # Everything the focused app would see, in arrival order
+        self.output: List[Tuple[float, str]] = []
+        # (key, key code, flags) of every posted key, as MacOSBackend would synthesize it
+        self.events: List[Tuple[str, int, int]] = []
+        # Event timestamp of every posted key; the word mode stamps keys before they are posted
+        self.timestamps: List[float] = []
+        self.templates = EventTemplates(KeyCodeTable.us_ansi(), lambda key, code, flags: (key, code, flags))
+        self._timers = []
+        self._order = itertools.count()
+        self._handler = None
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+
+    def now(self) -> float:
+        return self.clock
+
+    def call_later(self, delay: float, callback):
+        """Schedule a callback delay seconds of virtual time from now."""
+        heapq.heappush(self._timers, (self.clock + delay, next(self._order), callback))
+
+    def call_soon(self, callback):
+        """Run a callback now, serialized with other callers."""
+        with self._lock:
+            callback()
+
+    def run_forever(self):
+        """Block until stop_loop; virtual time only moves when fed."""
+        self._stopped.wait()
+
+    def stop_loop(self):
+        self._stopped.set()
+
+    def start_capture(self, handler):
+        self._handler = handler
+
+    def stop_capture(self):
+        self._handler = None
+
+    def is_synthetic(self, event) -> bool:
+        """Posted keys go to output, never back to the handler."""
+        return False
+
+    def post_key(self, key: str, at: Optional[float] = None):
+        self.posted += 1
+        if self.record:
+            self.emitted.append((self.clock, key))
+            self.output.append((self.clock, key))
+            self.events.append(self.templates.get(key))
+            self.timestamps.append(self.clock if at is None else at)
+
+    def advance_to(self, when: float):
+        """Run every timer due up to when, then move the clock there."""
+        timers = self._timers
+        while timers and timers[0][0] <= when:
+            due, _, callback = heapq.heappop(timers)
+            self.clock = max(self.clock, due)
+            callback()
+        self.clock = max(self.clock, when)
+
+    def run_until_idle(self):
+        """Run all pending timers."""
+        while self._timers:
+            self.advance_to(self._timers[0][0])
+
+    def feed(self, key: str, at: Optional[float] = None):
+        """Deliver a key down event at the given virtual time."""
+        if at is not None:
+            self.advance_to(at)
+        event = SimulatedKeyEvent(key, self.clock)
+        if (self._handler is None or self._handler(event) is not None) and self.record:
+            self.passed_through.append((self.clock, key))
+            self.output.append((self.clock, key))
+
+    def replay(self, trace: Iterable[TraceRecord]) -> List[Tuple[float, str]]:
+        """Feed a recorded trace and return the emitted (time, key) pairs."""
+        for down, _up, key in trace:
+            self.feed(key, down)
+        self.run_until_idle()
+        return self.emitted
+
+def read_trace(path: str) -> Iterator[TraceRecord]:
+    """Read keystrokes from a trace file."""
+    with open(path) as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            down, up, code = line.split()
+            yield float(down), float(up), chr(int(code))
+
+def write_trace(path: str, records: Iterable[TraceRecord]):
+    """Write keystrokes to a trace file."""
+    with open(path, 'w') as f:
+        for down, up, key in records:
+            f.write(f"{down!r} {up!r} {ord(key)}\n")
+
+def replay(trace: Iterable[TraceRecord], seed: Optional[int] = None,
+           base_delay: float = 0.1) -> List[Tuple[float, str]]:
+    """Run the scrambler over a trace on the simulated backend."""
+    backend = SimulatedBackend()
+    scrambler = KeystrokeScrambler(backend=backend, rng=RandomStreams(seed))
+    scrambler.base_delay = base_delay
+    scrambler.start()
+    return backend.replay(trace)
+
+def main(argv=None):
+    """Replay a trace deterministically and print the release timings."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('trace', help="trace file to replay")
+    parser.add_argument('--seed', type=int, default=None, help="RNG seed for a reproducible run")
+    parser.add_argument('--base-delay', type=float, default=100, help="base delay in ms")
+    args = parser.parse_args(argv)
+
+    for when, key in replay(read_trace(args.trace), args.seed, args.base_delay / 1000):
+        sys.stdout.write(f"{when!r} {ord(key)}\n")
+
+if __name__ == "__main__":
+    main()
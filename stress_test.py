@@ -0,0 +1,179 @@
+import argparse
+import bisect
+import functools
+import sys
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from delay_strategies import STRATEGIES, create_strategy
+from keystroke_core import BACKSPACE_KEYS, KeystrokeScrambler
+from random_streams import RandomStreams
+from scrambler_config import MODES
+from simulation import SimulatedBackend
+from synthetic_typist import SyntheticTypist
+
+# Each injected key is tagged by replacing it with a code point of its own, so
+# any key seen by the app identifies its capture slot. Letters get alphanumeric
+# code points and other keys get non-alphanumeric ones, so word boundaries fall
+# where they were typed. Backspaces must stay backspaces; each one seen is taken
+# to be the first backspace typed after the latest key the app had seen.
+
+@functools.lru_cache(maxsize=None)
+def _tag_codes() -> Tuple[List[int], List[int]]:
+    """Non-ASCII code points that are alphanumeric, and those that are not (surrogates aside)."""
+    letters, others = [], []
+    for code in range(0x80, 0x110000):
+        if 0xD800 <= code < 0xE000:
+            continue
+        (letters if chr(code).isalnum() else others).append(code)
+    return letters, others
+
+def max_keys() -> int:
+    return min(len(codes) for codes in _tag_codes())
+
+def tag(seq: int, key: str) -> str:
+    if key in BACKSPACE_KEYS:
+        return key
+    letters, others = _tag_codes()
+    return chr((letters if key.isalnum() else others)[seq])
+
+def untag(key: str) -> int:
+    """Capture slot of a tagged key; backspaces carry none."""
+    letters, others = _tag_codes()
+    codes = letters if key.isalnum() else others
+    return bisect.bisect_left(codes, ord(key))
+
+@dataclass
+class StressReport:
+    wpm: float
+    keys: int
+    toggles: int
+    lost: int
+    retracted: int
+    duplicated: int
+    reordered: int
+    latency_ms: dict
+
+    @property
+    def ok(self) -> bool:
+        return not (self.lost or self.duplicated or self.reordered)
+
+def run_stress(wpm: float, keys: int = 10_000, toggle_interval: Optional[float] = 5.0,
+               base_delay: float = 0.1, burstiness: float = 0.3, seed: Optional[int] = None,
+               mode: str = 'fixed', strategy: Optional[str] = None, error_rate: float = 0.05) -> StressReport:
+    """Drive tagged keys and random enable/disable toggles through the scrambler.
+
+    strategy names a registered DelayStrategy, used with its defaults; the
+    strategy mode needs one. error_rate of the keys are typos corrected
+    with a backspace, which word mode may retract along with the typo.
+    """
+    stream = SyntheticTypist(wpm, burstiness, error_rate, seed=seed).generate(keys)
+    if len(stream) > max_keys():
+        raise ValueError(f"at most {max_keys()} keys can be tagged")
+    down = stream.down.tolist()
+    typed = [chr(code) for code in stream.keys.tolist()]
+    backspaces = [seq for seq, key in enumerate(typed) if key in BACKSPACE_KEYS]
+    keys = len(down)
+    backend = SimulatedBackend()
+    scrambler = KeystrokeScrambler(backend=backend, rng=RandomStreams(seed))
+    changes = {'base_delay': base_delay, 'mode': mode}
+    if strategy is not None:
+        changes['strategy'] = create_strategy({'type': strategy})
+    scrambler.config_store.update(**changes)
+    scrambler.start()
+
+    rng = np.random.default_rng(seed)
+    if toggle_interval:
+        toggle_times = np.cumsum(rng.exponential(toggle_interval, int(down[-1] / toggle_interval * 2) + 1))
+        toggle_times = toggle_times[toggle_times < down[-1]].tolist()
+    else:
+        toggle_times = []
+
+    toggle = 0
+    for seq, at in enumerate(down):
+        while toggle < len(toggle_times) and toggle_times[toggle] <= at:
+            backend.advance_to(toggle_times[toggle])
+            if scrambler.enabled:
+                scrambler.stop()
+            else:
+                scrambler.start()
+            toggle += 1
+        backend.feed(tag(seq, typed[seq]), at)
+    backend.run_until_idle()
+
+    seen = np.zeros(keys, dtype=np.int64)
+    latency = np.zeros(keys)
+    reordered = 0
+    highest = -1
+    for when, key in backend.output:
+        if key in BACKSPACE_KEYS:
+            following = bisect.bisect_right(backspaces, highest)
+            if following == len(backspaces):
+                # More backspaces than were typed; count one against the last
+                following -= 1
+            seq = backspaces[following]
+        else:
+            seq = untag(key)
+        seen[seq] += 1
+        latency[seq] = when - down[seq]
+        if seq < highest:
+            reordered += 1
+        highest = max(highest, seq)
+
+    # A key never seen is lost unless a backspace never seen took it back
+    # with it; other keys in between would have been deleted instead
+    retracted = 0
+    unseen = []
+    for seq in range(keys):
+        previous = unseen[-1] if unseen else None
+        if seen[seq]:
+            unseen.append(None)
+        elif typed[seq] in BACKSPACE_KEYS and previous is not None and typed[previous] not in BACKSPACE_KEYS:
+            unseen.pop()
+            retracted += 1
+        else:
+            unseen.append(seq)
+
+    delivered = latency[seen > 0] * 1000
+    percentiles = dict(zip(('p50', 'p90', 'p99', 'max'), np.percentile(delivered, [50, 90, 99, 100]).tolist())) if len(delivered) else {}
+    return StressReport(
+        wpm=wpm,
+        keys=keys,
+        toggles=len(toggle_times),
+        lost=sum(seq is not None for seq in unseen),
+        retracted=retracted,
+        duplicated=int((seen > 1).sum()),
+        reordered=reordered,
+        latency_ms=percentiles,
+    )
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Check that every key is released exactly once and in order."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--wpm', type=float, nargs='+', default=[60, 120, 180, 240, 300], help="typing speeds to test")
+    parser.add_argument('--keys', type=int, default=10_000, help="keystrokes per speed")
+    parser.add_argument('--toggle-interval', type=float, default=5.0, help="mean seconds between enable/disable toggles (0 for none)")
+    parser.add_argument('--base-delay', type=float, default=100, help="base delay in ms")
+    parser.add_argument('--error-rate', type=float, default=0.05, help="share of keys mistyped and corrected with a backspace")
+    parser.add_argument('--seed', type=int, default=None, help="seed for a reproducible run")
+    parser.add_argument('--mode', choices=MODES, default='fixed', help="delay mode to exercise")
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), help="registered strategy for --mode strategy")
+    args = parser.parse_args(argv)
+    if args.mode == 'strategy' and args.strategy is None:
+        parser.error("--mode strategy needs --strategy")
+
+    print(f"{'WPM':>5} {'keys':>7} {'toggles':>7} {'lost':>5} {'retr':>5} {'dup':>5} {'reord':>5} "
+          f"{'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} {'max ms':>7}")
+    failed = False
+    for wpm in args.wpm:
+        report = run_stress(wpm, args.keys, args.toggle_interval, args.base_delay / 1000, seed=args.seed,
+                            mode=args.mode, strategy=args.strategy, error_rate=args.error_rate)
+        failed |= not report.ok
+        latency = report.latency_ms
+        print(f"{wpm:>5.0f} {report.keys:>7} {report.toggles:>7} {report.lost:>5} {report.retracted:>5} {report.duplicated:>5} "
+              f"{report.reordered:>5} {latency.get('p50', 0):>7.1f} {latency.get('p90', 0):>7.1f} "
+              f"{latency.get('p99', 0):>7.1f} {latency.get('max', 0):>7.1f}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import csv
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from delay_strategies import STRATEGIES
+from evaluation import (DELAY_KINDS, Corpus, DelaySetting, GridSetting, Setting, StrategySetting, TimingFeatures,
+                        evaluate, pareto_front, synthetic_corpus)
+
+# Set in each worker by _attach_corpus
+_worker_corpus: Optional[Corpus] = None
+_worker_features: Optional[TimingFeatures] = None
+_worker_memory: List[shared_memory.SharedMemory] = []
+
+class SharedCorpus:
+    """A Corpus whose arrays live in shared memory, so workers map rather than copy it."""
+
+    def __init__(self, corpus: Corpus):
+        self.blocks = []
+        self.specs = []
+        for array in (corpus.tokens, corpus.down, corpus.offsets):
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            self.blocks.append(block)
+            self.specs.append((block.name, array.shape, array.dtype.str))
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+def _attach_corpus(specs: List[Tuple[str, tuple, str]], bigrams: int, window: int):
+    global _worker_corpus, _worker_features
+    arrays = []
+    for name, shape, dtype in specs:
+        block = shared_memory.SharedMemory(name=name)
+        # Keep the mapping alive for the worker's lifetime
+        _worker_memory.append(block)
+        arrays.append(np.ndarray(shape, np.dtype(dtype), buffer=block.buf))
+    _worker_corpus = Corpus(*arrays)
+    _worker_features = TimingFeatures(_worker_corpus, bigrams, window)
+
+def _evaluate_setting(args: Tuple[Optional[Setting], int, Optional[int]]) -> Dict[str, object]:
+    setting, seed, user = args
+    result = evaluate(_worker_corpus, setting, _worker_features, seed, user)
+    result['setting'] = setting
+    return result
+
+class SweepPool:
+    """Worker processes that share one corpus and evaluate settings against it."""
+
+    def __init__(self, corpus: Corpus, workers: Optional[int] = None, bigrams: int = 40, window: int = 300):
+        self.shared = SharedCorpus(corpus)
+        try:
+            self.pool = ProcessPoolExecutor(workers, initializer=_attach_corpus,
+                                            initargs=(self.shared.specs, bigrams, window))
+        except Exception:
+            self.shared.close()
+            raise
+
+    def evaluate(self, settings: Sequence[Optional[Setting]], seed: int = 0,
+                 user: Optional[int] = None) -> List[Dict[str, object]]:
+        """Evaluate settings in parallel; None stands for no scrambling."""
+        return list(self.pool.map(_evaluate_setting, [(setting, seed, user) for setting in settings]))
+
+    def close(self):
+        self.pool.shutdown()
+        self.shared.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+def sweep(corpus: Corpus, settings: Sequence[Setting], workers: Optional[int] = None,
+          bigrams: int = 40, window: int = 300, seed: int = 0) -> List[Dict[str, object]]:
+    """Evaluate every setting, plus no scrambling as a baseline, across a process pool."""
+    with SweepPool(corpus, workers, bigrams, window) as pool:
+        return pool.evaluate([None] + list(settings), seed)
+
+def grid(kinds: Sequence[str], base_delays: Sequence[float], variabilities: Sequence[float]) -> List[DelaySetting]:
+    """Every combination whose spread is small enough for positive delays."""
+    return [DelaySetting(kind, base, variability)
+            for kind, base, variability in itertools.product(kinds, base_delays, variabilities)
+            if variability < base]
+
+def _label(setting: Optional[Setting]) -> str:
+    return setting.label() if setting is not None else "no scrambling"
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Sweep scrambler settings and print the privacy-vs-latency Pareto frontier."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--kinds', nargs='+', default=list(DELAY_KINDS), choices=DELAY_KINDS, help="delay distributions to try")
+    parser.add_argument('--base-delays', type=float, nargs='+', default=[25, 50, 75, 100, 150, 200, 300], help="mean delays in ms")
+    parser.add_argument('--variabilities', type=float, nargs='+', default=[10, 20, 40, 60, 100, 150], help="delay standard deviations in ms")
+    parser.add_argument('--grid-intervals', type=float, nargs='*', default=[10, 25, 50, 100], help="grid mode tick intervals in ms")
+    parser.add_argument('--grid-batches', type=int, nargs='+', default=[1, 2], help="grid mode keys released per tick")
+    parser.add_argument('--strategies', nargs='*', default=sorted(STRATEGIES), choices=sorted(STRATEGIES),
+                        help="registered delay strategies to try, with their defaults")
+    parser.add_argument('--users', type=int, default=24, help="synthetic typists in the corpus")
+    parser.add_argument('--keys', type=int, default=6000, help="keystrokes per typist")
+    parser.add_argument('--window', type=int, default=300, help="keystrokes per observation window")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the corpus and the delays")
+    parser.add_argument('--csv', help="also write every point to this CSV file")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    corpus = synthetic_corpus(args.users, args.keys, seed=args.seed)
+    settings = grid(args.kinds, [ms / 1000 for ms in args.base_delays], [ms / 1000 for ms in args.variabilities])
+    settings += [GridSetting(ms / 1000, batch) for ms in args.grid_intervals for batch in args.grid_batches]
+    settings += [StrategySetting(name) for name in args.strategies]
+    results = sweep(corpus, settings, args.workers, window=args.window, seed=args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Evaluated {len(results)} settings on {corpus.users} typists ({len(corpus.down)} keys) in {elapsed:.1f}s; "
+          f"chance accuracy is {1 / corpus.users:.1%}")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['setting', 'accuracy', 'mean_ms', 'p99_ms'])
+            for result in results:
+                writer.writerow([_label(result['setting']), f"{result['accuracy']:.4f}",
+                                 f"{result['mean_ms']:.2f}", f"{result['p99_ms']:.2f}"])
+
+    print(f"\n{'setting':<32} {'accuracy':>9} {'mean ms':>8} {'p99 ms':>8}")
+    for result in pareto_front(results):
+        print(f"{_label(result['setting']):<32} {result['accuracy']:>9.1%} {result['mean_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
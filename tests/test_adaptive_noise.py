@@ -0,0 +1,52 @@
+import math
+import random
+import pytest
+from adaptive_noise import AdaptiveNoise
+from bigram_cells import CODES, key_code
+
+AB = key_code('a') * CODES + key_code('b')
+BA = key_code('b') * CODES + key_code('a')
+
+def type_pairs(noise, rng, n, ab=(0.15, 0.02), ba=(0.25, 0.01), start=0.0):
+    """Alternate a and b, with normal intervals per bigram; returns the time of the last key."""
+    now = start
+    for i in range(n):
+        key, (mean, sd) = ('b', ab) if i % 2 else ('a', ba)
+        now += max(rng.gauss(mean, sd), 0.001)
+        noise.observe(key, now)
+    return now
+
+def test_means_and_spread_converge():
+    noise, rng = AdaptiveNoise(), random.Random(0)
+    now = type_pairs(noise, rng, 4000)
+    assert noise.means[AB] == pytest.approx(0.15, abs=0.01)
+    assert noise.means[BA] == pytest.approx(0.25, abs=0.01)
+    assert noise.global_mean == pytest.approx(0.2, abs=0.02)
+    # An EWMA variance is noisy; average it over the next stretch
+    estimates = []
+    for _ in range(200):
+        now = type_pairs(noise, rng, 2, start=now)
+        estimates.append(noise.variances[AB])
+    assert math.sqrt(sum(estimates) / len(estimates)) == pytest.approx(0.02, rel=0.3)
+
+def test_estimate_follows_a_change_of_rhythm():
+    noise, rng = AdaptiveNoise(alpha=0.05), random.Random(1)
+    now = type_pairs(noise, rng, 2000)
+    # About 150 updates of the cell leave (0.95)^150 of the old mean
+    type_pairs(noise, rng, 300, ab=(0.1, 0.01), start=now)
+    assert noise.means[AB] == pytest.approx(0.1, abs=0.01)
+
+def test_noise_sd_masks_the_converged_cell():
+    noise, rng = AdaptiveNoise(), random.Random(2)
+    assert noise.noise_sd(AB, 0.05) == 0.05
+    type_pairs(noise, rng, 4000)
+    target = noise.masking * abs(noise.means[AB] - noise.global_mean) + noise.floor
+    expected = math.sqrt((target ** 2 - noise.variances[AB]) / 2)
+    assert noise.noise_sd(AB, 1.0) == pytest.approx(expected)
+    assert noise.noise_sd(AB, 0.01) == 0.01
+
+def test_pauses_are_not_rhythm():
+    noise = AdaptiveNoise()
+    noise.observe('a', 0.0)
+    noise.observe('b', 10.0)
+    assert noise.counts[AB] == 0 and noise.global_mean == 0.0
@@ -0,0 +1,7 @@
+from benchmarks import bench_allocations
+
+def test_steady_typing_allocates_nothing_per_key():
+    result = bench_allocations(keys=20_000)
+    # An object kept per key costs at least 16 bytes; a constant few bytes remain
+    # from sample ring slots changing which float objects they share
+    assert round(result['net bytes/key']) <= 0
@@ -0,0 +1,35 @@
+import json
+import pytest
+from autotune import MIN_TEST_WINDOWS, accuracy_interval, save_delay_settings, scored_windows, tune
+from evaluation import DelaySetting, synthetic_corpus
+
+def test_saving_keeps_the_chosen_mode(tmp_path):
+    path = tmp_path / 'settings.json'
+    path.write_text(json.dumps({'mode': 'word', 'word_timeout': 0.5}))
+    save_delay_settings(str(path), DelaySetting('lognormal', 0.08, 0.04))
+    settings = json.loads(path.read_text())
+    assert (settings['mode'], settings['word_timeout']) == ('word', 0.5)
+    assert settings['base_delay'] == 0.08
+    assert settings['distribution']['type'] == 'lognormal'
+
+def test_saving_into_a_new_file_leaves_the_default_mode(tmp_path):
+    path = tmp_path / 'settings.json'
+    save_delay_settings(str(path), DelaySetting('uniform', 0.05, 0.01))
+    assert 'mode' not in json.loads(path.read_text())
+
+def test_interval_contains_the_accuracy_and_narrows_with_trials():
+    low, high = accuracy_interval(0.05, 40)
+    assert low < 0.05 < high
+    narrower = accuracy_interval(0.05, 400)
+    assert narrower[1] - narrower[0] < high - low
+    # A perfect score from a handful of windows says little
+    assert accuracy_interval(0.0, 10)[1] > 0.2
+
+def test_scored_windows_are_the_later_half():
+    assert scored_windows(2 * MIN_TEST_WINDOWS * 300 + 1, 300) == MIN_TEST_WINDOWS
+    assert scored_windows(7 * 300 + 1, 300) == 4
+
+def test_tune_refuses_too_few_windows():
+    corpus = synthetic_corpus(4, 3000, seed=1)
+    with pytest.raises(ValueError):
+        tune(corpus, 0.1, ['uniform'], workers=1)
@@ -0,0 +1,56 @@
+import json
+import numpy as np
+import pytest
+from bigram_cells import CODES, key_code
+from bigram_frequencies import BigramCounts, count_files, count_range, main, shards
+from scrambler_config import load_config
+from transition_analysis import CoverageReport
+from typing_patterns import TransitionType
+
+TEXT = "The quick brown fox jumps over the lazy dog. " * 40
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / 'corpus.txt'
+    path.write_text(TEXT)
+    return str(path)
+
+@pytest.mark.parametrize('shard_size,chunk_size', [(10, 5), (10, 10), (64, 7), (1000, 1 << 22)])
+def test_sharded_counts_equal_unsharded(corpus, shard_size, chunk_size):
+    whole = count_range(corpus, 0, len(TEXT), chunk_size=len(TEXT))
+    sharded = sum(count_range(path, start, end, lowercase, chunk_size)
+                  for path, start, end, lowercase in shards([corpus], shard_size))
+    assert sharded.sum() == len(TEXT) - 1
+    assert np.array_equal(sharded, whole)
+
+def test_worker_processes_match_one_process(corpus):
+    assert np.array_equal(count_files([corpus], workers=2, shard_size=100).counts,
+                          count_files([corpus]).counts)
+
+def test_counts_match_coverage_report():
+    counts = BigramCounts()
+    counts.add_bytes(TEXT.encode())
+    report = CoverageReport()
+    report.add_text(TEXT.lower())
+    assert np.array_equal(counts.counts, report.counts)
+    assert counts.most_common(2) == [('he', 80), ('th', 80)]
+
+def test_config_gives_the_bigram_strategy_the_pairs(corpus, tmp_path):
+    settings = tmp_path / 'settings.json'
+    settings.write_text(json.dumps({'mode': 'word', 'strategy': {'type': 'bigram', 'scale': 1.5}}))
+    main([corpus, '--top', '3', '--workers', '1', '--config', str(settings)])
+    strategy = json.loads(settings.read_text())['strategy']
+    assert strategy == {'type': 'bigram', 'scale': 1.5, 'common_pairs': ['he', 'th', 'az']}
+    config = load_config(str(settings))
+    assert config.mode == 'word'
+    assert config.strategy.scale == 1.5
+    # 'az' has no explicit transition, so only the promoted pair maps it
+    transition = config.strategy._cells[key_code('a') * CODES + key_code('z')]
+    assert transition.base_delay == TransitionType.COMMON_PAIR
+
+def test_config_refuses_another_strategy(corpus, tmp_path):
+    settings = tmp_path / 'settings.json'
+    settings.write_text(json.dumps({'strategy': {'type': 'quantized'}}))
+    with pytest.raises(SystemExit):
+        main([corpus, '--workers', '1', '--config', str(settings)])
+    assert json.loads(settings.read_text()) == {'strategy': {'type': 'quantized'}}
@@ -0,0 +1,41 @@
+import json
+from scrambler_config import ConfigStore, ConfigWatcher
+
+def write_settings(path, settings):
+    path.write_text(json.dumps(settings))
+
+def test_reload_keeps_runtime_overrides(tmp_path):
+    path = tmp_path / 'settings.json'
+    write_settings(path, {'variation': 0.01})
+    store = ConfigStore()
+    store.update(base_delay=0.2)
+    watcher = ConfigWatcher(store, str(path))
+    assert watcher.reload()
+    assert store.current.base_delay == 0.2
+    assert store.current.variation == 0.01
+
+    store.update(base_delay=0.25)
+    write_settings(path, {'variation': 0.03, 'mode': 'grid'})
+    assert watcher.reload()
+    assert store.current.base_delay == 0.25
+    assert (store.current.variation, store.current.mode) == (0.03, 'grid')
+
+def test_file_change_to_an_overridden_field_wins(tmp_path):
+    path = tmp_path / 'settings.json'
+    write_settings(path, {'base_delay': 0.1})
+    store = ConfigStore()
+    watcher = ConfigWatcher(store, str(path))
+    watcher.reload()
+    store.update(base_delay=0.25)
+    write_settings(path, {'base_delay': 0.15, 'grid_batch': 2})
+    assert watcher.reload()
+    assert store.current.base_delay == 0.15
+
+def test_listeners_see_reloaded_snapshots(tmp_path):
+    path = tmp_path / 'settings.json'
+    write_settings(path, {'base_delay': 0.12})
+    store = ConfigStore()
+    seen = []
+    store.add_listener(lambda config: seen.append(config.base_delay))
+    ConfigWatcher(store, str(path)).reload()
+    assert seen == [0.12]
@@ -0,0 +1,54 @@
+import socket
+import pytest
+from keystroke_core import KeystrokeScrambler
+from scrambler_config import ScramblerConfig
+from scrambler_daemon import ScramblerDaemon
+from simulation import SimulatedBackend
+
+def make_daemon(socket_path='unused.sock'):
+    return ScramblerDaemon(KeystrokeScrambler(backend=SimulatedBackend()), str(socket_path))
+
+@pytest.mark.parametrize('value', ['nan', 'inf', '-inf', '-5', '0', '1e9'])
+def test_delay_rejects_unusable_values(value):
+    daemon = make_daemon()
+    assert daemon.handle_command(f"DELAY {value}").startswith("ERR")
+    assert daemon.scrambler.base_delay == 0.1
+
+def test_delay_sets_the_base_delay():
+    daemon = make_daemon()
+    assert daemon.handle_command("DELAY 150") == "OK"
+    assert daemon.scrambler.base_delay == 0.15
+
+def test_config_rejects_non_finite_fields():
+    with pytest.raises(ValueError):
+        ScramblerConfig(variation=float('nan'))
+    with pytest.raises(ValueError):
+        ScramblerConfig(word_timeout=float('inf'))
+
+def test_serve_refuses_a_live_socket(tmp_path):
+    path = tmp_path / 'live.sock'
+    live = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    live.bind(str(path))
+    live.listen(1)
+    try:
+        with pytest.raises(RuntimeError):
+            make_daemon(path).serve()
+        assert path.exists()
+    finally:
+        live.close()
+
+def test_serve_replaces_a_stale_socket(tmp_path):
+    path = tmp_path / 'stale.sock'
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    daemon = make_daemon(path)
+    daemon.serve()
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(str(path))
+        client.sendall(b"STATS\n")
+        assert client.makefile('rb').readline().startswith(b"OK")
+        client.close()
+    finally:
+        daemon.shutdown()
@@ -0,0 +1,44 @@
+import math
+import random
+import statistics
+import pytest
+from delay_distributions import DelayDistribution, ExGaussianDelay, GammaDelay, LogNormalDelay, UniformDelay
+
+# Each distribution with its exact mean and variance
+CASES = [
+    (UniformDelay(0.1, 0.02), 0.1, 0.02 ** 2 / 3),
+    (LogNormalDelay(0.1, 0.3), 0.1 * math.exp(0.3 ** 2 / 2), (math.exp(0.3 ** 2) - 1) * 0.1 ** 2 * math.exp(0.3 ** 2)),
+    (GammaDelay(4, 0.025), 0.1, 4 * 0.025 ** 2),
+    (ExGaussianDelay(0.07, 0.015, 0.03), 0.1, 0.015 ** 2 + 0.03 ** 2),
+]
+
+@pytest.mark.parametrize('distribution, mean, variance', CASES)
+def test_samples_match_the_moments(distribution, mean, variance):
+    rng = random.Random(1)
+    draws = [distribution.sample(rng) for _ in range(100_000)]
+    assert distribution.mean() == pytest.approx(mean, rel=1e-3)
+    assert statistics.fmean(draws) == pytest.approx(mean, rel=0.01)
+    # Cutting the tails beyond the outermost table quantiles loses a little variance
+    assert 0.95 * variance < statistics.pvariance(draws) < 1.01 * variance
+
+@pytest.mark.parametrize('distribution, mean, variance', CASES)
+def test_table_truncates_at_the_outermost_quantiles(distribution, mean, variance):
+    n = distribution.table_size
+    assert distribution.table[0] == max(0.0, distribution.quantile(0.5 / n))
+    assert distribution.table[-1] == distribution.quantile(1 - 0.5 / n)
+    rng = random.Random(2)
+    draws = [distribution.sample(rng) for _ in range(20_000)]
+    assert distribution.table[0] <= min(draws) and max(draws) <= distribution.table[-1]
+
+def test_negative_quantiles_are_clamped_to_zero():
+    distribution = ExGaussianDelay(0.0, 0.02, 0.01)
+    assert distribution.quantile(0.1) < 0
+    assert distribution.table[0] == 0.0
+    assert min(distribution.sample(random.Random(3)) for _ in range(10_000)) >= 0.0
+
+def test_distribution_must_implement_quantile():
+    class Unfinished(DelayDistribution):
+        pass
+
+    with pytest.raises(TypeError):
+        Unfinished()
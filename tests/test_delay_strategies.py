@@ -0,0 +1,17 @@
+import pytest
+from delay_strategies import DelayStrategy, PersonaStrategy
+
+def test_strategy_must_implement_both_draws():
+    class PerEventOnly(DelayStrategy):
+        def next_delay(self, prev, cur, now, rng):
+            return 0.1
+
+    with pytest.raises(TypeError):
+        PerEventOnly()
+
+def test_seeded_persona_is_fitted_once():
+    first, second = PersonaStrategy(wpm=75, seed=4), PersonaStrategy(wpm=75, seed=4, max_delay=0.3)
+    assert first.means is second.means and first.half_widths is second.half_widths
+    assert PersonaStrategy(wpm=75, seed=5).means is not first.means
+    # Unseeded personas differ each time, so they are never shared
+    assert PersonaStrategy(wpm=75, seed=None).means is not PersonaStrategy(wpm=75, seed=None).means
@@ -0,0 +1,46 @@
+import queue
+import threading
+from gui_scrambler import ScramblerGUI
+from scrambler_config import ConfigStore
+
+class RecordingRoot:
+    """Stands in for the Tk root, noting which thread scheduled each call."""
+
+    def __init__(self):
+        self.after_threads = []
+
+    def after(self, ms, callback):
+        self.after_threads.append(threading.current_thread())
+        return 'after#1'
+
+def make_gui():
+    gui = ScramblerGUI.__new__(ScramblerGUI)
+    gui.root = RecordingRoot()
+    gui._config_updates = queue.Queue()
+    gui._config_poll = None
+    gui.shown = []
+    gui._show_delay = gui.shown.append
+    return gui
+
+def test_watcher_thread_never_calls_tk():
+    gui = make_gui()
+    store = ConfigStore()
+    store.add_listener(gui._on_config_changed)
+    writer = threading.Thread(target=lambda: store.update(base_delay=0.15))
+    writer.start()
+    writer.join()
+    assert gui.root.after_threads == []
+
+    gui._drain_config_updates()
+    assert gui.shown == [0.15]
+    assert gui.root.after_threads == [threading.main_thread()]
+
+def test_drain_shows_only_the_newest_snapshot():
+    gui = make_gui()
+    store = ConfigStore()
+    store.add_listener(gui._on_config_changed)
+    for delay in (0.12, 0.13, 0.14):
+        store.update(base_delay=delay)
+    gui._drain_config_updates()
+    gui._drain_config_updates()
+    assert gui.shown == [0.14]
@@ -0,0 +1,24 @@
+from key_codes import FLAG_SHIFT, KeyCodeTable
+from keystroke_core import KeystrokeScrambler
+from random_streams import RandomStreams
+from simulation import SimulatedBackend
+
+def test_posted_keys_carry_us_ansi_key_codes():
+    backend = SimulatedBackend()
+    scrambler = KeystrokeScrambler(backend=backend, rng=RandomStreams(0))
+    scrambler.start()
+    for i, key in enumerate("aA1! \r"):
+        backend.feed(key, i * 0.2)
+    backend.run_until_idle()
+    # kVK_ANSI_A, kVK_ANSI_1, kVK_Space and kVK_Return
+    assert backend.events == [('a', 0x00, 0), ('A', 0x00, FLAG_SHIFT), ('1', 0x12, 0), ('!', 0x12, FLAG_SHIFT),
+                              (' ', 0x31, 0), ('\r', 0x24, 0)]
+
+def test_untypable_keys_fall_back_to_code_zero():
+    assert KeyCodeTable.us_ansi().lookup('é') == (0, 0)
+
+def test_translator_prefers_the_plainest_modifiers():
+    layout = {(0, 0x00): 'q', (0, 0x02): 'Q', (1, 0x00): 'Q', (2, 0x08): ''}
+    table = KeyCodeTable.from_translator(lambda code, state: layout.get((code, state), ''), codes=3)
+    assert table.lookup('Q') == (1, 0)
+    assert table.lookup('') == (0, 0)
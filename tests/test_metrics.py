@@ -0,0 +1,25 @@
+from keystroke_core import KeystrokeScrambler
+from metrics_exporter import MetricsCollector
+from random_streams import RandomStreams
+from simulation import SimulatedBackend
+
+def metric(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + ' '):
+            return float(line.split()[1])
+    raise KeyError(name)
+
+def test_bucket_queueing_is_exported():
+    backend = SimulatedBackend()
+    scrambler = KeystrokeScrambler(backend=backend, rng=RandomStreams(0))
+    scrambler.config_store.update(mode='bucket')
+    scrambler.start()
+    collector = MetricsCollector(scrambler)
+    # 50 keys/s against the default 12 keys/s bucket
+    for i in range(100):
+        backend.feed('a', i * 0.02)
+    text = collector.render()
+    assert metric(text, 'keystroke_scrambler_bucket_delay_seconds') > 0
+    assert metric(text, 'keystroke_scrambler_bucket_overflows_total') > 0
+    backend.run_until_idle()
+    assert metric(collector.render(), 'keystroke_scrambler_added_latency_seconds_count') == 100
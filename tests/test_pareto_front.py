@@ -0,0 +1,25 @@
+import random
+from evaluation import pareto_front
+
+def dominates(a, b):
+    """a is no worse than b on both axes and better on one."""
+    return (a['mean_ms'] <= b['mean_ms'] and a['accuracy'] <= b['accuracy']
+            and (a['mean_ms'] < b['mean_ms'] or a['accuracy'] < b['accuracy']))
+
+def test_front_is_exactly_the_undominated_points():
+    rng = random.Random(0)
+    # Coarse values, so ties on either axis are common
+    points = [{'mean_ms': rng.randint(0, 20), 'accuracy': rng.randint(0, 20) / 20} for _ in range(300)]
+    front = pareto_front(points)
+    assert [p['mean_ms'] for p in front] == sorted(p['mean_ms'] for p in front)
+    for point in front:
+        assert not any(dominates(other, point) for other in points)
+    for point in points:
+        if not any(point is kept for kept in front):
+            assert any(dominates(kept, point) or kept == point for kept in front)
+
+def test_front_keeps_one_of_equal_points_and_honours_the_axes():
+    points = [{'mean_ms': 10, 'accuracy': 0.5, 'p99_ms': 30}, {'mean_ms': 10, 'accuracy': 0.5, 'p99_ms': 20},
+              {'mean_ms': 20, 'accuracy': 0.2, 'p99_ms': 25}, {'mean_ms': 30, 'accuracy': 0.2, 'p99_ms': 10}]
+    assert pareto_front(points) == points[:1] + points[2:3]
+    assert pareto_front(points, x='p99_ms') == [points[3]]
@@ -0,0 +1,103 @@
+import itertools
+import pytest
+from random_streams import RandomStreams
+from release_planner import ReleasePlanner
+from synthetic_typist import SyntheticTypist
+
+MIN_GAP = 0.005
+
+def plan_stream(wpm, keys, noise, seed):
+    """Plan keys as the engine does.
+
+    Returns captures, capped noises, releases, and for each key the window
+    of keys pending at its capture with their total lag right after planning it.
+    """
+    down = SyntheticTypist(wpm, 0.3, seed=seed).generate(keys).down.tolist()
+    rng = RandomStreams(seed)
+    planner = ReleasePlanner(MIN_GAP)
+    noises, releases, windows = [], [], []
+    for k, captured in enumerate(down):
+        drawn = noise * (1.0 + rng.random())
+        pending = [j for j, release in enumerate(releases) if release > captured]
+        prev_pending = bool(pending) and pending[-1] == k - 1
+        release, raised = planner.plan(captured, drawn, releases[-1] if releases else float('-inf'), prev_pending)
+        if raised is not None:
+            releases[-1] = raised
+        releases.append(release)
+        gap = captured - down[k - 1] if k else float('inf')
+        noises.append(min(drawn, max(gap - MIN_GAP, 0.0)))
+        window = pending + [k]
+        windows.append((window, sum(releases[j] - down[j] for j in window)))
+    return down, noises, releases, windows
+
+def least_lags(gaps, noises, lower, fixed, shorten):
+    """Smallest lags for the window keys with each gap shortened or lengthened as given, or None.
+
+    Every constraint is a difference bound, so raising lags to their bounds
+    until nothing changes yields the least solution, which also has the
+    least total.
+    """
+    lags = list(lower)
+    if fixed is None:
+        # The first key ever is lengthened from an infinite gap
+        lags[0] = max(lags[0], noises[0])
+    for _ in range(4 * len(lags)):
+        changed = False
+        for i in range(len(lags)):
+            prev = fixed if i == 0 else lags[i - 1]
+            if prev is None:
+                continue
+            bound = prev - gaps[i] + MIN_GAP
+            if not shorten[i]:
+                bound = max(bound, prev + noises[i])
+            if lags[i] < bound:
+                lags[i], changed = bound, True
+            if shorten[i] and i and lags[i - 1] < lags[i] + noises[i]:
+                lags[i - 1], changed = lags[i] + noises[i], True
+        if not changed:
+            break
+    for i in range(len(lags)):
+        prev = fixed if i == 0 else lags[i - 1]
+        if prev is None:
+            continue
+        if lags[i] < prev - gaps[i] + MIN_GAP - 1e-9:
+            return None
+        if (lags[i] > prev - noises[i] + 1e-9) if shorten[i] else (lags[i] < prev + noises[i] - 1e-9):
+            return None
+    return lags
+
+def joint_optimum(down, noises, releases, window, now):
+    """Least total lag over the pending window, searching every shorten/lengthen choice."""
+    first = window[0]
+    fixed = releases[first - 1] - down[first - 1] if first else None
+    gaps = [down[j] - down[j - 1] if j else 0.0 for j in window]
+    lower = [max(down[j], now) - down[j] for j in window]
+    best = None
+    for shorten in itertools.product((False, True), repeat=len(window)):
+        lags = least_lags(gaps, [noises[j] for j in window], lower, fixed, shorten)
+        if lags is not None and (best is None or sum(lags) < best):
+            best = sum(lags)
+    return best
+
+@pytest.mark.parametrize('wpm', [60, 250, 400])
+def test_releases_keep_order_min_gap_and_noise(wpm):
+    down, noises, releases, _ = plan_stream(wpm, 3000, 0.03, seed=1)
+    for k in range(1, len(down)):
+        assert releases[k] >= down[k]
+        released_gap = releases[k] - releases[k - 1]
+        assert released_gap >= MIN_GAP - 1e-9
+        assert abs(released_gap - (down[k] - down[k - 1])) >= noises[k] - 1e-9
+
+def test_added_latency_stays_bounded_when_typing_outpaces_the_noise():
+    down, _, releases, _ = plan_stream(400, 5000, 0.06, seed=2)
+    lags = [release - captured for captured, release in zip(down, releases)]
+    # The noise is at most 0.12 s; without the cap on shortening, lags would keep growing
+    assert max(lags) < 0.25
+    assert sum(lags[-500:]) / 500 < 0.1
+
+@pytest.mark.parametrize('wpm,noise', [(150, 0.03), (250, 0.06), (400, 0.03)])
+def test_one_step_replanning_matches_the_joint_optimum(wpm, noise):
+    down, noises, releases, windows = plan_stream(wpm, 800, noise, seed=0)
+    assert max(len(window) for window, _ in windows) >= 3
+    for k, (window, planned) in enumerate(windows):
+        assert planned <= joint_optimum(down, noises, releases, window, down[k]) + 1e-6, f"key {k}"
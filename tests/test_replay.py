@@ -0,0 +1,11 @@
+from simulation import replay
+
+TRACE = [(i * 0.09, i * 0.09 + 0.05, key) for i, key in enumerate("the quick brown fox jumps over the lazy dog")]
+
+def test_seeded_replay_is_deterministic():
+    first = replay(TRACE, seed=7)
+    assert len(first) == len(TRACE)
+    assert replay(TRACE, seed=7) == first
+
+def test_seed_changes_the_timings():
+    assert replay(TRACE, seed=7) != replay(TRACE, seed=8)
@@ -0,0 +1,15 @@
+from secure_jitter import SecureJitter
+
+def test_draws_are_uniform_in_range():
+    jitter = SecureJitter(block_size=1024)
+    draws = [jitter.random() for _ in range(50_000)]
+    assert 0.0 <= min(draws) and max(draws) < 1.0
+    assert abs(sum(draws) / len(draws) - 0.5) < 0.01
+    # Each octave gets the share a uniform draw would
+    for edge in (0.5, 0.25, 0.125, 1 / 64):
+        assert abs(sum(draw < edge for draw in draws) / len(draws) - edge) < 0.01
+
+def test_uniform_scales_the_draws():
+    jitter = SecureJitter(block_size=1024)
+    draws = [jitter.uniform(-0.02, 0.02) for _ in range(5000)]
+    assert -0.02 <= min(draws) and max(draws) < 0.02
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from session_analytics import SessionAnalysis
+from session_recorder import key_class, record_dtype
+
+def make_records(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    records = np.zeros(n, dtype=record_dtype())
+    keys = rng.choice(list("etaoin s"), n)
+    records['seq'] = np.arange(n)
+    # Mostly typing, with the odd pause the interval statistics skip
+    gaps = np.where(rng.random(n) < 0.02, 5.0, rng.uniform(0.05, 0.3, n))
+    records['captured_at'] = np.cumsum(gaps)
+    records['intended_delay'] = rng.uniform(0.05, 0.15, n)
+    records['released_at'] = records['captured_at'] + records['intended_delay'] + rng.uniform(0, 0.002, n)
+    records['key'] = [ord(key) if key != ' ' else 0 for key in keys]
+    records['key_class'] = [key_class(key) for key in keys]
+    return records
+
+def analyse(records, chunk):
+    analysis = SessionAnalysis()
+    analysis.add_session(records, chunk)
+    return analysis
+
+@pytest.mark.parametrize('chunk', [1, 2, 3, 7, 64, 499])
+def test_chunked_results_equal_one_pass(chunk):
+    records = make_records()
+    whole, chunked = analyse(records, len(records)), analyse(records, chunk)
+    assert chunked.keys == whole.keys == len(records)
+    for name in ('added_ms', 'lateness_ms', 'original_iki_ms', 'scrambled_iki_ms'):
+        assert np.array_equal(getattr(chunked, name).counts, getattr(whole, name).counts), name
+        assert getattr(chunked, name).overflow == getattr(whole, name).overflow, name
+    assert np.array_equal(chunked.bigrams.ids, whole.bigrams.ids)
+    assert np.allclose(chunked.bigrams.moments, whole.bigrams.moments)
+
+def test_every_typing_interval_is_counted_once():
+    records = make_records()
+    analysis = analyse(records, 10)
+    gaps = np.diff(records['captured_at'])
+    typing = int(((gaps > 0) & (gaps <= analysis.max_gap)).sum())
+    assert analysis.original_iki_ms.total == typing
+    assert analysis.bigrams.moments[:, 0].sum() == typing
+
+def test_sessions_are_not_joined():
+    records = make_records()
+    analysis = SessionAnalysis()
+    analysis.add_session(records[:200], 50)
+    analysis.add_session(records[200:], 50)
+    # The interval between the two sessions is not typing
+    between = records['captured_at'][200] - records['captured_at'][199]
+    joined = analyse(records, 50).original_iki_ms.total
+    assert analysis.original_iki_ms.total == joined - int(0 < between <= analysis.max_gap)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from session_recorder import (HEADER, KEY_BACKSPACE, KEY_DIGIT, KEY_LETTER, KEY_PUNCTUATION, KEY_SPACE, RECORD,
+                              SessionRecorder, open_session)
+
+def record_keys(path, keys, characters=False, start=0):
+    recorder = SessionRecorder(str(path), characters=characters, flush_interval=60)
+    for i, key in enumerate(keys, start):
+        recorder.record(i, key, i * 0.1, i * 0.1 + 0.05, i * 0.1 + 0.06)
+    recorder.close()
+    return recorder
+
+def test_written_records_read_back_through_the_memmap(tmp_path):
+    path = tmp_path / 'session.rec'
+    assert record_keys(path, "a1 ,\x7f", characters=True).written == 5
+    records = open_session(str(path))
+    assert isinstance(records, np.memmap)
+    assert records['seq'].tolist() == [0, 1, 2, 3, 4]
+    assert records['captured_at'] == pytest.approx([0.0, 0.1, 0.2, 0.3, 0.4])
+    assert records['released_at'] == pytest.approx([0.06, 0.16, 0.26, 0.36, 0.46])
+    assert records['intended_delay'] == pytest.approx([0.05] * 5)
+    assert records['key'].tolist() == [ord(key) for key in "a1 ,\x7f"]
+    assert records['key_class'].tolist() == [KEY_LETTER, KEY_DIGIT, KEY_SPACE, KEY_PUNCTUATION, KEY_BACKSPACE]
+
+def test_characters_are_only_stored_when_opted_into(tmp_path):
+    path = tmp_path / 'session.rec'
+    record_keys(path, "ab")
+    records = open_session(str(path))
+    assert records['key'].tolist() == [0, 0]
+    assert records['key_class'].tolist() == [KEY_LETTER, KEY_LETTER]
+
+def test_torn_record_is_ignored_then_truncated(tmp_path):
+    path = tmp_path / 'session.rec'
+    record_keys(path, "abc")
+    # A crash part way through the fourth record
+    with open(path, 'ab') as f:
+        f.write(b'\xff' * (RECORD.size // 2))
+    assert open_session(str(path))['seq'].tolist() == [0, 1, 2]
+
+    record_keys(path, "de", start=3)
+    assert path.stat().st_size == HEADER.size + 5 * RECORD.size
+    assert open_session(str(path))['seq'].tolist() == [0, 1, 2, 3, 4]
+
+def test_empty_and_foreign_files(tmp_path):
+    path = tmp_path / 'session.rec'
+    record_keys(path, "")
+    assert len(open_session(str(path))) == 0
+    other = tmp_path / 'other.rec'
+    other.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        open_session(str(other))
+    with pytest.raises(ValueError):
+        SessionRecorder(str(other))
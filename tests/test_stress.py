@@ -0,0 +1,33 @@
+import pytest
+from delay_strategies import STRATEGIES
+from scrambler_config import MODES
+from stress_test import run_stress, tag, untag
+
+@pytest.mark.parametrize('mode', [mode for mode in MODES if mode != 'strategy'])
+@pytest.mark.parametrize('wpm', [60, 300])
+def test_every_key_released_once_in_order(mode, wpm):
+    report = run_stress(wpm, keys=2000, toggle_interval=2.0, seed=3, mode=mode)
+    assert report.toggles > 0
+    assert (report.lost, report.duplicated, report.reordered) == (0, 0, 0)
+
+@pytest.mark.parametrize('strategy', sorted(STRATEGIES))
+def test_every_strategy_releases_once_in_order(strategy):
+    report = run_stress(180, keys=2000, toggle_interval=2.0, seed=3, mode='strategy', strategy=strategy)
+    assert report.ok
+
+def test_bucket_queueing_is_bounded():
+    report = run_stress(300, keys=5000, toggle_interval=0, seed=1, mode='bucket')
+    # bucket_max_delay of 0.5 s on top of a jittered 0.1 s delay
+    assert report.latency_ms['max'] < 650
+
+def test_tags_keep_letters_boundaries_and_backspaces():
+    for seq, key in enumerate("a Z9.\n"):
+        tagged = tag(seq, key)
+        assert tagged.isalnum() == key.isalnum()
+        assert untag(tagged) == seq
+    assert tag(7, '\b') == '\b'
+
+def test_word_mode_retracts_typos_without_losing_keys():
+    report = run_stress(120, keys=3000, toggle_interval=2.0, seed=5, mode='word', error_rate=0.05)
+    assert report.retracted > 0
+    assert report.ok
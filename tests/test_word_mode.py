@@ -0,0 +1,61 @@
+from keystroke_core import KeystrokeScrambler
+from random_streams import RandomStreams
+from simulation import SimulatedBackend
+
+class CountingBackend(SimulatedBackend):
+    def __init__(self):
+        super().__init__()
+        self.timers = 0
+
+    def call_later(self, delay, callback):
+        self.timers += 1
+        super().call_later(delay, callback)
+
+def word_scrambler(timeout=1.0):
+    backend = CountingBackend()
+    scrambler = KeystrokeScrambler(backend=backend, rng=RandomStreams(0))
+    scrambler.config_store.update(mode='word', word_timeout=timeout)
+    scrambler.start()
+    return scrambler, backend
+
+def type_keys(backend, keys, interval=0.1):
+    for i, key in enumerate(keys):
+        backend.feed(key, i * interval)
+    backend.run_until_idle()
+
+def test_backspace_inside_a_word_is_never_posted():
+    scrambler, backend = word_scrambler()
+    type_keys(backend, "cat\x7f\x7fow ")
+    assert ''.join(key for _, key in backend.emitted) == "cow "
+    assert scrambler.retracted == 2
+    # Each backspace takes back itself and the key it deletes
+    assert scrambler.captured == scrambler.released + 2 * scrambler.retracted
+
+def test_backspace_after_a_boundary_is_posted():
+    scrambler, backend = word_scrambler()
+    type_keys(backend, "to \x7f")
+    assert ''.join(key for _, key in backend.emitted) == "to \x7f"
+    assert scrambler.retracted == 0
+
+def test_one_timer_per_word():
+    scrambler, backend = word_scrambler()
+    type_keys(backend, "one two three ")
+    assert backend.timers == 3
+    assert scrambler.released == 14
+
+def test_word_is_released_at_its_timeout_with_synthesized_stamps():
+    scrambler, backend = word_scrambler(timeout=1.0)
+    type_keys(backend, "hello ", interval=0.15)
+    # Posted together when the word's timeout passes
+    assert {when for when, _ in backend.emitted} == {1.0}
+    stamps = backend.timestamps
+    assert stamps == sorted(stamps) and stamps[-1] == 1.0
+    # The word never spans more than it took to type
+    assert stamps[-1] - stamps[0] <= 0.75 + 1e-9
+
+def test_unfinished_word_is_released_by_its_timeout():
+    scrambler, backend = word_scrambler(timeout=0.5)
+    type_keys(backend, "abc")
+    assert [key for _, key in backend.emitted] == ['a', 'b', 'c']
+    assert backend.emitted[0][0] == 0.5
+    assert backend.timers == 1
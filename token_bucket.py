@@ -0,0 +1,44 @@
+from typing import Optional
+
+class TokenBucket:
+    """Caps the release rate while allowing short bursts.
+
+    Tokens refill at `rate` per second up to `burst`; each key spends one.
+    A key arriving with no token waits until one refills, so a run of n
+    keys beyond the burst is delayed by at most (n - burst) / rate, or by
+    the limit passed to shape().
+    """
+
+    __slots__ = ('tokens', 'last', 'last_delay')
+
+    def __init__(self):
+        self.tokens = 0.0
+        self.last = float('-inf')
+        # Time the most recently shaped key was held, queueing included
+        self.last_delay = 0.0
+
+    def shape(self, at: float, rate: float, burst: float, limit: float = float('inf')) -> Optional[float]:
+        """Return when a key ready at `at` may leave; `at` must not decrease between calls.
+
+        A key that would be held more than limit seconds is refused: the
+        result is None and the bucket is left as it was.
+        """
+        ready = at
+        if at > self.last:
+            tokens = self.tokens + (at - self.last) * rate
+            if tokens > burst:
+                tokens = burst
+        else:
+            tokens = self.tokens
+            at = self.last
+        if tokens >= 1.0:
+            tokens -= 1.0
+        else:
+            at += (1.0 - tokens) / rate
+            tokens = 0.0
+        if at - ready > limit:
+            return None
+        self.tokens = tokens
+        self.last = at
+        self.last_delay = at - ready
+        return at
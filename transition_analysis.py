@@ -0,0 +1,138 @@
+import argparse
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from bigram_cells import CODES
+from typing_patterns import CATEGORY_BY_DELAY, TypingPatternMap
+
+CATEGORIES = tuple(sorted(CATEGORY_BY_DELAY.values())) + ('CUSTOM', 'DEFAULT')
+
+def encode(text: str) -> np.ndarray:
+    """Code point of every character, with non-ASCII ones mapped to 0."""
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    codes[codes >= CODES] = 0
+    return codes
+
+class TransitionTable:
+    """Every ASCII bigram's TypingPatternMap transition, compiled into flat arrays."""
+
+    def __init__(self, pattern_map: Optional[TypingPatternMap] = None):
+        pattern_map = pattern_map if pattern_map is not None else TypingPatternMap()
+        cells = CODES * CODES
+        self.category = np.empty(cells, dtype=np.uint8)
+        self.expected = np.empty(cells)
+        self.variance = np.empty(cells)
+        self.explicit = np.empty(cells, dtype=bool)
+        index = {name: i for i, name in enumerate(CATEGORIES)}
+        for first in range(CODES):
+            for second in range(CODES):
+                info = pattern_map.describe_transition(chr(first), chr(second))
+                cell = first * CODES + second
+                self.category[cell] = index[info.category]
+                self.expected[cell] = info.expected
+                self.variance[cell] = info.variance
+                self.explicit[cell] = info.explicit
+
+@dataclass
+class TransitionAnalysis:
+    """One row per bigram of the analyzed text, as parallel arrays."""
+    first: np.ndarray
+    second: np.ndarray
+    category: np.ndarray
+    expected: np.ndarray
+    variance: np.ndarray
+    explicit: np.ndarray
+
+    def __len__(self):
+        return len(self.first)
+
+    def category_names(self) -> np.ndarray:
+        """category as names rather than indices into CATEGORIES."""
+        return np.asarray(CATEGORIES)[self.category]
+
+def _cells(codes: np.ndarray) -> np.ndarray:
+    return codes[:-1] * CODES + codes[1:]
+
+def analyze_text(text: str, table: Optional[TransitionTable] = None) -> TransitionAnalysis:
+    """Transition category, expected delay, variance and mapping of every bigram in text."""
+    table = table if table is not None else TransitionTable()
+    codes = encode(text)
+    cells = _cells(codes)
+    return TransitionAnalysis(codes[:-1], codes[1:], table.category[cells], table.expected[cells],
+                              table.variance[cells], table.explicit[cells])
+
+class CoverageReport:
+    """Bigram counts over any amount of text and how many have an explicit mapping."""
+
+    def __init__(self, table: Optional[TransitionTable] = None, counts: Optional[np.ndarray] = None):
+        self.table = table if table is not None else TransitionTable()
+        self.counts = counts.astype(np.int64) if counts is not None else np.zeros(CODES * CODES, dtype=np.int64)
+
+    def add_text(self, text: str):
+        """Count the bigrams of text; bigrams spanning two added texts are not counted."""
+        if len(text) > 1:
+            self.counts += np.bincount(_cells(encode(text)), minlength=CODES * CODES)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def explicit_fraction(self) -> float:
+        """Share of bigrams, weighted by occurrence, with an explicit mapping."""
+        total = self.total
+        return float(self.counts[self.table.explicit].sum()) / total if total else 0.0
+
+    def top_fallbacks(self, n: int = 20) -> List[Tuple[str, int]]:
+        """The n most frequent bigrams that fall back to the default transition."""
+        fallback = np.where(self.table.explicit, 0, self.counts)
+        cells = np.argsort(-fallback, kind='stable')[:n]
+        return [(chr(cell // CODES) + chr(cell % CODES), int(fallback[cell])) for cell in cells if fallback[cell]]
+
+    def by_category(self) -> Dict[str, Tuple[int, float]]:
+        """Bigram count and occurrence-weighted mean expected delay per category."""
+        counts = np.bincount(self.table.category, weights=self.counts, minlength=len(CATEGORIES))
+        delays = np.bincount(self.table.category, weights=self.counts * self.table.expected, minlength=len(CATEGORIES))
+        return {name: (int(counts[i]), float(delays[i] / counts[i]))
+                for i, name in enumerate(CATEGORIES) if counts[i]}
+
+def read_texts(paths: Sequence[str], chunk_size: int = 1 << 22) -> Iterable[str]:
+    """Text of each path ('-' for stdin) in chunks of up to chunk_size characters."""
+    for path in paths:
+        f = sys.stdin if path == '-' else open(path, encoding='utf-8', errors='replace')
+        try:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Report which bigrams of real text the typing pattern map covers."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('paths', nargs='+', help="text files ('-' for stdin)")
+    parser.add_argument('--top', type=int, default=20, help="most frequent unmapped bigrams to list")
+    parser.add_argument('--lowercase', action='store_true', help="fold case first, as the word mode does")
+    args = parser.parse_args(argv)
+
+    report = CoverageReport()
+    try:
+        for text in read_texts(args.paths):
+            report.add_text(text.lower() if args.lowercase else text)
+    except OSError as e:
+        print(f"Error reading text: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"{report.total} bigrams, {report.explicit_fraction:.1%} explicitly mapped")
+    print(f"\n{'category':<18} {'bigrams':>10} {'mean ms':>8}")
+    for name, (count, delay) in sorted(report.by_category().items(), key=lambda item: -item[1][0]):
+        print(f"{name:<18} {count:>10} {delay * 1000:>8.1f}")
+    print("\nMost frequent bigrams using the default transition:")
+    for bigram, count in report.top_fallbacks(args.top):
+        print(f"  {bigram!r:<8} {count:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,32 @@
-from dataclasses import dataclass
-import random
 import time
-from typing import Dict, Tuple
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from delay_distributions import DelayDistribution
+from secure_jitter import default_jitter
 
-@dataclass
-class KeyTransition:
+class KeyTransition(NamedTuple):
     base_delay: float
     variability: float
+    distribution: Optional[DelayDistribution] = None
+
+    def sample(self, rng) -> float:
+        """Draw a delay, from the compiled distribution if one is set."""
+        if self.distribution is not None:
+            return self.distribution.sample(rng)
+        return self.base_delay + rng.uniform(-self.variability, self.variability)
+
+    def moments(self) -> Tuple[float, float]:
+        """Mean and variance of the delays sample() draws."""
+        if self.distribution is not None:
+            table = self.distribution.table
+            mean = sum(table) / len(table)
+            return mean, sum((x - mean) ** 2 for x in table) / len(table)
+        return self.base_delay, self.variability ** 2 / 3
+
+class TransitionInfo(NamedTuple):
+    category: str
+    expected: float
+    variance: float
+    explicit: bool
 
 class TransitionType:
     SAME_FINGER = 0.12
@@ -18,6 +38,19 @@ class TransitionType:
     CROSS_HAND = 0.13
     LONG_STRETCH = 0.14
 
+# Used for every pair without an explicit mapping
+DEFAULT_TRANSITION = KeyTransition(TransitionType.ALTERNATING_HAND, 0.015)
+# TransitionType names by delay, to label mapped transitions
+CATEGORY_BY_DELAY = {value: name for name, value in vars(TransitionType).items() if not name.startswith('_')}
+
+def transition_category(transition: Optional[KeyTransition]) -> str:
+    """TransitionType name of a mapped transition; CUSTOM if it has its own distribution, DEFAULT if unmapped."""
+    if transition is None:
+        return 'DEFAULT'
+    if transition.distribution is not None:
+        return 'CUSTOM'
+    return CATEGORY_BY_DELAY.get(transition.base_delay, 'CUSTOM')
+
 class VirtualKeyCode:
     # Map common keys to codes
     A = 'a'
@@ -48,8 +81,22 @@ class VirtualKeyCode:
     L = 'l'
 
 class TypingPatternMap:
-    def __init__(self):
+    def __init__(self, rng=None, common_pairs: Iterable[str] = ()):
+        self.rng = rng if rng is not None else default_jitter()
         self.key_relationships = self._build_key_relationships()
+        self.promote_common_pairs(common_pairs)
+
+    def promote_common_pairs(self, pairs: Iterable[str]) -> int:
+        """Map each two-key pair without an explicit mapping as a COMMON_PAIR; returns how many were added."""
+        added = 0
+        for pair in pairs:
+            if len(pair) != 2:
+                raise ValueError(f"common pair {pair!r} must be two keys")
+            row = self.key_relationships.setdefault(pair[0], {})
+            if pair[1] not in row:
+                row[pair[1]] = KeyTransition(TransitionType.COMMON_PAIR, 0.01)
+                added += 1
+        return added
 
     def _build_key_relationships(self) -> Dict[str, Dict[str, KeyTransition]]:
         relationships = {}
@@ -98,9 +145,14 @@ class TypingPatternMap:
 
     def get_transition_delay(self, from_key: str, to_key: str) -> float:
         if from_key in self.key_relationships and to_key in self.key_relationships[from_key]:
-            transition = self.key_relationships[from_key][to_key]
-            return transition.base_delay + random.uniform(-transition.variability, transition.variability)
-        return TransitionType.ALTERNATING_HAND + random.uniform(-0.015, 0.015)
+            return self.key_relationships[from_key][to_key].sample(self.rng)
+        return DEFAULT_TRANSITION.sample(self.rng)
+
+    def describe_transition(self, from_key: str, to_key: str) -> TransitionInfo:
+        """Category, delay mean and variance, and whether the pair is explicitly mapped."""
+        transition = self.key_relationships.get(from_key, {}).get(to_key)
+        mean, variance = (transition or DEFAULT_TRANSITION).moments()
+        return TransitionInfo(transition_category(transition), mean, variance, transition is not None)
 
     def analyze_transition(self, from_key: str, to_key: str) -> str:
         delay = self.get_transition_delay(from_key, to_key)